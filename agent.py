@@ -0,0 +1,434 @@
+"""Unlock agent: keeps the vault unlocked in a background process, like ssh-agent.
+
+The agent runs the key derivation once and then answers requests over a
+Unix domain socket, so scripts pay a socket round trip instead of a KDF per
+call. By default the socket lives in a directory only the owner can enter;
+a directory given through SPM_AGENT_SOCK is left as it is, but refused if
+other users can replace files in it. The socket is itself mode 0600, and
+every connection must come from the agent's own uid (SO_PEERCRED on Linux,
+LOCAL_PEERCRED on macOS and FreeBSD); on platforms that cannot tell, the
+agent refuses to start. It forgets the key and exits after idle_timeout
+seconds without requests.
+
+Any process running as the same user can still use the agent, and 'attach'
+hands it the unwrapped vault data key so the GUI or CLI can open the vault
+without a KDF run. That key is never rotated (changing the master password
+only re-wraps it), so whoever obtained it can decrypt the vault file, and
+any later copy of it, for good.
+
+Each message is a 4-byte big-endian length followed by a UTF-8 JSON object.
+Requests look like {"op": "get", "name": "github"}; replies are
+{"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+
+Usage:
+    python agent.py start [--db PATH] [--user NAME] [--idle-timeout SECONDS] [--foreground]
+    python agent.py status
+    python agent.py stop
+"""
+import argparse
+import getpass
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+import threading
+import time
+from app_paths import AGENT_SOCKET_ENV as SOCKET_ENV, default_agent_socket_path as default_socket_path
+
+DEFAULT_IDLE_TIMEOUT = 900
+MAX_MESSAGE_BYTES = 1 << 20
+
+class AgentError(Exception):
+    """The agent is unreachable or refused a request"""
+
+def supported() -> bool:
+    # Windows builds of Python have no AF_UNIX
+    return hasattr(socket, 'AF_UNIX')
+
+def send_message(sock, message: dict):
+    payload = json.dumps(message, ensure_ascii=False).encode()
+    sock.sendall(struct.pack('>I', len(payload)) + payload)
+
+def recv_message(sock):
+    """Next message from sock, or None once the peer has closed the connection"""
+    header = _recv_exact(sock, 4)
+    if header is None:
+        return None
+    (length,) = struct.unpack('>I', header)
+    if length > MAX_MESSAGE_BYTES:
+        raise AgentError(f"Message of {length} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit")
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        raise AgentError("Connection closed in the middle of a message")
+    return json.loads(payload)
+
+def _recv_exact(sock, size: int):
+    """size bytes from sock, or None if the peer closed the connection before sending any"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            if data:
+                raise AgentError("Connection closed in the middle of a message")
+            return None
+        data += chunk
+    return bytes(data)
+
+# Platforms whose peer credentials _peer_uid can read
+PEER_CHECK_PLATFORMS = ('linux', 'darwin', 'freebsd', 'dragonfly')
+# getsockopt level and option for struct xucred on macOS and FreeBSD
+SOL_LOCAL = 0
+LOCAL_PEERCRED = getattr(socket, 'LOCAL_PEERCRED', 1)
+
+def peer_check_supported() -> bool:
+    return sys.platform.startswith(PEER_CHECK_PLATFORMS)
+
+def _peer_uid(conn) -> int:
+    """uid of the process on the other end of a Unix socket connection"""
+    if sys.platform.startswith('linux'):
+        # struct ucred {pid, uid, gid}
+        credentials = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', credentials)
+        return uid
+    if peer_check_supported():
+        # struct xucred {version, uid, ngroups, groups[16]}
+        credentials = conn.getsockopt(SOL_LOCAL, LOCAL_PEERCRED, struct.calcsize('2Ih16I'))
+        _, uid = struct.unpack_from('2I', credentials)
+        return uid
+    raise AgentError("The peer of a Unix socket cannot be checked on this platform")
+
+class AgentServer:
+    """Serves one unlocked vault on a Unix socket until stopped or idle for too long"""
+
+    def __init__(self, db_manager, encryption_manager, username: str, socket_path: str = None,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        if not supported():
+            raise AgentError("The unlock agent needs Unix domain sockets, which this platform lacks")
+        if not peer_check_supported():
+            # The socket's file mode alone would be all that guards the key
+            raise AgentError("The unlock agent cannot check who connects to it on this platform")
+        self.db_manager = db_manager
+        self.encryption_manager = encryption_manager
+        self.username = username
+        self.socket_path = os.path.abspath(socket_path or default_socket_path())
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+        self.stop_event = threading.Event()
+        self.listener = None
+        # Set once serve_forever() has closed the listener and removed the socket
+        self.closed = threading.Event()
+        self.serving_thread = None
+
+    def bind(self):
+        directory = os.path.dirname(self.socket_path)
+        try:
+            # Only a directory created here is the agent's own to lock down;
+            # an existing one (possibly shared, like /tmp) keeps its mode
+            os.makedirs(directory, mode=0o700)
+            os.chmod(directory, 0o700)
+        except FileExistsError:
+            pass
+        mode = os.stat(directory).st_mode
+        if mode & (stat.S_IWGRP | stat.S_IWOTH) and not mode & stat.S_ISVTX:
+            raise AgentError(f"{directory} is writable by other users; put the agent socket in a private directory")
+        if os.path.exists(self.socket_path):
+            if AgentClient(self.socket_path, timeout=1).available():
+                raise AgentError(f"An agent is already listening on {self.socket_path}")
+            os.remove(self.socket_path)  # left behind by an agent that died
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket file without group/other access from the start
+        umask = os.umask(0o177)
+        try:
+            self.listener.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        self.listener.listen(16)
+        # Wake up regularly to check the idle timeout
+        self.listener.settimeout(1.0)
+
+    def serve_forever(self):
+        if self.listener is None:
+            self.bind()
+        self.serving_thread = threading.current_thread()
+        try:
+            while not self.stop_event.is_set():
+                if time.monotonic() - self.last_used > self.idle_timeout:
+                    break
+                try:
+                    conn, _ = self.listener.accept()
+                except socket.timeout:
+                    continue
+                if self.stop_event.is_set():
+                    conn.close()  # Woken up by stop()
+                    break
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def stop(self):
+        """Stop serving; once this returns, the socket is gone and clients see no agent"""
+        self.stop_event.set()
+        serving_thread = self.serving_thread
+        if serving_thread is None or serving_thread is threading.current_thread():
+            return
+        # accept() only checks stop_event between connections, so connect once to wake it up
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.socket_path)
+        except OSError:
+            pass  # Already closed
+        self.closed.wait()
+
+    def close(self):
+        self.stop_event.set()
+        # Drop the key as soon as the agent stops serving
+        self.encryption_manager = None
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+        self.closed.set()
+
+    def _serve_connection(self, conn):
+        with conn:
+            try:
+                if _peer_uid(conn) != os.getuid():
+                    return
+            except (OSError, AgentError):
+                return
+            conn.settimeout(self.idle_timeout)
+            while not self.stop_event.is_set():
+                try:
+                    request = recv_message(conn)
+                except (OSError, ValueError, AgentError):
+                    return
+                if request is None:
+                    return
+                self.last_used = time.monotonic()
+                try:
+                    reply = {'ok': True, 'result': self._dispatch(request)}
+                except Exception as e:
+                    # A bad request must not take the agent down
+                    reply = {'ok': False, 'error': str(e) or type(e).__name__}
+                try:
+                    send_message(conn, reply)
+                except OSError:
+                    return
+                if request.get('op') == 'lock' and reply['ok']:
+                    # Only after the reply, as the agent process exits once stopped
+                    self.stop()
+                    return
+
+    def _dispatch(self, request: dict):
+        # Already loaded along with the vault; clients of the agent never need utils
+        from utils import entry_dict, lookup_entry
+        op = request.get('op')
+        encryption_manager = self.encryption_manager
+        if encryption_manager is None:
+            raise AgentError("The agent is locked")
+
+        if op == 'ping':
+            return {'username': self.username, 'db_path': os.path.abspath(self.db_manager.db_path),
+                    'idle_timeout': self.idle_timeout}
+        if op == 'get':
+            row = lookup_entry(self.db_manager, request.get('name'), request.get('id'), request.get('username'))
+            password = encryption_manager.decrypt(self.db_manager.get_encrypted_password(row[0]))
+            return dict(entry_dict(row), password=password)
+        if op == 'search':
+            rows = self.db_manager.search_passwords(request['term'])
+            return [entry_dict(row) for row in rows[:request.get('limit') or None]]
+        if op == 'list':
+            if request.get('limit'):
+                rows, _ = self.db_manager.get_passwords_page(limit=request['limit'])
+            else:
+                rows = self.db_manager.get_all_passwords()
+            return [entry_dict(row) for row in rows]
+        if op == 'generate':
+            import generator
+            return [generator.generate_password(request.get('length', 16), request.get('uppercase', True),
+                                                request.get('digits', True), request.get('symbols', True))
+                    for _ in range(request.get('count', 1))]
+        if op == 'attach':
+            # Lets the GUI or CLI of the same user open the vault without a KDF run
+            return {'data_key': encryption_manager.data_key.decode(), 'username': self.username}
+        if op == 'lock':
+            return None  # _serve_connection stops the agent after replying
+        raise AgentError(f"Unknown operation: {op!r}")
+
+class AgentClient:
+    """Talks to a running agent over one connection, opened on first use"""
+
+    def __init__(self, socket_path: str = None, timeout: float = 5.0):
+        self.socket_path = os.path.abspath(socket_path or default_socket_path())
+        self.timeout = timeout
+        self.sock = None
+
+    def available(self) -> bool:
+        """True if an agent answers on the socket"""
+        try:
+            self.ping()
+        except (AgentError, OSError, ValueError):
+            self.close()
+            return False
+        return True
+
+    def serves(self, db_path: str, username: str) -> bool:
+        """True if an agent is running for this database and user"""
+        try:
+            info = self.ping()
+        except (AgentError, OSError, ValueError):
+            self.close()
+            return False
+        return info['db_path'] == os.path.abspath(db_path) and info['username'] == username
+
+    def request(self, op: str, **params):
+        if not supported():
+            raise AgentError("The unlock agent needs Unix domain sockets, which this platform lacks")
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise AgentError(f"No agent is running ({e.strerror or e})") from None
+            self.sock = sock
+        try:
+            send_message(self.sock, dict(params, op=op))
+            reply = recv_message(self.sock)
+        except OSError as e:
+            self.close()
+            raise AgentError(f"Lost the connection to the agent ({e.strerror or e})") from None
+        if reply is None:
+            self.close()
+            raise AgentError("The agent closed the connection")
+        if not reply.get('ok'):
+            raise AgentError(reply.get('error') or "The agent refused the request")
+        return reply.get('result')
+
+    def ping(self) -> dict:
+        return self.request('ping')
+
+    def get(self, name: str = None, password_id: int = None, username: str = None) -> dict:
+        return self.request('get', name=name, id=password_id, username=username)
+
+    def search(self, term: str, limit: int = None) -> list:
+        return self.request('search', term=term, limit=limit)
+
+    def list(self, limit: int = None) -> list:
+        return self.request('list', limit=limit)
+
+    def generate(self, length: int = 16, uppercase: bool = True, digits: bool = True,
+                 symbols: bool = True, count: int = 1) -> list:
+        return self.request('generate', length=length, uppercase=uppercase, digits=digits,
+                            symbols=symbols, count=count)
+
+    def attach(self) -> bytes:
+        """The unwrapped vault data key, for EncryptionManager.from_data_key"""
+        return self.request('attach')['data_key'].encode()
+
+    def lock(self):
+        self.request('lock')
+        self.close()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+def _start(args) -> int:
+    if not supported():
+        print("error: the unlock agent needs Unix domain sockets, which this platform lacks", file=sys.stderr)
+        return 1
+    socket_path = default_socket_path()
+    if AgentClient(socket_path, timeout=1).available():
+        print(f"error: an agent is already running on {socket_path}", file=sys.stderr)
+        return 1
+    password = os.environ.get("SPM_MASTER_PASSWORD")
+    if password is None:
+        password = getpass.getpass(f"Master password for {args.user}: ")
+
+    if args.foreground or not hasattr(os, 'fork'):
+        return _run_agent(args, password, socket_path, None)
+
+    # Unlock in the child so no database connection crosses the fork;
+    # the child reports success or failure through a pipe before serving
+    read_end, write_end = os.pipe()
+    if os.fork():
+        os.close(write_end)
+        with os.fdopen(read_end) as status:
+            message = status.read()
+        if message != "ok":
+            print(f"error: {message or 'the agent exited unexpectedly'}", file=sys.stderr)
+            return 1
+        print(f"{SOCKET_ENV}={socket_path}")
+        return 0
+
+    os.close(read_end)
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os._exit(_run_agent(args, password, socket_path, write_end))
+
+def _run_agent(args, password: str, socket_path: str, status_fd) -> int:
+    def report(message: str):
+        if status_fd is not None:
+            os.write(status_fd, message.encode())
+            os.close(status_fd)
+        elif message != "ok":
+            print(f"error: {message}", file=sys.stderr)
+
+    try:
+        from utils import DatabaseManager
+        db_manager = DatabaseManager(args.db)
+        encryption_manager = db_manager.unlock(args.user, password)
+        if encryption_manager is None:
+            report("Wrong username or master password")
+            return 1
+        server = AgentServer(db_manager, encryption_manager, args.user, socket_path, args.idle_timeout)
+        server.bind()
+    except Exception as e:
+        report(str(e))
+        return 1
+    report("ok")
+    if status_fd is None:
+        print(f"Agent listening on {socket_path}; stops after {args.idle_timeout:g}s idle")
+    server.serve_forever()
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    start = commands.add_parser("start", help="unlock the vault and serve it in the background")
+    start.add_argument("--db", help="vault database (default: the app's own)")
+    start.add_argument("--user", default="admin")
+    start.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT)
+    start.add_argument("--foreground", action="store_true")
+    commands.add_parser("status", help="show whether an agent is running")
+    commands.add_parser("stop", help="make the agent forget the key and exit")
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        return _start(args)
+    client = AgentClient()
+    try:
+        if args.command == "status":
+            info = client.ping()
+            print(f"Agent running for {info['username']} on {info['db_path']}")
+        else:
+            client.lock()
+            print("Agent stopped")
+    except AgentError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import os
+
+def get_app_data_path():
+    """Get the appropriate AppData path for storing the database"""
+    app_name = "SecurePasswordManager"
+    if os.name == 'nt':  # Windows
+        app_data = os.getenv('APPDATA')
+        if not app_data:
+            app_data = os.path.expanduser('~\\AppData\\Roaming')
+        base_path = os.path.join(app_data, app_name)
+    else:  # Linux/Mac
+        base_path = os.path.expanduser(f'~/.{app_name.lower()}')
+    
+    # Create directory if it doesn't exist
+    if not os.path.exists(base_path):
+        os.makedirs(base_path)
+    
+    return base_path
+
+def default_database_path():
+    return os.path.join(get_app_data_path(), "passwords.db")
+
+# Overrides where the unlock agent (agent.py) listens
+AGENT_SOCKET_ENV = "SPM_AGENT_SOCK"
+
+def default_agent_socket_path():
+    path = os.environ.get(AGENT_SOCKET_ENV)
+    # Relative to the working directory at startup, so clients elsewhere find the same socket
+    return os.path.abspath(path) if path else os.path.join(get_app_data_path(), "agent", "agent.sock")
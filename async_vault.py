@@ -0,0 +1,212 @@
+import asyncio
+import functools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from search import CANCEL_CHECK_STEPS
+from utils import DatabaseManager
+
+class SearchSuperseded(Exception):
+    """Raised by AsyncVault.search when a newer search replaced this one"""
+
+class AsyncVault:
+    """asyncio facade over DatabaseManager and EncryptionManager.
+
+    SQLite and crypto work run on two bounded thread pools so the event loop
+    never blocks. A new search cancels the one still in flight, interrupting
+    its query, and bulk jobs are throttled to max_pending operations at a time.
+    """
+
+    def __init__(self, db_manager: DatabaseManager = None, db_workers: int = None,
+                 crypto_workers: int = 2, max_pending: int = 64):
+        self.db_manager = db_manager or DatabaseManager()
+        # One thread per pooled reader plus one for the writer
+        self.db_executor = ThreadPoolExecutor(db_workers or DatabaseManager.MAX_READERS + 1,
+                                              thread_name_prefix="vault-db")
+        self.crypto_executor = ThreadPoolExecutor(crypto_workers, thread_name_prefix="vault-crypto")
+        self.max_pending = max_pending
+        self.encryption_manager = None
+        self.username = None
+        self._search_task = None
+        # Set to interrupt the SQLite query of the search in flight
+        self._search_cancelled = threading.Event()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db_executor.shutdown(wait=False, cancel_futures=True)
+        self.crypto_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, executor, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    def _require_unlocked(self):
+        if self.encryption_manager is None:
+            raise PermissionError("The vault is locked; call unlock() first")
+        return self.encryption_manager
+
+    async def unlock(self, username: str, password: str) -> bool:
+        encryption_manager = await self._run(self.crypto_executor, self.db_manager.unlock, username, password)
+        if encryption_manager is None:
+            return False
+        self.encryption_manager = encryption_manager
+        self.username = username
+        return True
+
+    async def rekey(self, new_password: str):
+        """Change the master password; only the vault key is re-wrapped"""
+        encryption_manager = self._require_unlocked()
+        self.encryption_manager = await self._run(
+            self.crypto_executor, self.db_manager.change_password, self.username, new_password, encryption_manager)
+
+    async def add(self, name: str, title: str, username: str, password: str, description: str = ""):
+        encryption_manager = self._require_unlocked()
+        encrypted_password = await self._run(self.crypto_executor, encryption_manager.encrypt, password)
+        await self._run(self.db_executor, self.db_manager.add_password,
+                        name, title, username, encrypted_password, description)
+
+    async def update(self, password_id: int, name: str, title: str, username: str,
+                     password: str, description: str = ""):
+        encryption_manager = self._require_unlocked()
+        encrypted_password = await self._run(self.crypto_executor, encryption_manager.encrypt, password)
+        await self._run(self.db_executor, self.db_manager.update_password,
+                        password_id, name, title, username, encrypted_password, description)
+
+    async def delete(self, password_id: int):
+        self._require_unlocked()
+        await self._run(self.db_executor, self.db_manager.delete_password, password_id)
+
+    async def get_password(self, password_id: int):
+        """Decrypt a single entry; returns None if it does not exist"""
+        encryption_manager = self._require_unlocked()
+        encrypted_password = await self._run(self.db_executor, self.db_manager.get_encrypted_password, password_id)
+        if encrypted_password is None:
+            return None
+        return await self._run(self.crypto_executor, encryption_manager.decrypt, encrypted_password)
+
+    async def get_page(self, search_term: str = "", limit: int = 50, after=None):
+        """Return (rows, next_token); see DatabaseManager.get_passwords_page"""
+        self._require_unlocked()
+        return await self._run(self.db_executor, self.db_manager.get_passwords_page,
+                               search_term, limit=limit, after=after)
+
+    async def search(self, search_term: str):
+        """Ranked search. Starting another search cancels this one with SearchSuperseded."""
+        self._require_unlocked()
+        previous = self._search_task
+        if previous is not None and not previous.done():
+            previous.cancel()
+        self._search_cancelled.set()
+
+        cancelled = self._search_cancelled = threading.Event()
+        task = asyncio.ensure_future(self._run(self.db_executor, self._search, search_term, cancelled))
+        self._search_task = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Cancelling the task does not stop the executor thread; this does
+            cancelled.set()
+            if self._search_task is not task:
+                raise SearchSuperseded(search_term) from None
+            raise
+
+    def _search(self, search_term: str, cancelled: threading.Event):
+        # The nested checkout inside search_passwords reuses this connection
+        with self.db_manager.pool.reader() as conn:
+            conn.set_progress_handler(lambda: 1 if cancelled.is_set() else 0, CANCEL_CHECK_STEPS)
+            try:
+                return self.db_manager.search_passwords(search_term)
+            except sqlite3.OperationalError as e:
+                if cancelled.is_set() and 'interrupted' in str(e):
+                    raise SearchSuperseded(search_term) from None
+                raise
+            finally:
+                conn.set_progress_handler(None, 0)
+
+    async def add_many(self, entries) -> int:
+        """Add (name, title, username, password, description) entries from an iterable
+        or async iterable in one transaction.
+
+        Entries are encrypted max_pending at a time and each batch is written as
+        soon as it is ready, so only about three batches are ever held in memory.
+        The write transaction stays open until the source is exhausted: other
+        writes wait for it, and nothing is stored if the source or a write fails.
+        """
+        encryption_manager = self._require_unlocked()
+        # One encrypted batch may wait while the writer stores the previous one
+        batches = asyncio.Queue(maxsize=1)
+        loop = asyncio.get_running_loop()
+        writer = asyncio.ensure_future(self._run(
+            self.db_executor, self._write_batches,
+            lambda: asyncio.run_coroutine_threadsafe(batches.get(), loop).result()))
+
+        async def send(rows):
+            # Backpressure: the source is only read as fast as batches are written
+            put = asyncio.ensure_future(batches.put(rows))
+            await asyncio.wait((put, writer), return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+                writer.result()  # The write failed; raise its error
+
+        async def encrypt_batch(batch):
+            encrypted = await self._run(self.crypto_executor, lambda: list(encryption_manager.encrypt_many(
+                (entry[3] for entry in batch), workers=1)))
+            rows = []
+            for (name, title, username, _, *description), (_, encrypted_password, error) in zip(batch, encrypted):
+                if error is not None:
+                    raise error
+                rows.append((name, title, username, encrypted_password, description[0] if description else ""))
+            await send(rows)
+
+        try:
+            batch = []
+            async for entry in _aiter(entries):
+                batch.append(entry)
+                if len(batch) >= self.max_pending:
+                    await encrypt_batch(batch)
+                    batch = []
+            if batch:
+                await encrypt_batch(batch)
+            await send(None)
+            return await writer
+        except BaseException:
+            if not writer.done():
+                # Roll the transaction back; a batch still queued is dropped
+                while not batches.empty():
+                    batches.get_nowait()
+                batches.put_nowait(_ROLLBACK)
+                await asyncio.wait((writer,))
+                if not writer.cancelled():
+                    writer.exception()  # Expected _RolledBack; retrieved so it is not logged
+            raise
+
+    def _write_batches(self, next_batch) -> int:
+        """Insert batches from next_batch() in one transaction until it returns None"""
+        count = 0
+        with self.db_manager.pool.writer():
+            while True:
+                rows = next_batch()
+                if rows is None:
+                    return count
+                if rows is _ROLLBACK:
+                    raise _RolledBack()
+                # Nested in this transaction; its change notices follow the commit
+                count += self.db_manager.add_many(rows)
+
+_ROLLBACK = object()
+
+class _RolledBack(Exception):
+    """Ends an add_many transaction whose source or encryption failed"""
+
+async def _aiter(entries):
+    if hasattr(entries, '__aiter__'):
+        async for entry in entries:
+            yield entry
+    else:
+        for entry in entries:
+            yield entry
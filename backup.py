@@ -0,0 +1,164 @@
+import datetime
+import hashlib
+import os
+import pathlib
+import sqlite3
+import threading
+
+class BackupManager:
+    """Online snapshots of the vault database with rotation.
+
+    Snapshots are taken with the SQLite backup API from a dedicated read-only
+    connection, a few pages per step, inside one read transaction that pins
+    a single WAL snapshot: the writer is never blocked, and commits made
+    during the copy neither restart it nor end up in it. Each snapshot
+    gets a .sha256 file next to it and only the newest `generations` are
+    kept. PRAGMA data_version on the dedicated connection changes only when
+    another connection commits, which lets unchanged vaults skip the backup.
+    """
+    PREFIX = "passwords-"
+
+    def __init__(self, db_manager, directory: str = None, generations: int = 7, pages: int = 256):
+        self.db_manager = db_manager
+        self.directory = directory or os.path.join(os.path.dirname(os.path.abspath(db_manager.db_path)), "backups")
+        self.generations = generations
+        self.pages = pages
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_data_version = None
+        self.last_error = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        uri = pathlib.Path(os.path.abspath(db_manager.db_path)).as_uri() + '?mode=ro'
+        self.source = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def _data_version(self) -> int:
+        return self.source.execute("PRAGMA data_version").fetchone()[0]
+
+    def snapshots(self):
+        """Snapshot paths, newest first"""
+        names = sorted((name for name in os.listdir(self.directory)
+                        if name.startswith(self.PREFIX) and name.endswith(".db")), reverse=True)
+        return [os.path.join(self.directory, name) for name in names]
+
+    def snapshot(self, force: bool = False, progress=None):
+        """Copy the database into a new snapshot; returns its path, or None if nothing changed.
+
+        progress(remaining, total) is called after every step of the copy.
+        """
+        with self.lock:
+            data_version = self._data_version()
+            if not force and data_version == self.last_data_version:
+                return None
+
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            path = os.path.join(self.directory, f"{self.PREFIX}{stamp}.db")
+            temp_path = f"{path}.tmp"
+            target = sqlite3.connect(temp_path)
+            try:
+                # Pin one WAL snapshot for the whole copy. Without it every commit
+                # made meanwhile restarts the backup, which may then never finish.
+                self.source.execute("BEGIN")
+                self.source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                self.source.backup(target, pages=self.pages,
+                                   progress=(lambda status, remaining, total: progress(remaining, total))
+                                   if progress else None)
+                # A snapshot is a single self-contained file
+                target.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                self.source.rollback()
+                target.close()
+            checksum = _sha256(temp_path)
+
+            previous = self.snapshots()
+            if not force and previous and _read_checksum(previous[0]) == checksum:
+                # First check in this process, but identical to the newest snapshot
+                os.remove(temp_path)
+                self.last_data_version = data_version
+                return None
+
+            os.replace(temp_path, path)
+            with open(f"{path}.sha256", "w") as fp:
+                fp.write(f"{checksum}  {os.path.basename(path)}\n")
+            self.last_data_version = data_version
+            self._rotate()
+            return path
+
+    def _rotate(self):
+        for path in self.snapshots()[self.generations:]:
+            for stale in (path, f"{path}.sha256"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+
+    def verify(self, path: str) -> bool:
+        """True if the snapshot matches its checksum file"""
+        expected = _read_checksum(path)
+        return expected is not None and _sha256(path) == expected
+
+    def restore(self, path: str, progress=None):
+        """Replace the live database with a snapshot, verified first.
+
+        The copy runs through the writer connection, so other connections
+        see the restored data on their next read. Anyone holding an unlocked
+        EncryptionManager must unlock again, since the snapshot may use a
+        different master password.
+        """
+        if not self.verify(path):
+            raise ValueError(f"Snapshot {os.path.basename(path)} is missing or fails its checksum")
+        uri = pathlib.Path(os.path.abspath(path)).as_uri() + '?mode=ro'
+        snapshot = sqlite3.connect(uri, uri=True)
+        try:
+            with self.db_manager.pool.writer() as conn:
+                # Larger steps than snapshot(): nothing else may write meanwhile anyway
+                snapshot.backup(conn, pages=self.pages * 16,
+                                progress=(lambda status, remaining, total: progress(remaining, total))
+                                if progress else None)
+        finally:
+            snapshot.close()
+        self.last_data_version = None
+
+    def start(self, interval: float = 900):
+        """Take a snapshot now and then every interval seconds on a background thread"""
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+
+        def run():
+            while True:
+                try:
+                    self.snapshot()
+                    self.last_error = None
+                except Exception as e:
+                    # Keep the schedule going; the next run may succeed
+                    self.last_error = e
+                if self.stop_event.wait(interval):
+                    return
+
+        self.thread = threading.Thread(target=run, name="vault-backup", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def close(self):
+        self.stop()
+        self.source.close()
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_checksum(path: str):
+    try:
+        with open(f"{path}.sha256") as fp:
+            return fp.read().split()[0]
+    except (OSError, IndexError):
+        return None
@@ -0,0 +1,55 @@
+"""Compare one-at-a-time decryption against EncryptionManager.decrypt_many.
+
+Process workers only pay off on a multi-core machine; on a single core the
+sequential path (--workers 1) should match the serial loop.
+
+Usage: python benchmarks/bench_batch_crypto.py [--entries 100000] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import EncryptionManager
+
+
+def timed(label, entries, func):
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f}s  {entries / elapsed:10,.0f} entries/s")
+    assert count == entries
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    encryption_manager = EncryptionManager("benchmark")
+    plaintexts = [f"synthetic-password-{i:06d}" for i in range(args.entries)]
+    tokens = [token for _, token, _ in encryption_manager.encrypt_many(plaintexts, workers=1)]
+    print(f"{args.entries:,} synthetic entries, {args.workers} workers\n")
+
+    baseline = timed("serial decrypt()", args.entries,
+                     lambda: sum(1 for token in tokens if encryption_manager.decrypt(token)))
+    sequential = timed("decrypt_many (sequential)", args.entries,
+                       lambda: sum(1 for _, _, error in encryption_manager.decrypt_many(
+                           tokens, workers=1) if error is None))
+    threads = timed("decrypt_many (threads)", args.entries,
+                    lambda: sum(1 for _, _, error in encryption_manager.decrypt_many(
+                        tokens, workers=args.workers) if error is None))
+    processes = timed("decrypt_many (processes)", args.entries,
+                      lambda: sum(1 for _, _, error in encryption_manager.decrypt_many(
+                          tokens, workers=args.workers, processes=True) if error is None))
+
+    print(f"\nspeedup: sequential {baseline / sequential:.2f}x, threads {baseline / threads:.2f}x,"
+          f" processes {baseline / processes:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Time exporting, verifying and re-importing a vault in the encrypted export format.
+
+Usage: python benchmarks/bench_export.py [--entries 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import fresh_database, synthetic_rows
+
+from kdf import calibrate
+from utils import EncryptionManager
+from vault_export import export_vault, import_export, verify_export
+
+
+def timed(label, entries, path, func):
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    megabytes = os.path.getsize(path) / 1e6
+    print(f"{label:<8} {elapsed:8.2f}s  {entries / elapsed:10,.0f} entries/s  {megabytes / elapsed:7.1f} MB/s")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+
+    encryption_manager = EncryptionManager("benchmark")
+    db_manager = fresh_database()
+    rows = list(synthetic_rows(args.entries))
+    secrets = encryption_manager.encrypt_many(f"synthetic-password-{i:06d}" for i in range(args.entries))
+    db_manager.add_many((name, title, username, secret, description)
+                        for (name, title, username, _, description), (_, secret, _) in zip(rows, secrets))
+    calibrate()  # keep the one-off KDF calibration out of the timings
+
+    path = os.path.join(tempfile.mkdtemp(prefix="spm-bench-"), "vault.spmx")
+    exported = timed("export", args.entries, path,
+                     lambda: export_vault(db_manager, encryption_manager, path, "passphrase"))
+    print(f"{exported:,} entries, {os.path.getsize(path) / 1e6:.1f} MB on disk (KDF time included below)")
+    timed("verify", args.entries, path, lambda: verify_export(path, "passphrase"))
+    target = fresh_database()
+    timed("import", args.entries, path,
+          lambda: import_export(target, encryption_manager, path, "passphrase"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time quick open lookups and usage counter flushes (frecency.py).
+
+Records a burst of copies and reveals spread over a few hundred entries, then
+types prefixes of entry names into frecency.QuickOpenIndex and reports the
+lookup latency, plus how long the batched flush of the recorded uses takes
+compared with writing every use in its own transaction.
+
+Usage: python benchmarks/bench_frecency.py [--sizes 10000 100000] [--uses 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from common import fresh_database, populate
+
+import frecency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--uses", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'build s':>8} {'median us':>10} {'p95 us':>8} {'max us':>8}"
+          f" {'flush ms':>9} {'unbatched ms':>13}")
+    for size in args.sizes:
+        db_manager = fresh_database()
+        populate(db_manager, size)
+        usage_log = frecency.UsageLog(db_manager, flush_interval=3600)
+        index = frecency.QuickOpenIndex(db_manager, usage_log)
+        start = time.perf_counter()
+        index.build()
+        build_seconds = time.perf_counter() - start
+
+        rng = random.Random(42)
+        favourites = rng.sample(range(1, size + 1), 300)
+        for _ in range(args.uses):
+            usage_log.record(rng.choice(favourites), rng.choice([frecency.COPY, frecency.REVEAL]))
+        index.lookup("")  # Apply the recorded uses before timing
+
+        names = [row[1] for row in db_manager.get_password_entries(rng.sample(range(1, size + 1), 200))]
+        timings = []
+        for name in names:
+            for end in range(1, len(name) + 1):
+                start = time.perf_counter()
+                index.lookup(name[:end])
+                timings.append((time.perf_counter() - start) * 1e6)
+
+        start = time.perf_counter()
+        usage_log.flush()
+        flush_ms = (time.perf_counter() - start) * 1000
+        # The same uses, one transaction each
+        start = time.perf_counter()
+        for _ in range(args.uses):
+            db_manager.record_usage([(rng.choice(favourites), 1, 0, int(time.time()))])
+        unbatched_ms = (time.perf_counter() - start) * 1000
+
+        timings.sort()
+        print(f"{size:>8,} {build_seconds:>8.2f} {statistics.median(timings):>10.1f}"
+              f" {timings[int(len(timings) * 0.95)]:>8.1f} {timings[-1]:>8.1f}"
+              f" {flush_ms:>9.1f} {unbatched_ms:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
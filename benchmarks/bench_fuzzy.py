@@ -0,0 +1,67 @@
+"""Measure the typo-tolerant trigram index in search.py.
+
+Reports build time, the memory the index holds, query latency for misspelled
+terms and recall: how often an entry with a distinctive name (planted among
+the synthetic rows, whose made-up words are too alike to tell apart) is in
+the top 10 when that name is typed with two adjacent letters swapped.
+
+Usage: python benchmarks/bench_fuzzy.py [--sizes 10000 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+import tracemalloc
+
+from common import SERVICES, fresh_database, populate
+
+import search
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'build s':>8} {'index MB':>9} {'median ms':>10} {'p95 ms':>8} {'recall@10':>10}")
+    for size in args.sizes:
+        db_manager = fresh_database()
+        populate(db_manager, size)
+        rng = random.Random(42)
+        planted = {f"{rng.choice(SERVICES)} {''.join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 10)))}"
+                   for _ in range(args.queries)}
+        db_manager.add_many((name, "", "", os.urandom(100), "") for name in planted)
+        index = search.TrigramIndex(db_manager)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index.build()
+        build_seconds = time.perf_counter() - start
+        index_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        rows = [row for name in planted for row in db_manager.find_passwords_by_name(name)]
+        timings, found = [], 0
+        for password_id, name, *_ in rows:
+            service, word = name.split()
+            term = f"{service} {misspell(word, rng)}"
+            start = time.perf_counter()
+            results = index.search(term, limit=10)
+            timings.append((time.perf_counter() - start) * 1000)
+            found += any(row[0] == password_id for row in results)
+
+        timings.sort()
+        print(f"{size:>8,} {build_seconds:>8.2f} {index_bytes / 1e6:>9.1f} {statistics.median(timings):>10.2f}"
+              f" {timings[int(len(timings) * 0.95)]:>8.2f} {found / len(rows):>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Time the streaming importers on large synthetic exports and report peak memory.
+
+Usage: python benchmarks/bench_import.py [--entries 100000] [--formats bitwarden keepass csv] [--memory]
+
+--memory traces Python allocations to report the peak, which slows the import down.
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from xml.sax.saxutils import escape
+
+from common import fresh_database, synthetic_rows
+
+from importers import import_file
+from utils import EncryptionManager
+
+
+def entries(count: int):
+    for i, (name, title, username, _, description) in enumerate(synthetic_rows(count)):
+        yield name, title, username, f"synthetic-password-{i:06d}", description
+
+
+def write_bitwarden(path: str, count: int):
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write('{"encrypted": false, "folders": [], "items": [')
+        for i, (name, _, username, password, notes) in enumerate(entries(count)):
+            item = {"id": str(i), "type": 1, "name": name, "notes": notes,
+                    "login": {"username": username, "password": password,
+                              "uris": [{"uri": f"https://{name.split()[0]}.example.com"}]}}
+            fp.write(("," if i else "") + json.dumps(item))
+        fp.write("]}")
+
+
+def write_keepass(path: str, count: int):
+    def string(key, value):
+        return f"<String><Key>{key}</Key><Value>{escape(value)}</Value></String>"
+
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write("<?xml version=\"1.0\" encoding=\"utf-8\"?><KeePassFile><Meta/><Root><Group><Name>Vault</Name>")
+        for name, title, username, password, notes in entries(count):
+            fp.write(f"<Entry>{string('Title', name)}{string('UserName', username)}"
+                     f"{string('Password', password)}{string('Notes', notes)}"
+                     f"<History><Entry>{string('Title', name)}{string('Password', 'old')}</Entry></History></Entry>")
+        fp.write("</Group></Root></KeePassFile>")
+
+
+def write_csv(path: str, count: int):
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["name", "url", "username", "password", "note"])
+        for name, _, username, password, notes in entries(count):
+            writer.writerow([name, f"https://{name.split()[0]}.example.com", username, password, notes])
+
+
+WRITERS = {"bitwarden": (".json", write_bitwarden), "keepass": (".xml", write_keepass), "csv": (".csv", write_csv)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--formats", nargs="+", choices=list(WRITERS), default=list(WRITERS))
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="spm-bench-")
+    encryption_manager = EncryptionManager("benchmark")
+    print(f"{'format':<10} {'file MB':>8} {'seconds':>8} {'entries/s':>10} {'peak MB':>8} {'imported':>9} {'dupes':>7}")
+    for file_format in args.formats:
+        extension, write = WRITERS[file_format]
+        path = os.path.join(directory, f"export{extension}")
+        write(path, args.entries)
+
+        db_manager = fresh_database()
+        if args.memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = import_file(db_manager, encryption_manager, path, file_format)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if args.memory else float("nan")
+        tracemalloc.stop()
+
+        print(f"{file_format:<10} {os.path.getsize(path) / 1e6:>8.1f} {elapsed:>8.2f} "
+              f"{args.entries / elapsed:>10,.0f} {peak / 1e6:>8.1f} {result.imported:>9,} {result.duplicates:>7,}")
+
+
+if __name__ == "__main__":
+    main()
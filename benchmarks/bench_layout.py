@@ -0,0 +1,109 @@
+"""Compare list and search latency before and after moving secrets out of the passwords table.
+
+Builds a vault in the version 3 layout (encrypted_password stored inline),
+times listing and searching, migrates it to the current layout and times the
+same DatabaseManager calls again.
+
+Usage: python benchmarks/bench_layout.py [--rows 100000] [--cold]
+
+--cold drops the OS page cache before every call (Linux, as root), which
+shows the difference in disk reads rather than in CPU time.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from common import synthetic_rows
+import migrations
+from utils import DatabaseManager
+
+SPLIT_VERSION = 4
+TERMS = ["kalomi", "vize", "ruto sabo", "github nequ", "fidape", "gitl"]
+
+CALLS = {
+    "first page": lambda db, term: db.get_passwords_page(limit=50),
+    "search page": lambda db, term: db.get_passwords_page(term, limit=50),
+    "fts search": lambda db, term: db.search_passwords(term),
+    "like search": lambda db, term: db.search_passwords(term, use_fts=False),
+    "list all": lambda db, term: db.get_all_passwords(),
+    "scan all": lambda db, term: sum(1 for _ in db.iter_passwords(include_secrets=False)),
+}
+
+
+def drop_caches():
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as fp:
+        fp.write("3\n")
+
+
+def median_ms(db_manager, call, repeat: int, cold: bool = False) -> float:
+    timings = []
+    for term in TERMS:
+        for _ in range(repeat):
+            if cold:
+                drop_caches()
+            start = time.perf_counter()
+            call(db_manager, term)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def inline_vault(rows: int) -> DatabaseManager:
+    """A new database stopped at the last schema version before the split"""
+    DatabaseManager._instance = None
+    DatabaseManager.SCHEMA_VERSION = SPLIT_VERSION - 1
+    try:
+        db_manager = DatabaseManager(os.path.join(tempfile.mkdtemp(prefix="spm-bench-"), "passwords.db"))
+    finally:
+        DatabaseManager.SCHEMA_VERSION = migrations.latest_version()
+    with db_manager.pool.writer() as conn:
+        conn.executemany('''
+            INSERT INTO passwords (name, title, username, encrypted_password, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', synthetic_rows(rows))
+    return db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+    if args.cold:
+        try:
+            drop_caches()
+        except OSError as e:
+            raise SystemExit(f"--cold needs root on Linux: {e}")
+
+    db_manager = inline_vault(args.rows)
+    before = {label: median_ms(db_manager, call, args.repeat, args.cold) for label, call in CALLS.items()}
+    pages_before = table_pages(db_manager)
+
+    start = time.perf_counter()
+    migrations.migrate(db_manager)
+    print(f"{args.rows:,} rows, migrated in {time.perf_counter() - start:.2f}s")
+    after = {label: median_ms(db_manager, call, args.repeat, args.cold) for label, call in CALLS.items()}
+    pages_after = table_pages(db_manager)
+
+    if pages_before is not None:
+        print(f"passwords table: {pages_before:,} pages before, {pages_after:,} after")
+    print(f"{'query':<12} {'before ms':>10} {'after ms':>10} {'speedup':>9}")
+    for label in CALLS:
+        print(f"{label:<12} {before[label]:>10.2f} {after[label]:>10.2f} {before[label] / after[label]:>8.1f}x")
+
+
+def table_pages(db_manager):
+    """Pages a full scan of the passwords table reads, or None without the dbstat table"""
+    with db_manager.pool.reader() as conn:
+        try:
+            return conn.execute("SELECT COUNT(*) FROM dbstat WHERE name = 'passwords'").fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+
+
+if __name__ == "__main__":
+    main()
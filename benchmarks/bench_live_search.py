@@ -0,0 +1,54 @@
+"""Time search-as-you-type: database queries versus in-memory refinement.
+
+Types each query one character at a time through search.IncrementalSearch, the
+way the GUI's live search does, and reports how long each keystroke's search
+takes, split by whether it queried SQLite or refined the previous results.
+
+Usage: python benchmarks/bench_live_search.py [--sizes 10000 50000] [--like]
+"""
+import argparse
+import statistics
+import time
+
+from common import fresh_database, populate
+
+import search
+
+# Typed one character at a time, e.g. "g", "gi", "git", ...
+QUERIES = ["github nequ", "kalomi", "vize ruto", "staging sabo"]
+
+
+def type_queries(db_manager):
+    searcher = search.IncrementalSearch(db_manager)
+    timings = {True: [], False: []}
+    for query in QUERIES:
+        searcher.reset()
+        for end in range(1, len(query) + 1):
+            term = query[:end]
+            refined = searcher.can_refine(term)
+            start = time.perf_counter()
+            searcher.search(term)
+            timings[refined].append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--like", action="store_true", help="use the LIKE fallback instead of FTS5")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'queries':>8} {'median ms':>10} {'max ms':>8} {'refines':>8} {'median ms':>10} {'max ms':>8}")
+    for size in args.sizes:
+        db_manager = fresh_database()
+        populate(db_manager, size)
+        if args.like:
+            db_manager.fts_enabled = False
+        timings = type_queries(db_manager)
+        queried, refined = timings[False], timings[True]
+        print(f"{size:>8,} {len(queried):>8} {statistics.median(queried):>10.2f} {max(queried):>8.2f}"
+              f" {len(refined):>8} {statistics.median(refined):>10.2f} {max(refined):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compare FTS5 and LIKE search latency in DatabaseManager.search_passwords.
+
+Usage: python benchmarks/bench_search.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import statistics
+import time
+
+from common import fresh_database, populate
+
+# Mostly selective terms (one made-up word or a word pair), plus a common service prefix
+QUERIES = ["kalomi", "vize", "ruto sabo", "github nequ", "fidape", "gitl"]
+
+
+def measure(db_manager, use_fts: bool, repeat: int):
+    timings = []
+    for query in QUERIES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db_manager.search_passwords(query, use_fts=use_fts)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'LIKE ms':>10} {'FTS5 ms':>10} {'speedup':>9}")
+    for size in args.sizes:
+        db_manager = fresh_database()
+        if not db_manager.fts_enabled:
+            raise SystemExit("This SQLite build has no FTS5 support")
+        populate(db_manager, size)
+        like_ms = measure(db_manager, use_fts=False, repeat=args.repeat)
+        fts_ms = measure(db_manager, use_fts=True, repeat=args.repeat)
+        print(f"{size:>10,} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare per-row commits with add_many/update_many/delete_many and the WriteQueue.
+
+Usage: python benchmarks/bench_writes.py [--rows 10000] [--threads 8] [--synchronous FULL]
+
+Commit cost depends on the disk: with the default synchronous=NORMAL a WAL
+commit does not fsync, so group commit matters most with synchronous=FULL
+on slow storage.
+"""
+import argparse
+import threading
+import time
+
+from common import fresh_database, synthetic_rows
+
+
+SYNCHRONOUS = "NORMAL"
+
+
+def timed(label, rows, func):
+    db_manager = fresh_database()
+    db_manager.pool.writer_connection.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    start = time.perf_counter()
+    func(db_manager)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed:8.2f}s  {rows / elapsed:10,.0f} rows/s")
+    db_manager.write_queue.close()
+    return elapsed
+
+
+def per_row(rows):
+    def run(db_manager):
+        for row in rows:
+            db_manager.add_password(*row)
+    return run
+
+
+def batched(rows):
+    def run(db_manager):
+        db_manager.add_many(rows)
+    return run
+
+
+def threaded(rows, threads: int, write):
+    """Several threads each waiting for their own write, like GUI callers"""
+    def run(db_manager):
+        def worker(part):
+            for row in part:
+                write(db_manager, row)
+        workers = [threading.Thread(target=worker, args=(rows[i::threads],)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    return run
+
+
+def queued_async(rows):
+    """Fire-and-forget submits followed by one flush"""
+    def run(db_manager):
+        for row in rows:
+            db_manager.write_queue.add(*row)
+        db_manager.write_queue.flush()
+    return run
+
+
+def update_and_delete(rows):
+    def run(db_manager):
+        db_manager.add_many(rows)
+        ids = range(1, len(rows) + 1)
+        db_manager.update_many((i, *row) for i, row in zip(ids, rows))
+        db_manager.delete_many(ids)
+    return run
+
+
+def main():
+    global SYNCHRONOUS
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--synchronous", choices=["NORMAL", "FULL"], default=SYNCHRONOUS)
+    args = parser.parse_args()
+    SYNCHRONOUS = args.synchronous
+
+    rows = list(synthetic_rows(args.rows))
+    print(f"{args.rows:,} synthetic rows, synchronous={SYNCHRONOUS}\n")
+
+    baseline = timed("add_password (commit per row)", args.rows, per_row(rows))
+    many = timed("add_many (one transaction)", args.rows, batched(rows))
+    contended = timed(f"add_password, {args.threads} threads", args.rows, threaded(
+        rows, args.threads, lambda db_manager, row: db_manager.add_password(*row)))
+    group = timed(f"write_queue, {args.threads} waiting threads", args.rows, threaded(
+        rows, args.threads, lambda db_manager, row: db_manager.write_queue.add(*row).result()))
+    pipelined = timed("write_queue, submit then flush", args.rows, queued_async(rows))
+    timed("add_many + update_many + delete_many", args.rows * 3, update_and_delete(rows))
+
+    print(f"\nspeedup over per-row commits: add_many {baseline / many:.1f}x, "
+          f"pipelined queue {baseline / pipelined:.1f}x")
+    print(f"with {args.threads} concurrent writers: group commit {contended / group:.1f}x over per-row commits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DatabaseManager
+
+SERVICES = [
+    "github", "gitlab", "google", "gmail", "amazon", "aws", "azure", "slack", "jira",
+    "confluence", "bank", "paypal", "netflix", "spotify", "dropbox", "linkedin",
+    "twitter", "reddit", "steam", "apple", "office", "vpn", "router", "staging",
+    "production", "backup", "personal", "work", "admin", "billing", "support",
+]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "qu", "bo", "fi", "da", "pe"]
+# A few thousand made-up words so that most search terms are selective, like real vaults
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+
+def fresh_database(directory: str = None) -> DatabaseManager:
+    """Create a DatabaseManager on a new, empty file instead of the user's vault."""
+    directory = directory or tempfile.mkdtemp(prefix="spm-bench-")
+    DatabaseManager._instance = None
+    return DatabaseManager(os.path.join(directory, "passwords.db"))
+
+
+def synthetic_rows(count: int, seed: int = 1234):
+    """Yield (name, title, username, encrypted_password, description) tuples."""
+    rng = random.Random(seed)
+    for i in range(count):
+        name = f"{rng.choice(SERVICES)} {rng.choice(WORDS)}"
+        title = rng.choice(SERVICES).title()
+        username = f"{rng.choice(WORDS)}.{rng.choice(WORDS)}@example.com"
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+        yield name, title, username, os.urandom(100), description
+
+
+def populate(db_manager: DatabaseManager, count: int):
+    db_manager.add_many(synthetic_rows(count))
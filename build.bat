@@ -58,6 +58,19 @@ pyinstaller --clean ^
     --manifest password_manager.manifest ^
     --add-data "theme.py;." ^
     --add-data "utils.py;." ^
+    --add-data "kdf.py;." ^
+    --add-data "tasks.py;." ^
+    --add-data "widgets.py;." ^
+    --add-data "importers.py;." ^
+    --add-data "vault_export.py;." ^
+    --add-data "backup.py;." ^
+    --add-data "migrations.py;." ^
+    --add-data "generator.py;." ^
+    --add-data "app_paths.py;." ^
+    --add-data "agent.py;." ^
+    --add-data "search.py;." ^
+    --add-data "frecency.py;." ^
+    --add-data "vault_model.py;." ^
     --version-file version_info.txt ^
     password_manager_gui.py
 
@@ -0,0 +1,284 @@
+"""Headless command-line client for the vault; never imports Tk.
+
+Usage:
+    python cli.py [--db PATH] [--user NAME] [--json] COMMAND [ARGS]
+
+Commands: list, search, get, add, generate, export and batch. `batch` reads
+one command per line from stdin (same syntax, without the global options)
+and runs them all under a single unlock.
+
+The master password is taken from SPM_MASTER_PASSWORD, or prompted for on
+the terminal; export passphrases likewise from SPM_EXPORT_PASSPHRASE.
+Commands that do not need the vault (generate, --help) never load the
+database modules, only commands that read or write passwords load the crypto
+modules and unlock the vault, and agent.py is only loaded when its socket
+exists. When an unlock agent (agent.py) is running for the
+same database and user, get, list and search are answered by the agent and
+add and export borrow its key, so no command runs the KDF; --no-agent turns
+this off.
+"""
+import argparse
+import os
+import sys
+from app_paths import default_agent_socket_path, default_database_path
+
+MASTER_PASSWORD_ENV = "SPM_MASTER_PASSWORD"
+EXPORT_PASSPHRASE_ENV = "SPM_EXPORT_PASSPHRASE"
+# Failures reported as "error: ..." instead of a traceback, besides agent.AgentError
+REPORTED_ERRORS = (ValueError, LookupError, OSError)
+
+class CliError(ValueError):
+    """A command failed; reported as a message rather than a traceback"""
+
+class Session:
+    """Opens the database and unlocks the vault on first use, once per process"""
+
+    def __init__(self, db_path: str = None, username: str = "admin", use_agent: bool = True):
+        self.db_path = db_path
+        self.username = username
+        self.use_agent = use_agent
+        self._db_manager = None
+        self._encryption_manager = None
+        self._agent = None
+
+    @property
+    def agent(self):
+        """Client for a running agent that serves this database and user, or None"""
+        if self._agent is None and not (self.use_agent and os.path.exists(default_agent_socket_path())):
+            # No agent to ask, so agent.py (and socket) need not be loaded at all
+            self._agent = False
+        if self._agent is None:
+            from agent import AgentClient
+            client = AgentClient()
+            self._agent = client if client.serves(self.db_path or default_database_path(), self.username) else False
+        return self._agent or None
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from utils import DatabaseManager
+            self._db_manager = DatabaseManager(self.db_path)
+        return self._db_manager
+
+    @property
+    def encryption_manager(self):
+        if self._encryption_manager is None and self.agent:
+            from utils import EncryptionManager
+            self._encryption_manager = EncryptionManager.from_data_key(self.agent.attach())
+        if self._encryption_manager is None:
+            password = os.environ.get(MASTER_PASSWORD_ENV)
+            if password is None:
+                password = _prompt(f"Master password for {self.username}: ")
+            self._encryption_manager = self.db_manager.unlock(self.username, password)
+            if self._encryption_manager is None:
+                raise CliError("Wrong username or master password")
+        return self._encryption_manager
+
+def _prompt(prompt: str) -> str:
+    import getpass
+    try:
+        return getpass.getpass(prompt)
+    except (EOFError, OSError):
+        raise CliError(f"No terminal to prompt on; set {MASTER_PASSWORD_ENV}") from None
+
+def _is_reported(error: Exception) -> bool:
+    # An AgentError can only have been raised once agent.py was loaded
+    agent = sys.modules.get('agent')
+    return isinstance(error, REPORTED_ERRORS) or (agent is not None and isinstance(error, agent.AgentError))
+
+def _entry_lines(entries):
+    return ['\t'.join(str(entry[field]) for field in ('id', 'name', 'title', 'username')) for entry in entries]
+
+# Commands return (data for --json, lines for plain output)
+
+def cmd_list(session: Session, args):
+    if session.agent:
+        entries = session.agent.list(args.limit)
+    else:
+        from utils import entry_dict
+        if args.limit:
+            rows = session.db_manager.get_passwords_page(limit=args.limit)[0]
+        else:
+            rows = session.db_manager.get_all_passwords()
+        entries = [entry_dict(row) for row in rows]
+    return entries, _entry_lines(entries)
+
+def cmd_search(session: Session, args):
+    if session.agent:
+        entries = session.agent.search(args.term, args.limit)
+    else:
+        from utils import entry_dict
+        rows = session.db_manager.search_passwords(args.term)
+        entries = [entry_dict(row) for row in rows[:args.limit or None]]
+    return entries, _entry_lines(entries)
+
+def cmd_get(session: Session, args):
+    if session.agent:
+        entry = session.agent.get(args.name, args.id, args.username)
+        return entry, [entry['password']]
+
+    from utils import entry_dict, lookup_entry
+    db_manager = session.db_manager
+    row = lookup_entry(db_manager, args.name, args.id, args.username)
+    encrypted_password = db_manager.get_encrypted_password(row[0])
+    password = session.encryption_manager.decrypt(encrypted_password)
+    return dict(entry_dict(row), password=password), [password]
+
+def cmd_add(session: Session, args):
+    if args.password is not None:
+        password = args.password
+    elif args.generate:
+        import generator
+        password = generator.generate_password(args.length)
+    elif args.batch:
+        raise CliError("add needs --password or --generate in batch mode")
+    else:
+        password = _prompt(f"Password for {args.name}: ")
+    if not password:
+        raise CliError("The password must not be empty")
+
+    encrypted_password = session.encryption_manager.encrypt(password)
+    password_id = session.db_manager.add_password(args.name, args.title, args.username,
+                                                  encrypted_password, args.description)
+    return {'id': password_id}, [str(password_id)]
+
+def cmd_generate(session: Session, args):
+    import generator
+    try:
+        passwords = [generator.generate_password(args.length, uppercase=not args.no_uppercase,
+                                                 digits=not args.no_digits, symbols=not args.no_symbols)
+                     for _ in range(args.count)]
+    except ValueError as e:
+        raise CliError(str(e)) from None
+    return passwords if args.count > 1 else passwords[0], passwords
+
+def cmd_export(session: Session, args):
+    passphrase = os.environ.get(EXPORT_PASSPHRASE_ENV)
+    if passphrase is None:
+        if args.batch:
+            raise CliError(f"Set {EXPORT_PASSPHRASE_ENV} to export in batch mode")
+        passphrase = _prompt("Export passphrase: ")
+        if _prompt("Repeat the export passphrase: ") != passphrase:
+            raise CliError("The passphrases do not match")
+    if not passphrase:
+        raise CliError("The export passphrase must not be empty")
+
+    from vault_export import export_vault
+    count = export_vault(session.db_manager, session.encryption_manager, args.path, passphrase)
+    return {'path': args.path, 'exported': count}, [f"Exported {count} entries to {args.path}"]
+
+def cmd_batch(session: Session, args):
+    import shlex
+    parser = build_parser(batch=True)
+    failures = 0
+    for line in sys.stdin:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        try:
+            try:
+                line_args = parser.parse_args(shlex.split(line))
+            except SystemExit:
+                # argparse has already printed the usage error
+                raise CliError(f"Invalid command: {line.strip()}") from None
+            line_args.batch = True
+            line_args.json = args.json
+            data, lines = line_args.handler(session, line_args)
+        except Exception as e:
+            if not _is_reported(e):
+                raise
+            failures += 1
+            if args.json:
+                _write_json({'ok': False, 'error': str(e)})
+            else:
+                print(f"error: {e}", file=sys.stderr)
+            continue
+        if args.json:
+            _write_json({'ok': True, 'result': data})
+        else:
+            for output in lines:
+                print(output)
+        sys.stdout.flush()
+    if failures:
+        raise CliError(f"{failures} batch command(s) failed")
+    return None, []
+
+def _write_json(value):
+    import json
+    print(json.dumps(value, ensure_ascii=False))
+    sys.stdout.flush()
+
+def build_parser(batch: bool = False) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py" if not batch else "batch",
+                                     description=__doc__.splitlines()[0])
+    if not batch:
+        parser.add_argument("--db", help="vault database (default: the app's own)")
+        parser.add_argument("--user", default="admin", help="vault user (default: admin)")
+        parser.add_argument("--json", action="store_true", help="print JSON instead of text")
+        parser.add_argument("--no-agent", action="store_true", help="ignore a running unlock agent")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("list", help="list entries, newest first")
+    command.add_argument("--limit", type=int)
+    command.set_defaults(handler=cmd_list)
+
+    command = commands.add_parser("search", help="search names, titles, usernames and descriptions")
+    command.add_argument("term")
+    command.add_argument("--limit", type=int)
+    command.set_defaults(handler=cmd_search)
+
+    command = commands.add_parser("get", help="print an entry's password")
+    command.add_argument("name", nargs="?")
+    command.add_argument("--id", type=int)
+    command.add_argument("--username", help="pick among entries with the same name")
+    command.set_defaults(handler=cmd_get)
+
+    command = commands.add_parser("add", help="add an entry and print its id")
+    command.add_argument("name")
+    command.add_argument("--title", default="")
+    command.add_argument("--username", default="")
+    command.add_argument("--description", default="")
+    secret = command.add_mutually_exclusive_group()
+    secret.add_argument("--password", help="prompted for when omitted (visible to other users in ps)")
+    secret.add_argument("--generate", action="store_true", help="store a generated password")
+    command.add_argument("--length", type=int, default=16)
+    command.set_defaults(handler=cmd_add)
+
+    command = commands.add_parser("generate", help="print random passwords")
+    command.add_argument("--length", type=int, default=16)
+    command.add_argument("--count", type=int, default=1)
+    command.add_argument("--no-uppercase", action="store_true")
+    command.add_argument("--no-digits", action="store_true")
+    command.add_argument("--no-symbols", action="store_true")
+    command.set_defaults(handler=cmd_generate)
+
+    command = commands.add_parser("export", help="write an encrypted .spmx export")
+    command.add_argument("path")
+    command.set_defaults(handler=cmd_export)
+
+    if not batch:
+        command = commands.add_parser("batch", help="run commands from stdin under one unlock")
+        command.set_defaults(handler=cmd_batch)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    args.batch = False
+    session = Session(args.db, args.user, use_agent=not args.no_agent)
+    try:
+        data, lines = args.handler(session, args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        if not _is_reported(e):
+            raise
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if args.command != "batch":
+        if args.json:
+            _write_json(data)
+        elif lines:
+            print('\n'.join(lines))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""Usage counting and frecency-ranked quick open.
+
+Entries are ranked by how often and how recently their password was copied
+or revealed. The rank of a used entry is log2(uses) + last_used / HALF_LIFE,
+i.e. its use count halved for every HALF_LIFE since the last use, expressed
+so that ranks never change as time passes: only a new use moves an entry,
+which lets QuickOpenIndex keep every entry in one best-first order.
+"""
+import bisect
+import heapq
+import itertools
+import math
+import threading
+import time
+from search import words
+
+COPY = 'copy'
+REVEAL = 'reveal'
+# Copying is what a lookup is usually for; revealing often just checks
+REVEAL_WEIGHT = 0.5
+HALF_LIFE = 14 * 86400  # seconds
+
+def frecency(copies: int, reveals: int, last_used: int) -> float:
+    uses = copies + reveals * REVEAL_WEIGHT
+    return math.log2(uses) + last_used / HALF_LIFE
+
+def unused_rank(password_id: int) -> float:
+    # Below every used entry (whose ranks are in the thousands), last added first
+    return password_id / 2 ** 63
+
+class UsageLog:
+    """Copy and reveal counts per entry, kept in memory and written in batches.
+
+    record() only updates memory and tells the listeners; the counts reach
+    the entry_usage table at most flush_interval seconds later, together
+    with every other use since the last flush, and on close().
+    """
+
+    def __init__(self, db_manager, flush_interval: float = 30):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        # id -> (copies, reveals, last_used), including uses not written yet
+        self.totals = db_manager.get_usage()
+        # id -> [copies, reveals, last_used] recorded since the last flush
+        self.unsaved = {}
+        self.listeners = []
+        self.timer = None
+
+    def add_listener(self, listener):
+        """Call listener(id, (copies, reveals, last_used)) after every recorded use"""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.totals)
+
+    def record(self, password_id: int, kind: str):
+        copied = kind == COPY
+        now = int(time.time())
+        with self.lock:
+            copies, reveals, _ = self.totals.get(password_id, (0, 0, 0))
+            usage = self.totals[password_id] = (copies + copied, reveals + (not copied), now)
+            unsaved = self.unsaved.setdefault(password_id, [0, 0, 0])
+            unsaved[0] += copied
+            unsaved[1] += not copied
+            unsaved[2] = now
+            if self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self._flush_quietly)
+                self.timer.daemon = True
+                self.timer.start()
+        for listener in list(self.listeners):
+            listener(password_id, usage)
+
+    def flush(self):
+        """Write the counts recorded since the last flush in one transaction"""
+        with self.lock:
+            rows = [(password_id, *counts) for password_id, counts in self.unsaved.items()]
+            self.unsaved = {}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not rows:
+            return
+        try:
+            self.db_manager.record_usage(rows)
+        except Exception:
+            # Keep the counts for the next flush
+            with self.lock:
+                for password_id, copies, reveals, last_used in rows:
+                    unsaved = self.unsaved.setdefault(password_id, [0, 0, 0])
+                    unsaved[0] += copies
+                    unsaved[1] += reveals
+                    unsaved[2] = max(unsaved[2], last_used)
+            raise
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            pass  # Retried by the next flush
+
+    def close(self):
+        self.flush()
+
+class QuickOpenIndex:
+    """Entries by the word prefixes of their name, title and username, best ranked first.
+
+    Every entry sits in one list ordered by rank, and the distinct words are
+    kept sorted, each with a list of the ids of the entries containing it in
+    that same order, so the words starting with a prefix form one bisect
+    range. A lookup either walks the best ranked entries checking their
+    words, which finds the top few quickly whenever the prefix is common,
+    or walks just the entries of the rarest typed word's range best first,
+    or, when even that would mean checking most of them, ranks the ids the
+    ranges have in common. It picks whichever is expected to take the fewest
+    steps, never more than about as many as the smallest range has postings.
+
+    build() runs on a background thread; lookup() is meant for the Tk
+    thread and returns nothing until the build is done. Entry changes are
+    noted through DatabaseManager.add_change_listener and read back on the
+    next lookup, or, when there are too many of them, by building again.
+    """
+    # How many posting ids can be collected and ranked in the time it takes
+    # to check one entry of the best-first walk
+    WALK_COST = 4
+    # Up to this many ids are moved into or out of a list one by one, each
+    # shifting its tail; more and the list is copied together from slices once
+    ONE_BY_ONE = 64
+    # More changed entries than this at once and the index is built again
+    RESET_THRESHOLD = 500
+
+    def __init__(self, db_manager, usage_log: UsageLog):
+        self.db_manager = db_manager
+        self.usage_log = usage_log
+        self.lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = set()
+        self.pending_usage = {}
+        self.ready = False
+        self.vocabulary = []   # sorted distinct words
+        # Word -> ids of the entries containing it, best ranked first; lists rather than
+        # arrays, as they hold the id objects the other fields share and iterate without boxing
+        self.word_ids = {}
+        self.entry_text = {}   # entry id -> " word word ... " for prefix checks
+        # Entry id -> its rank negated, which ascends along order and the posting lists
+        self.keys = {}
+        self.order = []        # entry ids, best ranked first
+        # Postings before each vocabulary position; None when words were added or removed
+        self.cumulative = None
+        db_manager.add_change_listener(self._changed)
+        usage_log.add_listener(self._used)
+
+    def close(self):
+        self.db_manager.remove_change_listener(self._changed)
+        self.usage_log.remove_listener(self._used)
+
+    def _changed(self, ids):
+        with self.pending_lock:
+            self.pending.update(ids)
+
+    def _used(self, password_id: int, usage):
+        with self.pending_lock:
+            self.pending_usage[password_id] = usage
+
+    @staticmethod
+    def _text(name: str, title: str, username: str) -> str:
+        return ' ' + ' '.join(set(words(f"{name}\n{title}\n{username}"))) + ' '
+
+    def _rank(self, password_id: int, usage: dict) -> float:
+        return frecency(*usage[password_id]) if password_id in usage else unused_rank(password_id)
+
+    def build(self):
+        # Built aside and swapped in, so lookups never wait for it
+        usage = self.usage_log.snapshot()
+        entry_text, keys = {}, {}
+        for password_id, name, title, username, _, _ in self.db_manager.iter_passwords(
+                chunk_size=2000, include_secrets=False):
+            entry_text[password_id] = self._text(name, title, username)
+            keys[password_id] = -self._rank(password_id, usage)
+        order = sorted(keys, key=keys.__getitem__)
+        word_ids = {}
+        # Best first, so every posting list comes out in rank order too
+        for password_id in order:
+            for word in entry_text[password_id].split():
+                ids = word_ids.get(word)
+                if ids is None:
+                    ids = word_ids[word] = []
+                ids.append(password_id)
+
+        with self.lock:
+            self.vocabulary, self.word_ids, self.entry_text, self.keys = sorted(word_ids), word_ids, entry_text, keys
+            self.order = order
+            self.cumulative = None
+            self.ready = True
+
+    def _range(self, prefix: str):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        return start, bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', start)
+
+    def _postings(self, start: int, end: int) -> int:
+        if self.cumulative is None:
+            self.cumulative = list(itertools.accumulate(
+                (len(self.word_ids[word]) for word in self.vocabulary), initial=0))
+        return self.cumulative[end] - self.cumulative[start]
+
+    def lookup(self, term: str, limit: int = 8) -> list:
+        """Ids of the best ranked entries matching every word of term as a prefix"""
+        if not self.ready:
+            return []
+        typed = words(term)
+        with self.lock:
+            self._apply_pending()
+            if not self.ready:
+                return []  # Too many changes; building again
+            if not typed:
+                return self.order[:limit]
+            # (postings, prefix, vocabulary range), most selective first
+            ranges = []
+            for prefix in typed:
+                start, end = self._range(prefix)
+                ranges.append((self._postings(start, end), prefix, start, end))
+            ranges.sort()
+            smallest, _, start, end = ranges[0]
+            if not smallest:
+                return []
+            # " git" is in an entry's text exactly when one of its words starts with "git"
+            needles = [' ' + prefix for _, prefix, _, _ in ranges[1:]]
+
+            # Expected steps of each way to the results, in entry checks, taking the
+            # words as independent: walking every entry, walking the smallest range,
+            # and collecting and ranking the ids the ranges have in common
+            share = 1.0  # of the smallest range's entries that match the other words
+            for size, _, _, _ in ranges[1:]:
+                share *= size / len(self.order)
+            walk_all = limit / (share * smallest / len(self.order)) if share else math.inf
+            walk_range = (end - start) + (min(smallest, limit / share) if share else smallest)
+            collect = (smallest + sum(min(size, smallest * self.WALK_COST) for size, _, _, _ in ranges[1:])) / self.WALK_COST
+
+            if walk_all < min(walk_range, collect):
+                found = self._walk(self.order, [' ' + prefix for prefix in typed], limit,
+                                   int(min(walk_range, collect)))
+                if found is not None:
+                    return found
+            if walk_range <= collect:
+                return self._walk(self._range_ids(start, end), needles, limit)
+
+            # Rare enough to rank every entry of the smallest range
+            ids = set(self._ids(start, end))
+            entry_text = self.entry_text
+            for size, prefix, start, end in ranges[1:]:
+                if size <= smallest * self.WALK_COST:
+                    ids.intersection_update(self._ids(start, end))
+                else:
+                    needle = ' ' + prefix
+                    ids = {password_id for password_id in ids if needle in entry_text[password_id]}
+            return heapq.nsmallest(limit, ids, key=self.keys.__getitem__)
+
+    def _walk(self, candidates, needles: list, limit: int, steps: int = None):
+        """The first limit candidates containing every needle, or None if steps ran out first"""
+        entry_text = self.entry_text
+        found = []
+        for password_id in itertools.islice(candidates, steps):
+            text = entry_text[password_id]
+            if all(needle in text for needle in needles):
+                found.append(password_id)
+                if len(found) == limit:
+                    return found
+        if steps is not None and steps < len(self.order):
+            return None
+        return found
+
+    def _range_ids(self, start: int, end: int):
+        # The entries of a vocabulary range best first, each once
+        if end - start == 1:
+            return self.word_ids[self.vocabulary[start]]
+        seen = set()
+        merged = heapq.merge(*(self.word_ids[word] for word in self.vocabulary[start:end]), key=self.keys.__getitem__)
+        return (password_id for password_id in merged if not (password_id in seen or seen.add(password_id)))
+
+    def _ids(self, start: int, end: int):
+        return itertools.chain.from_iterable(self.word_ids[word] for word in self.vocabulary[start:end])
+
+    def _apply_pending(self):
+        with self.pending_lock:
+            ids, self.pending = self.pending, set()
+            usage, self.pending_usage = self.pending_usage, {}
+        if not ids and not usage:
+            return
+        if len(ids) + len(usage) > self.RESET_THRESHOLD:
+            # Cheaper to build again; the changes so far are in what build() reads,
+            # and later ones wait in pending, as lookups stop until it is done
+            self.ready = False
+            threading.Thread(target=self.build, daemon=True).start()
+            return
+
+        # Every changed entry leaves the lists it is in and those with a new
+        # version rejoin them, one batch per list
+        rows = {row[0]: row for row in self.db_manager.get_password_entries(ids)} if ids else {}
+        snapshot = self.usage_log.snapshot() if rows else {}
+        new = {}  # id -> (text, key)
+        for password_id, name, title, username, _, _ in rows.values():
+            new[password_id] = self._text(name, title, username), -self._rank(password_id, snapshot)
+        for password_id, counts in usage.items():
+            if password_id not in ids and password_id in self.entry_text:
+                new[password_id] = self.entry_text[password_id], -frecency(*counts)
+        old = {password_id: self.entry_text[password_id]
+               for password_id in itertools.chain(ids, usage) if password_id in self.entry_text}
+
+        leaving, joining = {}, {}
+        for password_id, text in old.items():
+            for word in text.split():
+                leaving.setdefault(word, set()).add(password_id)
+        for password_id, (text, _) in new.items():
+            for word in text.split():
+                joining.setdefault(word, []).append(password_id)
+
+        # Out while the keys are still those the lists are ordered by
+        self._discard(self.order, old.keys())
+        for word, gone in leaving.items():
+            self._discard(self.word_ids[word], gone)
+        for password_id in old:
+            del self.entry_text[password_id]
+            del self.keys[password_id]
+        for password_id, (text, key) in new.items():
+            self.entry_text[password_id] = text
+            self.keys[password_id] = key
+        self._insert(self.order, list(new))
+
+        added_words, removed_words = [], False
+        for word in leaving.keys() | joining.keys():
+            ids = self.word_ids.get(word)
+            if ids is None:
+                ids = self.word_ids[word] = []
+                added_words.append(word)
+            self._insert(ids, joining.get(word, ()))
+            if not ids:
+                del self.word_ids[word]
+                removed_words = True
+        if removed_words:
+            self.vocabulary = [word for word in self.vocabulary if word in self.word_ids]
+        if added_words:
+            # Two sorted runs, which the sort merges in one pass
+            self.vocabulary.extend(sorted(added_words))
+            self.vocabulary.sort()
+        if removed_words or added_words:
+            self.cumulative = None
+
+    def _position(self, ids: list, password_id: int) -> int:
+        position = bisect.bisect_left(ids, self.keys[password_id], key=self.keys.__getitem__)
+        while ids[position] != password_id:
+            position += 1  # Past entries of equal rank
+        return position
+
+    def _discard(self, ids: list, gone):
+        """Remove gone from ids, which is in rank order"""
+        if len(gone) <= self.ONE_BY_ONE:
+            for password_id in gone:
+                del ids[self._position(ids, password_id)]
+            return
+        positions = sorted(self._position(ids, password_id) for password_id in gone)
+        kept = ids[:positions[0]]
+        for start, end in zip(positions, positions[1:]):
+            kept += ids[start + 1:end]
+        kept += ids[positions[-1] + 1:]
+        ids[:] = kept
+
+    def _insert(self, ids: list, joining):
+        """Add joining to ids, keeping it in rank order"""
+        keys = self.keys
+        if len(joining) <= self.ONE_BY_ONE:
+            for password_id in joining:
+                bisect.insort(ids, password_id, key=keys.__getitem__)
+            return
+        merged, start = [], 0
+        for password_id in sorted(joining, key=keys.__getitem__):
+            end = bisect.bisect_right(ids, keys[password_id], start, key=keys.__getitem__)
+            merged += ids[start:end]
+            merged.append(password_id)
+            start = end
+        merged += ids[start:]
+        ids[:] = merged
@@ -0,0 +1,27 @@
+import secrets
+import string
+
+def generate_password(length: int = 16, uppercase: bool = True, digits: bool = True, symbols: bool = True) -> str:
+    """Random password with at least one character from every selected class.
+
+    Lowercase letters are always included. Uses the secrets module, so the
+    result is suitable for real credentials.
+    """
+    classes = [string.ascii_lowercase]
+    if uppercase:
+        classes.append(string.ascii_uppercase)
+    if digits:
+        classes.append(string.digits)
+    if symbols:
+        classes.append(string.punctuation)
+    if length < len(classes):
+        raise ValueError(f"A password with {len(classes)} character classes needs at least {len(classes)} characters")
+
+    alphabet = ''.join(classes)
+    password = [secrets.choice(chars) for chars in classes]
+    password.extend(secrets.choice(alphabet) for _ in range(length - len(password)))
+    # Fisher-Yates with the system RNG so the required characters land anywhere
+    for i in range(len(password) - 1, 0, -1):
+        j = secrets.randbelow(i + 1)
+        password[i], password[j] = password[j], password[i]
+    return ''.join(password)
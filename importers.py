@@ -0,0 +1,265 @@
+"""Streaming importers for Bitwarden JSON, KeePass 2 XML and browser CSV exports.
+
+Each reader takes a binary file object and yields ImportEntry tuples (or None
+for records that are not logins) without loading the whole file, so memory
+use depends on the batch size rather than on the size of the export.
+"""
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+# created_at is an epoch carried over from the source, or None for "now"
+ImportEntry = namedtuple('ImportEntry', 'name title username password description created_at',
+                         defaults=(None,))
+ImportResult = namedtuple('ImportResult', 'imported duplicates skipped')
+
+def _host(url: str) -> str:
+    try:
+        return urlsplit(url if '//' in url else f'//{url}').hostname or ''
+    except ValueError:
+        return ''
+
+def _description(url: str, notes: str) -> str:
+    return '\n'.join(part for part in (url, notes) if part)
+
+@contextlib.contextmanager
+def _text_stream(fp, **kwargs):
+    """Text view of a binary file that leaves the file open afterwards"""
+    text = io.TextIOWrapper(fp, encoding='utf-8-sig', **kwargs)
+    try:
+        yield text
+    finally:
+        text.detach()
+
+class _JsonStream:
+    """Decodes JSON values one at a time from a text stream"""
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, text):
+        self.text = text
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.text.read(self.CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer stays small
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed JSON: expected one of {chars!r}, found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value touching the end of the buffer (e.g. a number) may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array(self):
+        """Yield the elements of the array at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+def _bitwarden_entry(item: dict, folders: dict):
+    login = item.get('login')
+    if item.get('type', 1) != 1 or not login:
+        return None
+    uris = login.get('uris') or []
+    url = (uris[0].get('uri') or '') if uris else ''
+    title = folders.get(item.get('folderId')) or _host(url) or 'Bitwarden'
+    return ImportEntry(item.get('name') or '', title, login.get('username') or '',
+                       login.get('password') or '', _description(url, item.get('notes') or ''))
+
+def read_bitwarden_json(fp):
+    """Unencrypted Bitwarden JSON export; the items array is streamed entry by entry"""
+    with _text_stream(fp) as text:
+        yield from _bitwarden_items(_JsonStream(text))
+
+def _bitwarden_items(stream):
+    folders = {}
+    if stream.peek() == '[':
+        for item in stream.array():
+            yield _bitwarden_entry(item, folders)
+        return
+
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'items':
+            for item in stream.array():
+                yield _bitwarden_entry(item, folders)
+        elif key == 'folders':
+            # Bitwarden writes folders before items, so entries can use folder names as titles
+            folders = {folder.get('id'): folder.get('name') for folder in stream.value()}
+        else:
+            value = stream.value()
+            if key == 'encrypted' and value:
+                raise ValueError("Encrypted Bitwarden exports are not supported; export as unencrypted JSON")
+        if stream.expect(',}') == '}':
+            return
+
+def read_keepass_xml(fp):
+    """KeePass 2.x XML export; entry history is skipped"""
+    groups = []
+    parents = []
+    history_depth = 0
+    for event, element in ET.iterparse(fp, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            if element.tag == 'History':
+                history_depth += 1
+            continue
+
+        parents.pop()
+        tag = element.tag
+        if tag == 'History':
+            history_depth -= 1
+        elif tag == 'Name' and parents and parents[-1].tag == 'Group':
+            groups.append((parents[-1], element.text or ''))
+        elif tag == 'Group':
+            if groups and groups[-1][0] is element:
+                groups.pop()
+        elif tag == 'Entry' and not history_depth:
+            fields = {string.findtext('Key'): string.findtext('Value') or '' for string in element.findall('String')}
+            url = fields.get('URL', '')
+            title = groups[-1][1] if groups else _host(url) or 'KeePass'
+            yield ImportEntry(fields.get('Title') or _host(url), title, fields.get('UserName', ''),
+                              fields.get('Password', ''), _description(url, fields.get('Notes', '')))
+
+        # Free finished subtrees (entries, history, icons) so memory stays flat
+        if tag in ('Entry', 'History', 'Meta') and parents:
+            parents[-1].remove(element)
+
+CSV_COLUMNS = {
+    'name': ('name', 'title'),
+    'url': ('url', 'login_uri', 'website', 'origin'),
+    'username': ('username', 'login_username', 'user name', 'email'),
+    'password': ('password', 'login_password'),
+    'notes': ('note', 'notes', 'extra', 'comments'),
+}
+
+def read_browser_csv(fp):
+    """CSV exports from Chrome, Edge, Firefox, Safari and similar tools"""
+    with _text_stream(fp, newline='') as text:
+        yield from _browser_rows(csv.DictReader(text))
+
+def _browser_rows(reader):
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        header = next((name for name in reader.fieldnames or () if name.strip().lower() in aliases), None)
+        columns[field] = header
+    if columns['password'] is None:
+        raise ValueError("The CSV file has no password column")
+
+    for row in reader:
+        values = {field: (row.get(header) or '').strip() if header else '' for field, header in columns.items()}
+        host = _host(values['url'])
+        yield ImportEntry(values['name'] or host, 'Browser', values['username'],
+                          row.get(columns['password']) or '', _description(values['url'], values['notes']))
+
+READERS = {
+    'bitwarden': read_bitwarden_json,
+    'keepass': read_keepass_xml,
+    'csv': read_browser_csv,
+}
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    formats = {'.json': 'bitwarden', '.xml': 'keepass', '.csv': 'csv'}
+    if extension not in formats:
+        raise ValueError(f"Unsupported import file: {os.path.basename(path)}")
+    return formats[extension]
+
+def import_entries(db_manager, encryption_manager, entries, batch_size: int = 1000, progress=None) -> ImportResult:
+    """Encrypt and insert entries batch by batch, skipping (name, username) pairs already in the vault.
+
+    progress(processed) is called after every committed batch.
+    """
+    imported = duplicates = skipped = 0
+    entries = iter(entries)
+    for batch in iter(lambda: list(itertools.islice(entries, batch_size)), []):
+        valid = [entry for entry in batch if entry is not None and entry.name and entry.password]
+        skipped += len(batch) - len(valid)
+
+        existing = db_manager.find_duplicates((entry.name, entry.username) for entry in valid)
+        fresh = []
+        for entry in valid:
+            key = (entry.name, entry.username)
+            if key in existing:
+                duplicates += 1
+                continue
+            existing.add(key)  # repeated within this batch
+            fresh.append(entry)
+
+        # Batches are small enough that a worker pool costs more than it saves
+        rows = []
+        for entry, (_, encrypted_password, error) in zip(
+                fresh, encryption_manager.encrypt_many((e.password for e in fresh), workers=1)):
+            if error is not None:
+                raise error
+            rows.append((entry.name, entry.title, entry.username, encrypted_password, entry.description,
+                         entry.created_at))
+        db_manager.add_many(rows)
+        imported += len(rows)
+
+        if progress:
+            progress(imported + duplicates + skipped)
+    return ImportResult(imported, duplicates, skipped)
+
+def import_file(db_manager, encryption_manager, path: str, file_format: str = None,
+                batch_size: int = 1000, progress=None) -> ImportResult:
+    """Stream an export file into the vault.
+
+    progress(processed, fraction) reports the number of records read and the
+    share of the file consumed so far.
+    """
+    reader = READERS[file_format or detect_format(path)]
+    total = os.path.getsize(path) or 1
+    with open(path, 'rb') as fp:
+        report = None
+        if progress:
+            report = lambda processed: progress(processed, min(fp.tell() / total, 1.0))
+        return import_entries(db_manager, encryption_manager, reader(fp), batch_size, report)
@@ -0,0 +1,184 @@
+import base64
+import functools
+import importlib.util
+import math
+import os
+import time
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+def _argon2_low_level():
+    # argon2-cffi is optional (scrypt is used instead) and slow to import, so it
+    # is only loaded once an Argon2id derivation actually runs
+    try:
+        from argon2 import low_level
+    except ImportError:
+        return None
+    return low_level
+
+# Unlock time the calibration aims for on the current machine
+TARGET_MS = 300
+
+class Pbkdf2Kdf:
+    name = 'pbkdf2-sha256'
+    # Far above what calibrate() picks on any current machine
+    MAX_ITERATIONS = 10_000_000
+
+    def __init__(self, iterations: int = 480000):
+        self.iterations = iterations
+
+    def derive(self, password: bytes, salt: bytes, length: int = 32) -> bytes:
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=length, salt=salt, iterations=self.iterations)
+        return kdf.derive(password)
+
+    def encode_params(self) -> str:
+        return f"i={self.iterations}"
+
+    @classmethod
+    def from_params(cls, params: dict):
+        return cls(iterations=params['i'])
+
+    @classmethod
+    def minimum(cls):
+        return cls(iterations=50000)
+
+    def within_limits(self) -> bool:
+        return 1 <= self.iterations <= self.MAX_ITERATIONS
+
+    def scaled(self, factor: float):
+        return Pbkdf2Kdf(iterations=max(int(self.iterations * factor), 100000))
+
+class ScryptKdf:
+    name = 'scrypt'
+    # 128 * r * N bytes; the same 1 GiB that scaled() stops at
+    MAX_MEMORY = 1 << 30
+    # Memory times p, which runs that many derivations one after another
+    MAX_WORK = 1 << 32
+
+    def __init__(self, log_n: int = 17, r: int = 8, p: int = 1):
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+
+    def derive(self, password: bytes, salt: bytes, length: int = 32) -> bytes:
+        kdf = Scrypt(salt=salt, length=length, n=2 ** self.log_n, r=self.r, p=self.p)
+        return kdf.derive(password)
+
+    def encode_params(self) -> str:
+        return f"ln={self.log_n},r={self.r},p={self.p}"
+
+    @classmethod
+    def from_params(cls, params: dict):
+        return cls(log_n=params['ln'], r=params['r'], p=params['p'])
+
+    @classmethod
+    def minimum(cls):
+        return cls(log_n=14)
+
+    def within_limits(self) -> bool:
+        if self.log_n < 1 or self.r < 1 or self.p < 1 or self.log_n > 64:
+            return False
+        memory = 128 * self.r * 2 ** self.log_n
+        return memory <= self.MAX_MEMORY and memory * self.p <= self.MAX_WORK
+
+    def scaled(self, factor: float):
+        # N must be a power of two; stay between 16 MiB and 1 GiB of memory
+        log_n = self.log_n + int(round(math.log2(max(factor, 1e-9))))
+        return ScryptKdf(log_n=min(max(log_n, 14), 20), r=self.r, p=self.p)
+
+class Argon2idKdf:
+    name = 'argon2id'
+    MAX_MEMORY_KIB = 1 << 20
+    # Memory times passes: 4 GiB, sixteen times a 64 MiB, four-pass run
+    MAX_WORK_KIB = 1 << 22
+    MAX_PARALLELISM = 64
+
+    def __init__(self, memory_kib: int = 65536, time_cost: int = 3, parallelism: int = 4):
+        self.memory_kib = memory_kib
+        self.time_cost = time_cost
+        self.parallelism = parallelism
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec('argon2') is not None
+
+    def derive(self, password: bytes, salt: bytes, length: int = 32) -> bytes:
+        low_level = _argon2_low_level()
+        if low_level is None:
+            raise RuntimeError("argon2-cffi is required to unlock this vault (pip install argon2-cffi)")
+        return low_level.hash_secret_raw(password, salt, time_cost=self.time_cost, memory_cost=self.memory_kib,
+                                         parallelism=self.parallelism, hash_len=length, type=low_level.Type.ID)
+
+    def encode_params(self) -> str:
+        return f"v=19,m={self.memory_kib},t={self.time_cost},p={self.parallelism}"
+
+    @classmethod
+    def from_params(cls, params: dict):
+        return cls(memory_kib=params['m'], time_cost=params['t'], parallelism=params['p'])
+
+    @classmethod
+    def minimum(cls):
+        return cls(time_cost=1, parallelism=min(os.cpu_count() or 1, 4))
+
+    def within_limits(self) -> bool:
+        return (1 <= self.parallelism <= self.MAX_PARALLELISM and 1 <= self.time_cost
+                and 8 * self.parallelism <= self.memory_kib <= self.MAX_MEMORY_KIB
+                and self.memory_kib * self.time_cost <= self.MAX_WORK_KIB)
+
+    def scaled(self, factor: float):
+        # Grow passes first; on slow hosts give up memory before dropping below one pass
+        time_cost = int(round(self.time_cost * factor))
+        if time_cost >= 1:
+            return Argon2idKdf(self.memory_kib, time_cost, self.parallelism)
+        memory_kib = max(int(self.memory_kib * self.time_cost * factor), 8192)
+        return Argon2idKdf(memory_kib, 1, self.parallelism)
+
+KDFS = {kdf.name: kdf for kdf in (Pbkdf2Kdf, ScryptKdf, Argon2idKdf)}
+
+def default_kdf_name() -> str:
+    return Argon2idKdf.name if Argon2idKdf.available() else ScryptKdf.name
+
+def encode_hash(kdf, salt: bytes, digest: bytes) -> str:
+    """PHC-style string: $<kdf>$<params>$<salt>$<digest>"""
+    return '$'.join(['', kdf.name, kdf.encode_params(),
+                     base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+def decode_params(name: str, params: str):
+    """Build a KDF from its name and an encode_params() string"""
+    if name not in KDFS:
+        raise ValueError(f"Unsupported password hash scheme: {name}")
+    if params.isdigit():
+        # Early single-KDF hashes stored a bare PBKDF2 iteration count
+        params = f"i={params}"
+    values = {}
+    for item in params.split(','):
+        key, value = item.split('=')
+        values[key] = int(value)
+    return KDFS[name].from_params(values)
+
+def decode_hash(encoded: str):
+    """Return (kdf, salt, digest) from a string produced by encode_hash"""
+    _, name, params, salt, digest = encoded.split('$')
+    return decode_params(name, params), base64.b64decode(salt), base64.b64decode(digest)
+
+def measure(kdf) -> float:
+    """Seconds one derivation takes on this machine"""
+    start = time.perf_counter()
+    kdf.derive(b'calibration', os.urandom(16))
+    return time.perf_counter() - start
+
+def calibrate(name: str = None, target_ms: int = TARGET_MS):
+    """Pick parameters for the named KDF so one derivation takes about target_ms here"""
+    # calibrate() and calibrate(default name) share one cached result
+    return _calibrate(name or default_kdf_name(), target_ms)
+
+@functools.lru_cache(maxsize=None)
+def _calibrate(name: str, target_ms: int):
+    kdf_class = KDFS[name]
+    target = target_ms / 1000
+    kdf = kdf_class.minimum()
+    # Scale from a cheap probe, then correct once against a real-cost run
+    for _ in range(2):
+        kdf = kdf.scaled(target / measure(kdf))
+    return kdf
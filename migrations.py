@@ -0,0 +1,212 @@
+"""Versioned schema migrations, keyed on PRAGMA user_version.
+
+Migration N moves a database from version N - 1 to N. Migrations that touch
+every row work in batches, each in its own short transaction, and can be
+interrupted at any point: user_version is only bumped by the transaction
+that finishes the migration, and the next launch picks up where the last
+batch left off.
+"""
+
+# Current time as an integer Unix epoch, for column defaults and updates
+EPOCH_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+MIGRATIONS = []
+
+def migration(version: int):
+    def register(func):
+        MIGRATIONS.append((version, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0]
+
+def current_version(conn) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(db_manager, batch_size: int = 5000, progress=None, target: int = None) -> int:
+    """Apply pending migrations up to target (default: all) and return the resulting version.
+
+    progress(version, done, total) is called as batched migrations advance.
+    """
+    with db_manager.pool.reader() as conn:
+        version = current_version(conn)
+    for number, func in MIGRATIONS:
+        if version < number <= (target or number):
+            func(db_manager, batch_size, progress)
+            version = number
+    return version
+
+def _finish(conn, version: int):
+    conn.execute(f'PRAGMA user_version = {version}')
+
+def _epoch(column: str) -> str:
+    # TEXT 'YYYY-MM-DD HH:MM:SS' (UTC, from CURRENT_TIMESTAMP) to seconds
+    return f"COALESCE(CAST(strftime('%s', {column}) AS INTEGER), {EPOCH_NOW})"
+
+def _copy_in_batches(db_manager, version: int, copy, batch_size: int, progress):
+    """Fill passwords_migrating from passwords in id order.
+
+    copy(conn, last_id, batch_size) copies the next batch of rows after
+    last_id and returns how many it copied. Each batch commits on its own, and
+    an interrupted copy resumes after the highest id already copied.
+    """
+    with db_manager.pool.reader() as conn:
+        total = conn.execute('SELECT COUNT(*) FROM passwords').fetchone()[0]
+    while True:
+        with db_manager.pool.writer() as conn:
+            (last_id,) = conn.execute('SELECT COALESCE(MAX(id), 0) FROM passwords_migrating').fetchone()
+            copied = copy(conn, last_id, batch_size)
+            done = conn.execute('SELECT COUNT(*) FROM passwords_migrating').fetchone()[0]
+        if progress:
+            progress(version, done, total)
+        if copied < batch_size:
+            return
+
+def _replace_passwords(conn):
+    """Swap passwords_migrating in for passwords, keeping indexes, triggers and ids.
+
+    Call inside the transaction that finishes the migration.
+    """
+    # Rows deleted by another version of the app between interrupted runs
+    conn.execute('DELETE FROM passwords_migrating WHERE id NOT IN (SELECT id FROM passwords)')
+    # Indexes and the search triggers are dropped with the table; recreate them as they were
+    schema = [sql for (sql,) in conn.execute('''
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name = 'passwords' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    ''')]
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'passwords'").fetchone()
+    conn.execute('DROP TABLE passwords')
+    conn.execute('ALTER TABLE passwords_migrating RENAME TO passwords')
+    for sql in schema:
+        conn.execute(sql)
+    if sequence:
+        # Never hand out the id of a row deleted before the migration
+        if not conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'passwords'",
+                            sequence).rowcount:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('passwords', ?)", sequence)
+
+@migration(2)
+def integer_timestamps(db_manager, batch_size: int, progress):
+    """Store passwords.created_at/updated_at as integer epochs instead of TEXT.
+
+    SQLite cannot change a column's type in place, so rows are copied into a
+    new table and the tables are swapped at the end.
+    """
+    with db_manager.pool.writer() as conn:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS passwords_migrating (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                title TEXT NOT NULL,
+                username TEXT NOT NULL,
+                encrypted_password BLOB NOT NULL,
+                description TEXT,
+                created_at INTEGER NOT NULL DEFAULT ({EPOCH_NOW}),
+                updated_at INTEGER NOT NULL DEFAULT ({EPOCH_NOW})
+            )
+        ''')
+
+    def copy(conn, last_id, limit):
+        return conn.execute(f'''
+            INSERT INTO passwords_migrating
+                (id, name, title, username, encrypted_password, description, created_at, updated_at)
+            SELECT id, name, title, username, encrypted_password, description,
+                   {_epoch('created_at')}, {_epoch('updated_at')}
+            FROM passwords
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, limit)).rowcount
+
+    _copy_in_batches(db_manager, 2, copy, batch_size, progress)
+    with db_manager.pool.writer() as conn:
+        conn.execute('BEGIN')
+        _replace_passwords(conn)
+        _finish(conn, 2)
+
+@migration(3)
+def timestamp_indexes(db_manager, batch_size: int, progress):
+    """Index the list order and updated_at so sorting and range scans skip temp B-trees"""
+    with db_manager.pool.writer() as conn:
+        conn.execute('BEGIN')
+        # Matches ORDER BY created_at DESC, id DESC and the (created_at, id) keyset
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_created ON passwords(created_at DESC, id DESC)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_updated ON passwords(updated_at)')
+        _finish(conn, 3)
+
+@migration(4)
+def split_secrets(db_manager, batch_size: int, progress):
+    """Move encrypted_password out of passwords into password_secrets.
+
+    Listing and search scan passwords and never need the ciphertext, so it
+    lives in its own table keyed by id and is read one entry at a time.
+    """
+    with db_manager.pool.writer() as conn:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS passwords_migrating (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                title TEXT NOT NULL,
+                username TEXT NOT NULL,
+                description TEXT,
+                created_at INTEGER NOT NULL DEFAULT ({EPOCH_NOW}),
+                updated_at INTEGER NOT NULL DEFAULT ({EPOCH_NOW})
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS password_secrets (
+                id INTEGER PRIMARY KEY,
+                encrypted_password BLOB NOT NULL
+            )
+        ''')
+
+    def copy(conn, last_id, limit):
+        copied = conn.execute('''
+            INSERT INTO passwords_migrating (id, name, title, username, description, created_at, updated_at)
+            SELECT id, name, title, username, description, created_at, updated_at
+            FROM passwords
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, limit)).rowcount
+        conn.execute('''
+            INSERT INTO password_secrets (id, encrypted_password)
+            SELECT id, encrypted_password FROM passwords
+            WHERE id > ? AND id <= (SELECT MAX(id) FROM passwords_migrating)
+        ''', (last_id,))
+        return copied
+
+    _copy_in_batches(db_manager, 4, copy, batch_size, progress)
+    with db_manager.pool.writer() as conn:
+        conn.execute('BEGIN')
+        _replace_passwords(conn)
+        conn.execute('DELETE FROM password_secrets WHERE id NOT IN (SELECT id FROM passwords)')
+        # The secret goes with its entry
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS password_secrets_delete AFTER DELETE ON passwords BEGIN
+                DELETE FROM password_secrets WHERE id = old.id;
+            END
+        ''')
+        _finish(conn, 4)
+
+@migration(5)
+def entry_usage(db_manager, batch_size: int, progress):
+    """Count how often each entry's password is copied or revealed, for frecency ranking"""
+    with db_manager.pool.writer() as conn:
+        conn.execute('BEGIN')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entry_usage (
+                id INTEGER PRIMARY KEY,
+                copies INTEGER NOT NULL DEFAULT 0,
+                reveals INTEGER NOT NULL DEFAULT 0,
+                last_used INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS entry_usage_delete AFTER DELETE ON passwords BEGIN
+                DELETE FROM entry_usage WHERE id = old.id;
+            END
+        ''')
+        _finish(conn, 5)
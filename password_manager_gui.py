@@ -1,20 +1,33 @@
+import time
+# Reference point for --profile-startup, taken before any heavy import
+PROCESS_START = time.perf_counter()
 import sys
 sys.path.append("/usr/local/lib/python3.10/site-packages")
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
-import string
+from tkinter import filedialog, messagebox
 import random
-import pyperclip
 from theme import Theme
-from utils import DatabaseManager, EncryptionManager
-import json
+import generator
 from datetime import datetime
 import os
-import bcrypt
-import sqlite3
 import math
 import threading
+import importlib
+import textwrap
+import bisect
+from tasks import TaskRunner
+from widgets import VirtualList
+
+# Fixed-width placeholder so hidden passwords don't reveal their length
+PASSWORD_MASK = "•" * 8
+
+# Rows fetched per page in the password lists
+PAGE_SIZE = 100
+# Typing pause before a search that needs a database query
+SEARCH_DEBOUNCE_MS = 150
+# Results shown in the quick open palette
+QUICK_OPEN_ROWS = 8
 
 class Sparkle:
     def __init__(self, canvas, x, y):
@@ -97,11 +110,450 @@ class SparkleCanvas:
         self.is_running = False
         self.canvas.destroy()
 
+class PasswordCard:
+    """Card in the main password list; re-bound to another row as the list scrolls"""
+    HEIGHT = 210
+
+    def __init__(self, app, parent, on_delete):
+        self.app = app
+        self.on_delete = on_delete
+        self.pwd_id = None
+        self.username = ""
+        self.status_job = None
+
+        # Password card with rounded corners and shadow effect
+        self.frame = ctk.CTkFrame(
+            parent,
+            fg_color="white",
+            corner_radius=10,
+            border_width=1,
+            border_color="#E0E0E0"
+        )
+
+        # Name and timestamp in header
+        header_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        header_frame.pack(fill="x", padx=15, pady=(10, 5))
+
+        self.name_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=("Helvetica", 12, "bold"),
+            text_color="#000000"
+        )
+        self.name_label.pack(side="left")
+
+        self.date_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=("Helvetica", 10),
+            text_color="#666666"
+        )
+        self.date_label.pack(side="right")
+
+        # Separator line
+        separator = ctk.CTkFrame(self.frame, height=1, fg_color="#E0E0E0")
+        separator.pack(fill="x", padx=15, pady=5)
+
+        # Title and username
+        details_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        details_frame.pack(fill="x", padx=15, pady=5)
+
+        self.title_label = ctk.CTkLabel(
+            details_frame,
+            text="",
+            font=("Helvetica", 11),
+            text_color="#000000"
+        )
+        self.title_label.pack(side="left")
+
+        self.username_label = ctk.CTkLabel(
+            details_frame,
+            text="",
+            font=("Helvetica", 11),
+            text_color="#000000"
+        )
+        self.username_label.pack(side="right")
+
+        # Password field with monospace font, plus room for copy feedback
+        password_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        password_frame.pack(fill="x", padx=15, pady=5)
+
+        self.password_var = tk.StringVar(value=PASSWORD_MASK)
+        password_label = ctk.CTkLabel(
+            password_frame,
+            textvariable=self.password_var,
+            font=("Courier", 12),  # Monospace font for better password display
+            text_color="#000000",
+            anchor="w"
+        )
+        password_label.pack(side="left", padx=(0, 10))
+
+        self.status_label = ctk.CTkLabel(
+            password_frame,
+            text="",
+            font=("Helvetica", 10),
+            text_color="#00AA00"
+        )
+        self.status_label.pack(side="right")
+
+        # Buttons frame
+        buttons_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        buttons_frame.pack(fill="x", padx=15, pady=(5, 5))
+
+        # Button styles
+        button_style = {
+            "corner_radius": 6,
+            "height": 28,
+            "font": ("Helvetica", 10)
+        }
+
+        show_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Show/Hide",
+            command=self.toggle_password,
+            width=90,
+            fg_color="#000000",
+            hover_color="#333333",
+            **button_style
+        )
+        show_btn.pack(side="left", padx=2)
+
+        copy_pwd_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Copy Pass",
+            command=self.copy_password,
+            width=90,
+            fg_color="#000000",
+            hover_color="#333333",
+            **button_style
+        )
+        copy_pwd_btn.pack(side="left", padx=2)
+
+        copy_user_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Copy User",
+            command=self.copy_username,
+            width=90,
+            fg_color="#000000",
+            hover_color="#333333",
+            **button_style
+        )
+        copy_user_btn.pack(side="left", padx=2)
+
+        delete_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Delete",
+            command=self.delete_password,
+            width=90,
+            fg_color="#FF0000",
+            hover_color="#CC0000",
+            **button_style
+        )
+        delete_btn.pack(side="right", padx=2)
+
+        # Description, cut to one line so every card has the same height
+        self.desc_label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=("Helvetica", 10),
+            text_color="#666666",
+            anchor="w"
+        )
+        self.desc_label.pack(fill="x", padx=15, pady=(0, 10))
+
+    def bind(self, row):
+        self.pwd_id, name, title, username, description, created_at = row
+        self.username = username
+        self.name_label.configure(text=f"Name: {name}")
+        self.date_label.configure(text=format_timestamp(created_at))
+        self.title_label.configure(text=f"Title: {title}")
+        self.username_label.configure(text=f"Username: {username}")
+        self.desc_label.configure(text=shorten_description(description))
+        self.password_var.set(PASSWORD_MASK)
+        self.show_status("")
+
+    def show_status(self, text):
+        if self.status_job:
+            self.frame.after_cancel(self.status_job)
+            self.status_job = None
+        self.status_label.configure(text=text)
+        if text:
+            self.status_job = self.frame.after(2000, lambda: self.show_status(""))  # Remove after 2 seconds
+
+    def toggle_password(self):
+        if self.password_var.get() == PASSWORD_MASK:
+            password = self.app.reveal_password(self.pwd_id)
+            if password is not None:
+                self.password_var.set(password)
+        else:
+            self.password_var.set(PASSWORD_MASK)
+
+    def copy_password(self):
+        password = self.app.reveal_password(self.pwd_id, use="copy")
+        if password is None:
+            return
+        copy_to_clipboard(password)
+        self.show_status("✓ Password copied!")
+
+    def copy_username(self):
+        copy_to_clipboard(self.username)
+        self.show_status("✓ Username copied!")
+
+    def delete_password(self):
+        if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this password?"):
+            self.on_delete(self.pwd_id)
+
+class ManagePasswordCard:
+    """Card in the Manage Passwords dialog; re-bound to another row as the list scrolls"""
+    HEIGHT = 190
+
+    def __init__(self, app, parent, on_delete):
+        self.app = app
+        self.on_delete = on_delete
+        self.pwd_id = None
+        self.username = ""
+
+        # Password card
+        self.frame = ctk.CTkFrame(parent, **Theme.get_frame_style("card"))
+
+        # Name and title
+        header_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        header_frame.pack(fill="x", padx=10, pady=5)
+
+        self.name_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=Theme.FONTS["main"],
+            text_color="#000000"
+        )
+        self.name_label.pack(side="left")
+
+        self.title_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=Theme.FONTS["main"],
+            text_color="#000000"
+        )
+        self.title_label.pack(side="right")
+
+        # Username and password
+        details_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        details_frame.pack(fill="x", padx=10, pady=5)
+
+        self.username_label = ctk.CTkLabel(
+            details_frame,
+            text="",
+            font=Theme.FONTS["main"],
+            text_color="#000000"
+        )
+        self.username_label.pack(side="left")
+
+        self.password_var = tk.StringVar(value=PASSWORD_MASK)
+        password_label = ctk.CTkLabel(
+            details_frame,
+            textvariable=self.password_var,
+            font=Theme.FONTS["main"],
+            text_color="#000000"
+        )
+        password_label.pack(side="right")
+
+        # Description, cut to one line so every card has the same height
+        self.desc_label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=("Helvetica", 10),
+            text_color="#000000"
+        )
+        self.desc_label.pack(padx=10, pady=5)
+
+        # Buttons frame
+        buttons_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        buttons_frame.pack(fill="x", padx=10, pady=5)
+
+        show_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Show/Hide",
+            command=self.toggle_password,
+            width=100,
+            **Theme.get_button_style("secondary")
+        )
+        show_btn.pack(side="left", padx=2)
+
+        copy_pwd_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Copy Pass",
+            command=self.copy_password,
+            width=100,
+            **Theme.get_button_style("secondary")
+        )
+        copy_pwd_btn.pack(side="left", padx=2)
+
+        copy_user_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Copy User",
+            command=self.copy_username,
+            width=100,
+            **Theme.get_button_style("secondary")
+        )
+        copy_user_btn.pack(side="left", padx=2)
+
+        delete_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Delete",
+            command=self.delete_password,
+            width=100,
+            **Theme.get_button_style("danger")
+        )
+        delete_btn.pack(side="right", padx=2)
+
+    def bind(self, row):
+        self.pwd_id, name, title, username, description, created_at = row
+        self.username = username
+        self.name_label.configure(text=f"Name: {name}")
+        self.title_label.configure(text=f"Title: {title}")
+        self.username_label.configure(text=f"Username: {username}")
+        self.desc_label.configure(text=shorten_description(description))
+        self.password_var.set(PASSWORD_MASK)
+
+    def toggle_password(self):
+        if self.password_var.get() == PASSWORD_MASK:
+            password = self.app.reveal_password(self.pwd_id)
+            if password is not None:
+                self.password_var.set(password)
+        else:
+            self.password_var.set(PASSWORD_MASK)
+
+    def copy_password(self):
+        password = self.app.reveal_password(self.pwd_id, use="copy")
+        if password is None:
+            return
+        copy_to_clipboard(password)
+        messagebox.showinfo("Success", "Password copied to clipboard!")
+
+    def copy_username(self):
+        copy_to_clipboard(self.username)
+        messagebox.showinfo("Success", "Username copied to clipboard!")
+
+    def delete_password(self):
+        if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this password?"):
+            self.on_delete(self.pwd_id)
+
+class LiveSearch:
+    """Search-as-you-type for a password list.
+
+    Searches run on the app's search worker. A term that extends the last one
+    is filtered from its results right away; anything else waits for a short
+    pause in typing first. When nothing matches exactly, close matches from
+    the app's fuzzy index are shown instead. Every search gets a generation number: queued ones
+    are cancelled, running ones give up as soon as a newer search starts, and
+    results that arrive late are dropped.
+    """
+
+    def __init__(self, app, entry, password_list):
+        from search import IncrementalSearch
+        self.app = app
+        self.entry = entry
+        self.password_list = password_list
+        self.searcher = IncrementalSearch(app.db_manager, fuzzy=app.fuzzy_index)
+        self.term = ""
+        self.generation = 0
+        self.pending_after = None
+        self.pending_future = None
+        entry.bind("<KeyRelease>", lambda event: self.on_key())
+        entry.bind("<Return>", lambda event: self.refresh())
+
+    def on_key(self):
+        term = self.entry.get()
+        if term != self.term:
+            self.start(term, delay=0 if self.searcher.can_refine(term) else SEARCH_DEBOUNCE_MS)
+
+    def refresh(self):
+        """Search the current term again now, e.g. after entries were changed"""
+        self.start(self.entry.get(), delay=0)
+
+    def busy(self):
+        """True while a search is waiting or running; its results will replace the list"""
+        return self.pending_after is not None or self.pending_future is not None
+
+    def matches(self, row):
+        return self.searcher.matches(row, self.term)
+
+    def start(self, term, delay):
+        self.term = term
+        self.generation += 1
+        generation = self.generation
+        if self.pending_after is not None:
+            self.entry.after_cancel(self.pending_after)
+            self.pending_after = None
+        if self.pending_future is not None:
+            self.pending_future.cancel()
+            self.pending_future = None
+
+        if not term:
+            # The unfiltered list is paged from the database as it scrolls
+            self.app.display_passwords(self.password_list)
+            return
+
+        def is_stale():
+            return generation != self.generation
+
+        def on_results(rows):
+            if is_stale() or not self.password_list.winfo_exists():
+                return
+            self.pending_future = None
+            if rows is None:
+                return
+            self.app.password_pages[self.password_list] = {"search_term": term, "next_token": None}
+            self.password_list.set_rows(rows)
+
+        def on_error(error):
+            # A newer search has taken over and will report for itself
+            if is_stale() or not self.password_list.winfo_exists():
+                return
+            # Otherwise busy() would stay true and vault changes would stop reaching the list
+            self.pending_future = None
+            messagebox.showerror("Error", f"Search failed: {error}")
+
+        def run():
+            self.pending_after = None
+            self.pending_future = self.app.search_tasks.submit(
+                self.searcher.search, term, is_stale, on_success=on_results, on_error=on_error)
+
+        if delay:
+            self.pending_after = self.entry.after(delay, run)
+        else:
+            run()
+
+def shorten_description(description):
+    if not description:
+        return ""
+    return textwrap.shorten(f"Description: {description}", width=60, placeholder="…")
+
+def format_timestamp(created_at):
+    # Stored as a UTC epoch; shown in local time
+    if not isinstance(created_at, int):
+        return created_at or ""
+    return datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+
+def copy_to_clipboard(text):
+    # pyperclip is loaded on first use (or by the warm-up after the login screen)
+    import pyperclip
+    pyperclip.copy(text)
+
+# Modules the login screen does not need; imported in the background once it is up
+DEFERRED_MODULES = ("utils", "pyperclip", "vault_export", "importers", "backup", "search", "frecency",
+                    "vault_model")
+
 class PasswordManagerGUI:
-    def __init__(self):
+    def __init__(self, profile_startup=False):
+        self.profile_startup = profile_startup
+        self.startup_marks = [("modules imported", time.perf_counter())]
+
         # Initialize database in a separate thread
         self.db_manager = None
         self.encryption_manager = None
+        # Paging state for each password list container
+        self.password_pages = {}
         
         # Create and configure the main window immediately
         self.root = ctk.CTk()
@@ -118,6 +570,18 @@ class PasswordManagerGUI:
 
         # Set theme
         self.root.configure(fg_color=Theme.COLORS["background"])
+
+        # Background worker for slow crypto and database operations
+        self.tasks = TaskRunner(self.root)
+        # Searches get their own worker so they never wait behind saves or the KDF
+        self.search_tasks = TaskRunner(self.root)
+        self.fuzzy_index = None
+        # Copy/reveal counts and the quick open palette ranked by them
+        self.usage_log = None
+        self.quick_open = None
+        # Row-level change events for the open password lists
+        self.vault_model = None
+        self.backups = None
         
         # Create main container
         self.main_frame = ctk.CTkFrame(self.root, **Theme.get_frame_style("main"))
@@ -125,6 +589,7 @@ class PasswordManagerGUI:
 
         # Show loading screen
         self.show_loading_screen()
+        self.mark_startup("window created")
         
         # Initialize database in background
         threading.Thread(target=self.initialize_database, daemon=True).start()
@@ -164,12 +629,34 @@ class PasswordManagerGUI:
             self.root.after(500, lambda: self.update_loading_animation(label))
 
     def initialize_database(self):
+        # cryptography and the KDFs load here, behind the loading screen
+        from utils import DatabaseManager
+        self.mark_startup("crypto modules loaded")
+
         # Initialize database
         self.db_manager = DatabaseManager()
+        self.mark_startup("database ready")
         
         # Switch to login screen
         self.root.after(0, self.show_login_screen)
 
+    def warm_up(self):
+        # Import what later screens need while the user types the password
+        for module in DEFERRED_MODULES:
+            importlib.import_module(module)
+
+    def mark_startup(self, label):
+        if self.profile_startup:
+            self.startup_marks.append((label, time.perf_counter()))
+
+    def report_startup(self):
+        self.root.update_idletasks()
+        self.mark_startup("login screen interactive")
+        print("Startup profile (ms since the interpreter reached this module):")
+        for label, timestamp in self.startup_marks:
+            print(f"  {label:<26} {(timestamp - PROCESS_START) * 1000:8.1f}")
+        self.root.quit()
+
     def show_login_screen(self):
         # Clear main frame
         for widget in self.main_frame.winfo_children():
@@ -243,11 +730,37 @@ class PasswordManagerGUI:
             login_frame,
             text="Login",
             width=200,
-            command=lambda: self.handle_login(username_entry.get(), password_entry.get()),
+            command=lambda: self.handle_login(username_entry.get(), password_entry.get(),
+                                              login_button, unlock_progress),
             **Theme.get_button_style("primary")
         )
         login_button.pack(pady=20)
 
+        # Shown while the vault is being unlocked in the background
+        unlock_progress = ctk.CTkProgressBar(
+            login_frame,
+            width=200,
+            mode="indeterminate",
+            progress_color="#000000"
+        )
+
+        # Only shown once a running unlock agent is found for this vault
+        agent_button = ctk.CTkButton(
+            login_frame,
+            width=200,
+            **Theme.get_button_style("secondary")
+        )
+
+        def on_agent_found(found):
+            if found is None or not agent_button.winfo_exists():
+                return
+            client, username = found
+            agent_button.configure(text=f"Unlock with agent ({username})",
+                                   command=lambda: self.handle_agent_login(client, agent_button))
+            agent_button.pack(after=login_button, pady=(0, 10))
+
+        self.tasks.submit(self.find_agent, on_success=on_agent_found, on_error=lambda error: None)
+
         # Default credentials label
         info_label = ctk.CTkLabel(
             login_frame,
@@ -359,17 +872,135 @@ class PasswordManagerGUI:
         login_button.bind("<Enter>", on_button_hover)
         login_button.bind("<Leave>", on_button_leave)
 
-    def handle_login(self, username, password):
-        if self.db_manager.verify_user(username, password):
-            self.encryption_manager = EncryptionManager(password)
-            self.show_main_screen()
-        else:
-            messagebox.showerror("Error", "Invalid credentials!")
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        if self.profile_startup:
+            self.root.after_idle(self.report_startup)
+
+    def handle_login(self, username, password, login_button, unlock_progress):
+        # The key derivation takes a while; keep the window responsive
+        login_button.configure(state="disabled", text="Unlocking...")
+        unlock_progress.pack(pady=(0, 10))
+        unlock_progress.start()
+
+        def unlock():
+            from utils import is_legacy_hash
+            password_hash = self.db_manager.get_password_hash(username)
+            # A bcrypt login is re-hashed with freshly calibrated parameters while unlocking
+            upgraded = password_hash is not None and is_legacy_hash(password_hash)
+            start = time.perf_counter()
+            encryption_manager = self.db_manager.unlock(username, password)
+            return encryption_manager, time.perf_counter() - start, upgraded
+
+        def reset_login_state():
+            if login_button.winfo_exists():
+                unlock_progress.stop()
+                unlock_progress.pack_forget()
+                login_button.configure(state="normal", text="Login")
+
+        def on_unlocked(result):
+            encryption_manager, unlock_seconds, upgraded = result
+            if encryption_manager is None:
+                reset_login_state()
+                messagebox.showerror("Error", "Invalid credentials!")
+                return
+            self.enter_vault(encryption_manager)
+
+            def on_checked(needs_tuning):
+                if needs_tuning:
+                    self.tasks.submit(self.db_manager.change_password, username, password, encryption_manager,
+                                      on_success=on_retuned, on_error=lambda error: None)
+
+            # Re-tune the KDF for this machine if unlocking was far off the target time.
+            # The check may calibrate, so it runs on the task runner too.
+            if not upgraded:
+                self.tasks.submit(self.db_manager.kdf_needs_tuning, username, unlock_seconds,
+                                  on_success=on_checked, on_error=lambda error: None)
+
+        def on_retuned(encryption_manager):
+            self.encryption_manager = encryption_manager
+
+        def on_error(error):
+            reset_login_state()
+            messagebox.showerror("Error", f"Failed to unlock the vault: {error}")
+
+        self.tasks.submit(unlock, on_success=on_unlocked, on_error=on_error)
+
+    def find_agent(self):
+        # (client, username) for an unlock agent serving this database, or None
+        import agent
+        if not agent.supported():
+            return None
+        client = agent.AgentClient()
+        try:
+            info = client.ping()
+        except (agent.AgentError, OSError, ValueError):
+            client.close()
+            return None
+        if info['db_path'] != os.path.abspath(self.db_manager.db_path):
+            client.close()
+            return None
+        return client, info['username']
+
+    def handle_agent_login(self, client, agent_button):
+        # Borrow the agent's data key instead of running the KDF
+        agent_button.configure(state="disabled", text="Unlocking...")
+
+        def attach():
+            from utils import EncryptionManager
+            return EncryptionManager.from_data_key(client.attach())
+
+        def on_error(error):
+            if agent_button.winfo_exists():
+                agent_button.pack_forget()
+            messagebox.showerror("Error", f"The unlock agent is no longer available: {error}")
+
+        self.tasks.submit(attach, on_success=self.enter_vault, on_error=on_error)
+
+    def enter_vault(self, encryption_manager):
+        self.encryption_manager = encryption_manager
+        if self.fuzzy_index is None:
+            # Typo-tolerant search; until it is built, searches only match exactly
+            from search import TrigramIndex
+            self.fuzzy_index = TrigramIndex(self.db_manager)
+            threading.Thread(target=self.fuzzy_index.build, name="fuzzy-index", daemon=True).start()
+        if self.quick_open is None:
+            from frecency import UsageLog, QuickOpenIndex
+            self.usage_log = UsageLog(self.db_manager)
+            self.quick_open = QuickOpenIndex(self.db_manager, self.usage_log)
+            threading.Thread(target=self.quick_open.build, name="quick-open-index", daemon=True).start()
+            self.root.bind("<Control-k>", lambda event: self.show_quick_open())
+        if self.vault_model is None:
+            from vault_model import VaultModel
+            self.vault_model = VaultModel(self.db_manager, self.root)
+        self.show_main_screen()
+        self.migrate_records()
+        if self.backups is None:
+            # Periodic snapshots; skipped whenever nothing has changed
+            from backup import BackupManager
+            self.backups = BackupManager(self.db_manager)
+            self.backups.start()
+
+    def migrate_records(self, handled=None):
+        # Rewrite legacy Fernet rows as AEAD records one batch per task,
+        # so saves and deletes queued in between are not held up
+        if handled == 0:
+            unreadable = len(self.db_manager.unreadable_records)
+            if unreadable:
+                messagebox.showerror("Error", f"{unreadable} saved password(s) could not be decrypted "
+                                              "and were left in their old format.")
+            return
+        if self.encryption_manager:
+            self.tasks.submit(self.db_manager.migrate_records, self.encryption_manager,
+                              on_success=self.migrate_records,
+                              on_error=lambda error: messagebox.showerror(
+                                  "Error", f"Converting saved passwords to the new format failed: {error}"))
 
     def show_main_screen(self):
         # Clear main frame
         for widget in self.main_frame.winfo_children():
             widget.destroy()
+        self.password_pages = {container: state for container, state in self.password_pages.items()
+                               if container.winfo_exists()}
 
         # Create left and right panels
         left_panel = ctk.CTkFrame(self.main_frame, **Theme.get_frame_style("card"))
@@ -518,40 +1149,12 @@ class PasswordManagerGUI:
         buttons_frame.pack(pady=10)
 
         def generate_password():
-            # Always include lowercase as base
-            chars = string.ascii_lowercase
-            
-            # Add selected categories
-            if use_uppercase.get(): chars += string.ascii_uppercase
-            if use_numbers.get(): chars += string.digits
-            if use_symbols.get(): chars += string.punctuation
-
-            # Generate password with at least one character from each selected category
-            length = int(length_slider.get())
-            password = []
-            
-            # Always add one lowercase
-            password.append(random.choice(string.ascii_lowercase))
-            
-            # Add one character from each selected category
-            if use_uppercase.get():
-                password.append(random.choice(string.ascii_uppercase))
-            if use_numbers.get():
-                password.append(random.choice(string.digits))
-            if use_symbols.get():
-                password.append(random.choice(string.punctuation))
-            
-            # Fill the rest randomly
-            remaining_length = length - len(password)
-            password.extend(random.choice(chars) for _ in range(remaining_length))
-            
-            # Shuffle the password
-            random.shuffle(password)
-            password_var.set(''.join(password))
+            password_var.set(generator.generate_password(
+                int(length_slider.get()), uppercase=bool(use_uppercase.get()), digits=bool(use_numbers.get()), symbols=bool(use_symbols.get())))
 
         def copy_password():
             if password_var.get():
-                pyperclip.copy(password_var.get())
+                copy_to_clipboard(password_var.get())
                 messagebox.showinfo("Success", "Password copied to clipboard!")
 
         generate_btn = ctk.CTkButton(
@@ -591,14 +1194,10 @@ class PasswordManagerGUI:
         )
         search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
 
-        def search():
-            search_term = search_entry.get()
-            self.display_passwords(passwords_frame, search_term)
-
         search_btn = ctk.CTkButton(
             search_frame,
             text="Search",
-            command=search,
+            command=lambda: live_search.refresh(),
             **Theme.get_button_style("secondary")
         )
         search_btn.pack(side="right")
@@ -615,6 +1214,22 @@ class PasswordManagerGUI:
         )
         add_btn.pack(side="left", fill="x", expand=True, padx=(0, 5))
 
+        import_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Import",
+            command=lambda: self.import_passwords(import_btn),
+            **Theme.get_button_style("secondary")
+        )
+        import_btn.pack(side="left", fill="x", expand=True, padx=5)
+
+        export_btn = ctk.CTkButton(
+            buttons_frame,
+            text="Export",
+            command=lambda: self.export_passwords(export_btn),
+            **Theme.get_button_style("secondary")
+        )
+        export_btn.pack(side="left", fill="x", expand=True, padx=5)
+
         manage_btn = ctk.CTkButton(
             buttons_frame,
             text="Manage Passwords",
@@ -632,231 +1247,175 @@ class PasswordManagerGUI:
         )
         change_admin_btn.pack(padx=20, pady=(0, 10), fill="x")
 
-        # Passwords list frame with scrollbar
+        # Passwords list; only the visible cards exist as widgets
         passwords_container = ctk.CTkFrame(parent, fg_color="transparent")
         passwords_container.pack(fill="both", expand=True, padx=20, pady=10)
 
-        # Create canvas and scrollbar
-        canvas = tk.Canvas(passwords_container, bg=Theme.COLORS["background"], highlightthickness=0)
-        scrollbar = ctk.CTkScrollbar(passwords_container, command=canvas.yview)
-        passwords_frame = ctk.CTkFrame(canvas, fg_color="transparent")
-
-        # Configure canvas
-        canvas.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side="right", fill="y")
-        canvas.pack(side="left", fill="both", expand=True)
-        canvas_frame = canvas.create_window((0, 0), window=passwords_frame, anchor="nw")
-
-        # Update scroll region when frame size changes
-        def configure_scroll_region(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-        passwords_frame.bind("<Configure>", configure_scroll_region)
-
-        # Update canvas width when container size changes
-        def configure_canvas_width(event):
-            canvas.itemconfig(canvas_frame, width=event.width)
-        canvas.bind("<Configure>", configure_canvas_width)
+        def delete_password(pwd_id):
+            # Every open list drops the card through the vault model
+            self.tasks.watch(self.db_manager.write_queue.delete(pwd_id),
+                             on_success=lambda result: self.vault_model.sync())
+
+        password_list = VirtualList(
+            passwords_container,
+            card_factory=lambda container: PasswordCard(self, container, delete_password),
+            row_height=PasswordCard.HEIGHT,
+            bg=Theme.COLORS["background"],
+            load_more=lambda: self.load_more_passwords(password_list)
+        )
+        live_search = LiveSearch(self, search_entry, password_list)
+        self.follow_vault(password_list, live_search)
 
         # Display passwords
-        self.display_passwords(passwords_frame)
-
-    def display_passwords(self, container, search_term=""):
-        # Clear existing passwords
-        for widget in container.winfo_children():
-            widget.destroy()
-
-        # Get passwords from database
-        passwords = (self.db_manager.search_passwords(search_term) 
-                    if search_term else self.db_manager.get_all_passwords())
-
-        if not passwords:
-            no_passwords_label = ctk.CTkLabel(
-                container,
-                text="No passwords found",
-                font=Theme.FONTS["main"],
-                text_color="#000000"
-            )
-            no_passwords_label.pack(pady=20)
+        self.display_passwords(password_list)
+
+    def reveal_password(self, pwd_id, use="reveal"):
+        # Decrypt a single entry on demand; list views only hold metadata
+        encrypted_password = self.db_manager.get_encrypted_password(pwd_id)
+        if encrypted_password is None:
+            return None
+        try:
+            password = self.encryption_manager.decrypt(encrypted_password)
+        except Exception:
+            return '[Decryption failed]'
+        if self.usage_log is not None:
+            # Counted as a copy or reveal for the quick open ranking
+            self.usage_log.record(pwd_id, use)
+        return password
+
+    def show_quick_open(self):
+        # Ctrl+K: type a few letters of a name, title or username, Enter copies
+        # the password of the selected entry and Ctrl+Enter reveals it
+        if not self.encryption_manager or self.quick_open is None:
+            return
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title("Quick Open")
+        dialog.configure(fg_color="#000000")  # Black background
+        dialog.transient(self.root)
+        dialog.grab_set()
+        height = 110 + QUICK_OPEN_ROWS * 32
+        x = self.root.winfo_x() + (self.root.winfo_width() - 500) // 2
+        y = self.root.winfo_y() + 80
+        dialog.geometry(f"500x{height}+{x}+{y}")
+
+        entry = ctk.CTkEntry(dialog, placeholder_text="Open entry...", **Theme.get_entry_style())
+        entry.pack(padx=20, pady=(20, 10), fill="x")
+        entry.focus_set()
+
+        results_frame = ctk.CTkFrame(dialog, **Theme.get_frame_style("card"))
+        results_frame.pack(padx=20, pady=(0, 10), fill="both", expand=True)
+        labels = [ctk.CTkLabel(results_frame, text="", anchor="w", text_color="#000000", corner_radius=4)
+                  for _ in range(QUICK_OPEN_ROWS)]
+        for label in labels:
+            label.pack(fill="x", padx=5, pady=1)
+
+        status_label = ctk.CTkLabel(dialog, text="", text_color="#FFFFFF")
+        status_label.pack(pady=(0, 5))
+        state = {"term": None, "ids": [], "selected": 0}
+
+        def show():
+            for index, label in enumerate(labels):
+                label.configure(fg_color=Theme.COLORS["background"] if index == state["selected"] and state["ids"]
+                                else "transparent")
+
+        def update():
+            # Ranked in memory; only the few rows shown are read from the database
+            state["term"] = entry.get()
+            ids = self.quick_open.lookup(state["term"], limit=QUICK_OPEN_ROWS)
+            rows = {row[0]: row for row in self.db_manager.get_password_entries(ids)}
+            state["ids"] = [pwd_id for pwd_id in ids if pwd_id in rows]
+            state["selected"] = 0
+            for index, label in enumerate(labels):
+                if index < len(state["ids"]):
+                    _, name, title, username, _, _ = rows[state["ids"][index]]
+                    label.configure(text=f"{name}  ·  {title}  ·  {username}")
+                else:
+                    label.configure(text="")
+            if not self.quick_open.ready:
+                status_label.configure(text="Still indexing entries...")
+            else:
+                status_label.configure(text="" if state["ids"] or not state["term"] else "No matching entries")
+            show()
+
+        def move(step):
+            if state["ids"]:
+                state["selected"] = (state["selected"] + step) % len(state["ids"])
+                show()
+            return "break"
+
+        def open_selected(use):
+            if not state["ids"]:
+                return "break"
+            pwd_id = state["ids"][state["selected"]]
+            password = self.reveal_password(pwd_id, use=use)
+            if password is None:
+                update()
+                return "break"
+            if use == "copy":
+                copy_to_clipboard(password)
+                dialog.destroy()
+            else:
+                status_label.configure(text=password)
+            return "break"
+
+        entry.bind("<KeyRelease>", lambda event: update() if entry.get() != state["term"] else None)
+        dialog.bind("<Up>", lambda event: move(-1))
+        dialog.bind("<Down>", lambda event: move(1))
+        dialog.bind("<Return>", lambda event: open_selected("copy"))
+        dialog.bind("<Control-Return>", lambda event: open_selected("reveal"))
+        dialog.bind("<Escape>", lambda event: dialog.destroy())
+        update()
+
+    def display_passwords(self, password_list, search_term=""):
+        # Show the first page right away; later pages load as the list is scrolled
+        self.password_pages[password_list] = {"search_term": search_term, "next_token": None}
+        passwords, next_token = self.db_manager.get_passwords_page(search_term, limit=PAGE_SIZE)
+        self.password_pages[password_list]["next_token"] = next_token
+        password_list.set_rows(passwords, has_more=next_token is not None)
+
+    def load_more_passwords(self, password_list):
+        state = self.password_pages.get(password_list)
+        if not state or state["next_token"] is None:
             return
 
-        for pwd in passwords:
-            pwd_id, name, title, username, encrypted_password, description, created_at = pwd
-            try:
-                password = self.encryption_manager.decrypt(encrypted_password)
-            except Exception:
-                password = '[Decryption failed]'
-
-            # Password card with rounded corners and shadow effect
-            card = ctk.CTkFrame(
-                container,
-                fg_color="white",
-                corner_radius=10,
-                border_width=1,
-                border_color="#E0E0E0"
-            )
-            card.pack(fill="x", padx=10, pady=5)
-
-            # Name and timestamp in header
-            header_frame = ctk.CTkFrame(card, fg_color="transparent")
-            header_frame.pack(fill="x", padx=15, pady=(10, 5))
-
-            name_label = ctk.CTkLabel(
-                header_frame,
-                text=f"Name: {name}",
-                font=("Helvetica", 12, "bold"),
-                text_color="#000000"
-            )
-            name_label.pack(side="left")
-
-            date_label = ctk.CTkLabel(
-                header_frame,
-                text=created_at,
-                font=("Helvetica", 10),
-                text_color="#666666"
-            )
-            date_label.pack(side="right")
-
-            # Separator line
-            separator = ctk.CTkFrame(card, height=1, fg_color="#E0E0E0")
-            separator.pack(fill="x", padx=15, pady=5)
-
-            # Title and username
-            details_frame = ctk.CTkFrame(card, fg_color="transparent")
-            details_frame.pack(fill="x", padx=15, pady=5)
-
-            title_label = ctk.CTkLabel(
-                details_frame,
-                text=f"Title: {title}",
-                font=("Helvetica", 11),
-                text_color="#000000"
-            )
-            title_label.pack(side="left")
-
-            username_label = ctk.CTkLabel(
-                details_frame,
-                text=f"Username: {username}",
-                font=("Helvetica", 11),
-                text_color="#000000"
-            )
-            username_label.pack(side="right")
-
-            # Password field with monospace font
-            password_frame = ctk.CTkFrame(card, fg_color="transparent")
-            password_frame.pack(fill="x", padx=15, pady=5)
-
-            password_var = tk.StringVar(value="•" * len(password))
-            password_label = ctk.CTkLabel(
-                password_frame,
-                textvariable=password_var,
-                font=("Courier", 12),  # Monospace font for better password display
-                text_color="#000000",
-                anchor="w"
-            )
-            password_label.pack(side="left", padx=(0, 10))
-
-            # Buttons frame
-            buttons_frame = ctk.CTkFrame(card, fg_color="transparent")
-            buttons_frame.pack(fill="x", padx=15, pady=(5, 10))
-
-            def toggle_password(pwd=password, pwd_var=password_var):
-                current = pwd_var.get()
-                pwd_var.set(pwd if current.startswith("•") else "•" * len(pwd))
-
-            def copy_password(pwd=password):
-                pyperclip.copy(pwd)
-                
-                # Show temporary success message
-                success_label = ctk.CTkLabel(
-                    card,
-                    text="✓ Password copied!",
-                    font=("Helvetica", 10),
-                    text_color="#00AA00"
-                )
-                success_label.pack(pady=5)
-                card.after(2000, success_label.destroy)  # Remove after 2 seconds
-
-            def copy_username(uname=username):
-                pyperclip.copy(uname)
-                
-                # Show temporary success message
-                success_label = ctk.CTkLabel(
-                    card,
-                    text="✓ Username copied!",
-                    font=("Helvetica", 10),
-                    text_color="#00AA00"
-                )
-                success_label.pack(pady=5)
-                card.after(2000, success_label.destroy)  # Remove after 2 seconds
-
-            def delete_password(pwd_id=pwd_id):
-                if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this password?"):
-                    self.db_manager.delete_password(pwd_id)
-                    self.display_passwords(container)
-
-            # Button styles
-            button_style = {
-                "corner_radius": 6,
-                "height": 28,
-                "font": ("Helvetica", 10)
-            }
-
-            show_btn = ctk.CTkButton(
-                buttons_frame,
-                text="Show/Hide",
-                command=toggle_password,
-                width=90,
-                fg_color="#000000",
-                hover_color="#333333",
-                **button_style
-            )
-            show_btn.pack(side="left", padx=2)
-
-            copy_pwd_btn = ctk.CTkButton(
-                buttons_frame,
-                text="Copy Pass",
-                command=copy_password,
-                width=90,
-                fg_color="#000000",
-                hover_color="#333333",
-                **button_style
-            )
-            copy_pwd_btn.pack(side="left", padx=2)
-
-            copy_user_btn = ctk.CTkButton(
-                buttons_frame,
-                text="Copy User",
-                command=copy_username,
-                width=90,
-                fg_color="#000000",
-                hover_color="#333333",
-                **button_style
-            )
-            copy_user_btn.pack(side="left", padx=2)
-
-            delete_btn = ctk.CTkButton(
-                buttons_frame,
-                text="Delete",
-                command=delete_password,
-                width=90,
-                fg_color="#FF0000",
-                hover_color="#CC0000",
-                **button_style
-            )
-            delete_btn.pack(side="right", padx=2)
-
-            # Description if exists
-            if description:
-                desc_frame = ctk.CTkFrame(card, fg_color="transparent")
-                desc_frame.pack(fill="x", padx=15, pady=(0, 10))
-                
-                desc_label = ctk.CTkLabel(
-                    desc_frame,
-                    text=f"Description: {description}",
-                    font=("Helvetica", 10),
-                    text_color="#666666",
-                    wraplength=350  # Wrap long descriptions
-                )
-                desc_label.pack(anchor="w")
+        passwords, next_token = self.db_manager.get_passwords_page(
+            state["search_term"], limit=PAGE_SIZE, after=state["next_token"])
+        state["next_token"] = next_token
+        password_list.append_rows(passwords, has_more=next_token is not None)
+
+    def follow_vault(self, password_list, live_search):
+        """Keep password_list in step with the vault model until the list is destroyed"""
+
+        def order(row):
+            # Newest first, like the database pages
+            return (-row[5], -row[0])
+
+        def on_change(rows, removed):
+            if live_search.busy():
+                return  # A search is about to replace the rows anyway
+            shown = password_list.rows
+            positions = {row[0]: index for index, row in enumerate(shown)}
+            # Changed cards are rebound in place; rows no longer matching the search leave
+            gone = [positions[pwd_id] for pwd_id in removed if pwd_id in positions]
+            for pwd_id, row in rows.items():
+                if pwd_id in positions:
+                    if not live_search.matches(row):
+                        gone.append(positions[pwd_id])
+                    elif shown[positions[pwd_id]] != row:
+                        password_list.update_row(positions[pwd_id], row)
+            for index in sorted(gone, reverse=True):
+                password_list.remove_row(index)
+            for pwd_id, row in rows.items():
+                if pwd_id in positions or not live_search.matches(row):
+                    continue
+                index = bisect.bisect_left(shown, order(row), key=order)
+                # Past the loaded pages it arrives with a later page instead
+                if index < len(shown) or not password_list.has_more:
+                    password_list.insert_row(index, row)
+
+        subscriber = self.vault_model.subscribe(on_change, live_search.refresh)
+        password_list.canvas.bind("<Destroy>", lambda event: self.vault_model.unsubscribe(subscriber)
+                                  if event.widget is password_list.canvas else None, add="+")
 
     def show_change_admin_password_dialog(self):
         dialog = ctk.CTkToplevel(self.root)
@@ -924,45 +1483,27 @@ class PasswordManagerGUI:
                 messagebox.showerror("Error", "New passwords do not match!")
                 return
 
-            if not self.db_manager.verify_user("admin", current):
-                messagebox.showerror("Error", "Current password is incorrect!")
-                return
+            def rekey():
+                if not self.db_manager.verify_user("admin", current):
+                    return None
+                # Only the data key is re-wrapped; the stored rows stay untouched
+                return self.db_manager.change_password("admin", new, self.encryption_manager)
 
-            old_encryption_manager = EncryptionManager(current)
-            new_encryption_manager = EncryptionManager(new)
+            def on_changed(new_encryption_manager):
+                if new_encryption_manager is None:
+                    save_btn.configure(state="normal", text="Change Password")
+                    messagebox.showerror("Error", "Current password is incorrect!")
+                    return
+                self.encryption_manager = new_encryption_manager
+                messagebox.showinfo("Success", "Admin password changed successfully!")
+                dialog.destroy()
 
-            try:
-                with sqlite3.connect(self.db_manager.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT id, encrypted_password FROM passwords')
-                    stored_passwords = cursor.fetchall()
-
-                    # Start transaction
-                    conn.execute('BEGIN')
-                    for pwd_id, encrypted_password in stored_passwords:
-                        try:
-                            decrypted = old_encryption_manager.decrypt(encrypted_password)
-                        except Exception:
-                            conn.rollback()
-                            messagebox.showerror("Error", f"Failed to decrypt password with ID {pwd_id}. Password change aborted.\n\nTry using your previous admin password.")
-                            return
-                        newly_encrypted = new_encryption_manager.encrypt(decrypted)
-                        cursor.execute('UPDATE passwords SET encrypted_password = ? WHERE id = ?',
-                                     (newly_encrypted, pwd_id))
-
-                    # Update admin password
-                    hashed = bcrypt.hashpw(new.encode(), bcrypt.gensalt())
-                    cursor.execute('UPDATE users SET password_hash = ? WHERE username = ?',
-                                 (hashed.decode(), "admin"))
-                    conn.commit()
-            except Exception as e:
-                messagebox.showerror("Error", f"Unexpected error: {e}\nPassword change aborted.")
-                return
+            def on_error(error):
+                save_btn.configure(state="normal", text="Change Password")
+                messagebox.showerror("Error", f"Unexpected error: {error}\nPassword change aborted.")
 
-            self.encryption_manager = new_encryption_manager
-            messagebox.showinfo("Success", "Admin password changed successfully!")
-            dialog.destroy()
-            self.show_main_screen()
+            save_btn.configure(state="disabled", text="Changing...")
+            self.tasks.submit(rekey, on_success=on_changed, on_error=on_error)
 
         # Save button
         save_btn = ctk.CTkButton(
@@ -973,6 +1514,157 @@ class PasswordManagerGUI:
         )
         save_btn.pack(padx=20, pady=20)
 
+    def import_passwords(self, import_btn):
+        path = filedialog.askopenfilename(
+            title="Import Passwords",
+            filetypes=[
+                ("Supported files", "*.spmx *.json *.xml *.csv"),
+                ("Vault export", "*.spmx"),
+                ("Bitwarden JSON", "*.json"),
+                ("KeePass XML", "*.xml"),
+                ("Browser CSV", "*.csv"),
+            ]
+        )
+        if not path:
+            return
+
+        def progress(processed, fraction):
+            if import_btn.winfo_exists():
+                import_btn.configure(text=f"Importing... {fraction:.0%}")
+
+        def on_imported(result):
+            if import_btn.winfo_exists():
+                import_btn.configure(state="normal", text="Import")
+            messagebox.showinfo(
+                "Import Complete",
+                f"Imported {result.imported} passwords.\n"
+                f"Skipped {result.duplicates} duplicates and {result.skipped} non-login entries."
+            )
+            self.vault_model.sync()
+
+        def on_error(error):
+            if import_btn.winfo_exists():
+                import_btn.configure(state="normal", text="Import")
+            messagebox.showerror("Error", f"Import failed: {error}")
+            # Batches committed before the failure stay imported
+            self.vault_model.sync()
+
+        def start(func, *args):
+            import_btn.configure(state="disabled", text="Importing...")
+            self.tasks.submit(func, self.db_manager, self.encryption_manager, *args,
+                              progress=lambda processed, fraction: self.tasks.report(progress, processed, fraction),
+                              on_success=on_imported, on_error=on_error)
+
+        if not path.lower().endswith(".spmx"):
+            import importers
+            start(importers.import_file, path)
+            return
+
+        def import_encrypted(db_manager, encryption_manager, path, passphrase, progress):
+            import vault_export
+            # Authenticate the whole file first so a damaged export imports nothing
+            vault_export.verify_export(path, passphrase)
+            return vault_export.import_export(db_manager, encryption_manager, path, passphrase, progress)
+
+        self.ask_passphrase("Import Vault Export",
+                            lambda passphrase: start(import_encrypted, path, passphrase))
+
+    def export_passwords(self, export_btn):
+        path = filedialog.asksaveasfilename(
+            title="Export Passwords",
+            defaultextension=".spmx",
+            initialfile="passwords.spmx",
+            filetypes=[("Vault export", "*.spmx")]
+        )
+        if not path:
+            return
+
+        def progress(exported):
+            if export_btn.winfo_exists():
+                export_btn.configure(text=f"Exporting... {exported}")
+
+        def on_exported(count):
+            if export_btn.winfo_exists():
+                export_btn.configure(state="normal", text="Export")
+            messagebox.showinfo("Export Complete", f"Exported {count} passwords to\n{path}")
+
+        def on_error(error):
+            if export_btn.winfo_exists():
+                export_btn.configure(state="normal", text="Export")
+            messagebox.showerror("Error", f"Export failed: {error}")
+
+        def start(passphrase):
+            import vault_export
+            export_btn.configure(state="disabled", text="Exporting...")
+            self.tasks.submit(vault_export.export_vault, self.db_manager, self.encryption_manager, path, passphrase,
+                              progress=lambda exported: self.tasks.report(progress, exported),
+                              on_success=on_exported, on_error=on_error)
+
+        self.ask_passphrase("Export Passphrase", start, confirm=True)
+
+    def ask_passphrase(self, title, on_submit, confirm=False):
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(title)
+        height = 260 if confirm else 210
+        dialog.configure(fg_color="#000000")  # Black background
+
+        # Center dialog
+        dialog.transient(self.root)
+        dialog.grab_set()
+        x = self.root.winfo_x() + (self.root.winfo_width() - 400) // 2
+        y = self.root.winfo_y() + (self.root.winfo_height() - height) // 2
+        dialog.geometry(f"400x{height}+{x}+{y}")
+
+        title_label = ctk.CTkLabel(
+            dialog,
+            text=title,
+            font=Theme.FONTS["title"],
+            text_color="#FFFFFF"  # White text
+        )
+        title_label.pack(pady=20)
+
+        form_frame = ctk.CTkFrame(dialog, **Theme.get_frame_style("card"))
+        form_frame.pack(padx=20, pady=10, fill="both", expand=True)
+
+        passphrase_entry = ctk.CTkEntry(
+            form_frame,
+            placeholder_text="Passphrase",
+            show="•",
+            **Theme.get_entry_style()
+        )
+        passphrase_entry.pack(padx=20, pady=10, fill="x")
+        passphrase_entry.focus_set()
+
+        confirm_entry = None
+        if confirm:
+            confirm_entry = ctk.CTkEntry(
+                form_frame,
+                placeholder_text="Confirm Passphrase",
+                show="•",
+                **Theme.get_entry_style()
+            )
+            confirm_entry.pack(padx=20, pady=10, fill="x")
+
+        def submit(event=None):
+            passphrase = passphrase_entry.get()
+            if not passphrase:
+                messagebox.showerror("Error", "Please enter a passphrase!", parent=dialog)
+                return
+            if confirm_entry is not None and passphrase != confirm_entry.get():
+                messagebox.showerror("Error", "Passphrases do not match!", parent=dialog)
+                return
+            dialog.destroy()
+            on_submit(passphrase)
+
+        dialog.bind("<Return>", submit)
+        ok_btn = ctk.CTkButton(
+            form_frame,
+            text="Continue",
+            command=submit,
+            **Theme.get_button_style("primary")
+        )
+        ok_btn.pack(padx=20, pady=10)
+
     def show_add_password_dialog(self):
         dialog = ctk.CTkToplevel(self.root)
         dialog.title("Add New Password")
@@ -1051,11 +1743,19 @@ class PasswordManagerGUI:
                 messagebox.showerror("Error", "Please fill in all required fields!")
                 return
 
+            def on_saved(result):
+                dialog.destroy()
+                # The new card is inserted into the open lists
+                self.vault_model.sync()
+
+            def on_error(error):
+                save_btn.configure(state="normal", text="Save Password")
+                messagebox.showerror("Error", f"Failed to save password: {error}")
+
+            save_btn.configure(state="disabled", text="Saving...")
             encrypted_password = self.encryption_manager.encrypt(password)
-            self.db_manager.add_password(name, title, username, encrypted_password, description)
-            dialog.destroy()
-            # Refresh password list
-            self.show_main_screen()
+            self.tasks.watch(self.db_manager.write_queue.add(name, title, username, encrypted_password, description),
+                             on_success=on_saved, on_error=on_error)
 
         # Save button
         save_btn = ctk.CTkButton(
@@ -1103,181 +1803,53 @@ class PasswordManagerGUI:
         main_container = ctk.CTkFrame(dialog, **Theme.get_frame_style("card"))
         main_container.pack(padx=20, pady=10, fill="both", expand=True)
 
-        # Create canvas and scrollbar for scrolling
-        canvas = tk.Canvas(main_container, bg="#FFFFFF", highlightthickness=0)
-        scrollbar = ctk.CTkScrollbar(main_container, command=canvas.yview)
-        scrollable_frame = ctk.CTkFrame(canvas, fg_color="transparent")
-
-        canvas.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side="right", fill="y")
-        canvas.pack(side="left", fill="both", expand=True)
-        canvas_frame = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw", width=canvas.winfo_width())
-
-        def display_passwords(search_term=""):
-            # Clear existing passwords
-            for widget in scrollable_frame.winfo_children():
-                widget.destroy()
-
-            # Get passwords from database
-            passwords = (self.db_manager.search_passwords(search_term) 
-                        if search_term else self.db_manager.get_all_passwords())
-
-            if not passwords:
-                no_passwords_label = ctk.CTkLabel(
-                    scrollable_frame,
-                    text="No passwords found",
-                    font=Theme.FONTS["main"],
-                    text_color="#000000"
-                )
-                no_passwords_label.pack(pady=20)
-                return
-
-            for pwd in passwords:
-                pwd_id, name, title, username, encrypted_password, description, created_at = pwd
-                try:
-                    password = self.encryption_manager.decrypt(encrypted_password)
-                except Exception:
-                    password = '[Decryption failed]'
-
-                # Password card
-                card = ctk.CTkFrame(scrollable_frame, **Theme.get_frame_style("card"))
-                card.pack(fill="x", padx=10, pady=5)
-
-                # Name and title
-                header_frame = ctk.CTkFrame(card, fg_color="transparent")
-                header_frame.pack(fill="x", padx=10, pady=5)
-
-                name_label = ctk.CTkLabel(
-                    header_frame,
-                    text=f"Name: {name}",
-                    font=Theme.FONTS["main"],
-                    text_color="#000000"
-                )
-                name_label.pack(side="left")
-
-                title_label = ctk.CTkLabel(
-                    header_frame,
-                    text=f"Title: {title}",
-                    font=Theme.FONTS["main"],
-                    text_color="#000000"
-                )
-                title_label.pack(side="right")
-
-                # Username and password
-                details_frame = ctk.CTkFrame(card, fg_color="transparent")
-                details_frame.pack(fill="x", padx=10, pady=5)
-
-                username_label = ctk.CTkLabel(
-                    details_frame,
-                    text=f"Username: {username}",
-                    font=Theme.FONTS["main"],
-                    text_color="#000000"
-                )
-                username_label.pack(side="left")
-
-                password_var = tk.StringVar(value="•" * len(password))
-                password_label = ctk.CTkLabel(
-                    details_frame,
-                    textvariable=password_var,
-                    font=Theme.FONTS["main"],
-                    text_color="#000000"
-                )
-                password_label.pack(side="right")
-
-                # Description if exists
-                if description:
-                    desc_label = ctk.CTkLabel(
-                        card,
-                        text=f"Description: {description}",
-                        font=("Helvetica", 10),
-                        text_color="#000000"
-                    )
-                    desc_label.pack(padx=10, pady=5)
-
-                # Buttons frame
-                buttons_frame = ctk.CTkFrame(card, fg_color="transparent")
-                buttons_frame.pack(fill="x", padx=10, pady=5)
-
-                def toggle_password(pwd=password, pwd_var=password_var):
-                    current = pwd_var.get()
-                    pwd_var.set(pwd if current.startswith("•") else "•" * len(pwd))
-
-                def copy_password(pwd=password):
-                    pyperclip.copy(pwd)
-                    messagebox.showinfo("Success", "Password copied to clipboard!")
-
-                def copy_username(uname=username):
-                    pyperclip.copy(uname)
-                    messagebox.showinfo("Success", "Username copied to clipboard!")
-
-                def delete_password(pwd_id=pwd_id):
-                    if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this password?"):
-                        self.db_manager.delete_password(pwd_id)
-                        display_passwords(search_entry.get())
-                        self.show_main_screen()  # Refresh main screen
-
-                show_btn = ctk.CTkButton(
-                    buttons_frame,
-                    text="Show/Hide",
-                    command=toggle_password,
-                    width=100,
-                    **Theme.get_button_style("secondary")
-                )
-                show_btn.pack(side="left", padx=2)
-
-                copy_pwd_btn = ctk.CTkButton(
-                    buttons_frame,
-                    text="Copy Pass",
-                    command=copy_password,
-                    width=100,
-                    **Theme.get_button_style("secondary")
-                )
-                copy_pwd_btn.pack(side="left", padx=2)
-
-                copy_user_btn = ctk.CTkButton(
-                    buttons_frame,
-                    text="Copy User",
-                    command=copy_username,
-                    width=100,
-                    **Theme.get_button_style("secondary")
-                )
-                copy_user_btn.pack(side="left", padx=2)
-
-                delete_btn = ctk.CTkButton(
-                    buttons_frame,
-                    text="Delete",
-                    command=delete_password,
-                    width=100,
-                    **Theme.get_button_style("danger")
-                )
-                delete_btn.pack(side="right", padx=2)
-
-        def on_search():
-            display_passwords(search_entry.get())
+        def delete_password(pwd_id):
+            # Every open list drops the card through the vault model
+            self.tasks.watch(self.db_manager.write_queue.delete(pwd_id),
+                             on_success=lambda result: self.vault_model.sync())
+
+        password_list = VirtualList(
+            main_container,
+            card_factory=lambda container: ManagePasswordCard(self, container, delete_password),
+            row_height=ManagePasswordCard.HEIGHT,
+            bg="#FFFFFF",
+            load_more=lambda: self.load_more_passwords(password_list)
+        )
+        live_search = LiveSearch(self, search_entry, password_list)
+        self.follow_vault(password_list, live_search)
 
         search_btn = ctk.CTkButton(
             search_frame,
             text="Search",
-            command=on_search,
+            command=live_search.refresh,
             **Theme.get_button_style("secondary")
         )
         search_btn.pack(side="right")
 
-        # Configure scrolling
-        def configure_scroll_region(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-        scrollable_frame.bind("<Configure>", configure_scroll_region)
-
-        def configure_canvas_width(event):
-            canvas.itemconfig(canvas_frame, width=event.width)
-        canvas.bind("<Configure>", configure_canvas_width)
-
         # Initial display
-        display_passwords()
+        self.display_passwords(password_list)
 
     def run(self):
         self.root.mainloop()
+        self.tasks.shutdown()
+        self.search_tasks.shutdown()
+        if self.usage_log:
+            try:
+                self.usage_log.close()
+            except Exception:
+                pass  # Usage counts are only a ranking hint
+        if self.db_manager is None:
+            return  # Closed during the loading screen
+        # Commit any writes still waiting for their group commit
+        self.db_manager.close_write_queue()
+        if self.backups:
+            self.backups.stop()
+            try:
+                self.backups.snapshot()
+            except Exception:
+                pass  # Never block exit on a failed backup
+            self.backups.close()
 
 if __name__ == "__main__":
-    app = PasswordManagerGUI()
+    app = PasswordManagerGUI(profile_startup="--profile-startup" in sys.argv)
     app.run() 
@@ -5,7 +5,7 @@ a = Analysis(
     ['password_manager_gui.py'],
     pathex=[],
     binaries=[],
-    datas=[('theme.py', '.'), ('utils.py', '.')],
+    datas=[('theme.py', '.'), ('utils.py', '.'), ('kdf.py', '.'), ('tasks.py', '.'), ('widgets.py', '.'), ('importers.py', '.'), ('vault_export.py', '.'), ('backup.py', '.'), ('migrations.py', '.'), ('generator.py', '.'), ('app_paths.py', '.'), ('agent.py', '.'), ('search.py', '.'), ('frecency.py', '.'), ('vault_model.py', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
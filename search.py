@@ -0,0 +1,343 @@
+"""In-memory helpers for searching entry metadata as the user types.
+
+IncrementalSearch answers a search term with every matching row (newest
+first, the layout of DatabaseManager.get_all_passwords). When a term extends
+the previous one ("git" -> "gith", "git" -> "git al") its matches can only
+be a subset of the previous matches, so they are filtered in memory instead
+of querying SQLite again. Matching follows the database search: with FTS5
+every word of the term must start a word of the entry (case and diacritics
+ignored, like the unicode61 tokenizer); otherwise the term is a substring
+match, like the LIKE fallback. An IncrementalSearch keeps state between
+calls and must only be used from one thread.
+
+TrigramIndex is the typo-tolerant fallback for terms without exact matches.
+"""
+import heapq
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+
+# Rows between checks of is_stale while SQLite runs a query
+CANCEL_CHECK_STEPS = 1000
+
+def fold(text: str) -> str:
+    """Lower-case text and strip diacritics, as the FTS5 unicode61 tokenizer does"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+# Lower-cases ASCII letters and turns every other non-alphanumeric byte into a
+# space; bytes.translate is far cheaper than a regex or str.translate per row
+_ASCII_WORDS = bytes(ord(chr(code).lower()) if chr(code).isalnum() and code < 128 else ord(' ')
+                     for code in range(256))
+
+def words(text: str):
+    # unicode61 treats everything but letters and digits as a separator
+    if text.isascii():
+        return text.encode().translate(_ASCII_WORDS).decode().split()
+    return re.findall(r'[^\W_]+', fold(text))
+
+def trigrams(word: str) -> set:
+    """Trigrams of a word padded like "  git ", so that its start weighs more"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance where swapping two adjacent letters also counts as one edit"""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+def word_similarity(typed: str, word: str, shared: int = None) -> float:
+    """How close a typed word is to an indexed word, from 0 to 1.
+
+    The better of trigram overlap and edit distance, where a longer word may
+    also match through its prefix (it is probably still being typed).
+    """
+    if shared is None:
+        shared = len(trigrams(typed) & trigrams(word))
+    similarity = shared / (len(typed) + len(word) + 2 - shared)
+    if abs(len(word) - len(typed)) <= 2:
+        similarity = max(similarity, 1 - edit_distance(typed, word) / max(len(typed), len(word)))
+    if len(word) > len(typed):
+        similarity = max(similarity, 0.9 * (1 - edit_distance(typed, word[:len(typed)]) / len(typed)))
+    return similarity
+
+class IncrementalSearch:
+    def __init__(self, db_manager, fuzzy=None):
+        self.db_manager = db_manager
+        # TrigramIndex asked for close matches when nothing matches exactly
+        self.fuzzy = fuzzy
+        # (term, fts, commits, rows, haystacks) of the last completed search
+        self.last = None
+
+    def _uses_fts(self, term: str) -> bool:
+        return bool(self.db_manager.fts_enabled and self.db_manager._fts_query(term))
+
+    def can_refine(self, term: str) -> bool:
+        """True if term would be answered from the previous results without a query"""
+        last = self.last
+        return (last is not None and term.startswith(last[0]) and self._uses_fts(term) == last[1]
+                and last[2] == self.db_manager.pool.commits)
+
+    def reset(self):
+        self.last = None
+
+    def matches(self, row, term: str) -> bool:
+        """True if row (layout of get_all_passwords) is an exact match for term"""
+        if not term:
+            return True
+        fts = self._uses_fts(term)
+        rows, _ = self._filter([row], [self._haystack(row, fts)], term, fts, None)
+        return bool(rows)
+
+    def search(self, term: str, is_stale=None):
+        """Rows matching term, or None if is_stale() turned true before the search finished"""
+        fts = self._uses_fts(term)
+        if self.can_refine(term):
+            _, _, commits, rows, haystacks = self.last
+            rows, haystacks = self._filter(rows, haystacks, term, fts, is_stale)
+            if rows is None:
+                return None
+        else:
+            # Read the commit count first: a write committed during the query
+            # then leaves the results marked stale rather than current
+            commits = self.db_manager.pool.commits
+            rows = self._query(term, is_stale)
+            if rows is None:
+                return None
+            # Built once per query, so refining only pays for substring checks
+            haystacks = [self._haystack(row, fts) for row in rows]
+        self.last = (term, fts, commits, rows, haystacks)
+        if not rows and self.fuzzy is not None:
+            return self.fuzzy.search(term)
+        return rows
+
+    def _query(self, term: str, is_stale):
+        if is_stale is None:
+            return self.db_manager.get_matching_passwords(term)
+        # The nested checkout inside get_matching_passwords reuses this connection
+        with self.db_manager.pool.reader() as conn:
+            conn.set_progress_handler(lambda: 1 if is_stale() else 0, CANCEL_CHECK_STEPS)
+            try:
+                return self.db_manager.get_matching_passwords(term)
+            except sqlite3.OperationalError as e:
+                if 'interrupted' in str(e):
+                    return None
+                raise
+            finally:
+                conn.set_progress_handler(None, 0)
+
+    @staticmethod
+    def _haystack(row, fts: bool) -> str:
+        fields = (row[1], row[2], row[3], row[4] or '')
+        if fts:
+            # " word word ...": " " + prefix is found exactly when some word starts with prefix
+            return ' ' + ' '.join(words('\n'.join(fields)))
+        # LIKE is case-insensitive; NUL keeps a match from spanning two fields
+        return '\0'.join(fields).lower()
+
+    @staticmethod
+    def _filter(rows, haystacks, term: str, fts: bool, is_stale):
+        needles = [' ' + word for word in words(term)] if fts else [term.lower()]
+        kept = []
+        step = CANCEL_CHECK_STEPS * 10
+        for start in range(0, len(rows), step):
+            if is_stale is not None and is_stale():
+                return None, None
+            chunk = zip(rows[start:start + step], haystacks[start:start + step])
+            for needle in needles:
+                chunk = [pair for pair in chunk if needle in pair[1]]
+            kept.extend(chunk)
+        return [row for row, _ in kept], [haystack for _, haystack in kept]
+
+class TrigramIndex:
+    """Typo-tolerant search over entry metadata, held in memory.
+
+    Entries are indexed by the distinct words of their name, title, username
+    and description: every word has an array of the slots of the entries
+    containing it, and a trigram index over the (much smaller) vocabulary
+    finds the words close to a typed one, so "gihtub" still finds "github".
+    Every typed word must match some word of an entry; entries are ranked by
+    the average similarity plus a small bonus for recently created ones.
+
+    build() fills the index from the database, normally on a background
+    thread after unlock; until it finishes, search() returns nothing.
+    Changes are noted through DatabaseManager.add_change_listener and read
+    back before the next search. A changed entry gets a new slot and its
+    old one is left dead; once dead slots outnumber live ones the index is
+    rebuilt on a background thread, and searches use the old one meanwhile.
+    """
+    # Words less similar than this to a typed word do not match it
+    MIN_SIMILARITY = 0.6
+    # Typed words shorter than this are too ambiguous to correct and are ignored
+    MIN_WORD_LENGTH = 3
+    RECENCY_WEIGHT = 0.1
+    RECENCY_HALF_LIFE = 90 * 86400  # seconds
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        # Guards the index; pending has its own lock so committing writers never wait on a search
+        self.lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = set()
+        self.ready = False
+        # Ids applied to the index while build() runs, None otherwise; the new
+        # index may have read them before they changed
+        self.replay = None
+        self._clear()
+        db_manager.add_change_listener(self._changed)
+
+    def _clear(self):
+        # Slot -> entry id (0 once dead) and created_at; entry id -> live slot
+        self.slot_ids = array('q')
+        self.slot_created = array('q')
+        self.slots = {}
+        # Word -> word number; word number -> word and the slots containing it
+        self.vocabulary = {}
+        self.word_list = []
+        self.word_slots = []
+        # Trigram -> numbers of the words containing it
+        self.trigram_words = {}
+        self.dead = 0
+
+    def close(self):
+        self.db_manager.remove_change_listener(self._changed)
+
+    def build(self):
+        # Built aside and swapped in, so searches never wait for it
+        with self.lock:
+            if self.replay is None:
+                self.replay = set()
+        try:
+            # A bare instance holding only the fields _clear() sets; it listens to nothing
+            fresh = TrigramIndex.__new__(TrigramIndex)
+            fresh._clear()
+            for row in self.db_manager.iter_passwords(chunk_size=2000, include_secrets=False):
+                fresh._add(row)
+            with self.lock:
+                vars(self).update(vars(fresh))
+                self.ready = True
+        finally:
+            with self.lock:
+                replay, self.replay = self.replay, None
+            if replay:
+                self._changed(replay)
+
+    def _changed(self, ids):
+        with self.pending_lock:
+            self.pending.update(ids)
+
+    def _word_number(self, word: str) -> int:
+        number = self.vocabulary.get(word)
+        if number is None:
+            number = self.vocabulary[word] = len(self.word_list)
+            self.word_list.append(word)
+            self.word_slots.append(array('I'))
+            for gram in trigrams(word):
+                bucket = self.trigram_words.get(gram)
+                if bucket is None:
+                    bucket = self.trigram_words[gram] = array('I')
+                bucket.append(number)
+        return number
+
+    def _add(self, row):
+        password_id, name, title, username, description, created_at = row
+        slot = len(self.slot_ids)
+        self.slot_ids.append(password_id)
+        self.slot_created.append(created_at if isinstance(created_at, int) else 0)
+        self.slots[password_id] = slot
+        for word in set(words(f"{name}\n{title}\n{username}\n{description or ''}")):
+            self.word_slots[self._word_number(word)].append(slot)
+
+    def _remove(self, password_id: int):
+        slot = self.slots.pop(password_id, None)
+        if slot is not None:
+            self.slot_ids[slot] = 0
+            self.dead += 1
+
+    def _apply_pending(self):
+        with self.pending_lock:
+            ids, self.pending = self.pending, set()
+        if not ids:
+            return
+        if self.replay is not None:
+            self.replay.update(ids)
+        rows = self.db_manager.get_password_entries(ids)
+        for password_id in ids:
+            self._remove(password_id)
+        for row in rows:
+            self._add(row)
+        if self.dead > len(self.slots) and self.replay is None:
+            self.replay = set()
+            threading.Thread(target=self.build, daemon=True).start()
+
+    def similar_words(self, typed: str):
+        """(word number, similarity) for every indexed word that matches a typed word"""
+        grams = trigrams(typed)
+        counts = Counter()
+        for gram in grams:
+            bucket = self.trigram_words.get(gram)
+            if bucket is not None:
+                counts.update(bucket)
+        matches = []
+        for number, shared in counts.items():
+            # One shared trigram is usually just the padded first letter
+            if shared < 2:
+                continue
+            similarity = word_similarity(typed, self.word_list[number], shared)
+            if similarity >= self.MIN_SIMILARITY:
+                matches.append((number, similarity))
+        return matches
+
+    def search(self, term: str, limit: int = 50):
+        """Rows most similar to term, best first (layout of get_all_passwords)"""
+        typed_words = {word for word in words(term) if len(word) >= self.MIN_WORD_LENGTH}
+        if not self.ready or not typed_words:
+            return []
+        with self.lock:
+            self._apply_pending()
+            # Summed similarity per slot; an entry must match every typed word
+            totals = None
+            for typed in typed_words:
+                best = {}
+                # Ascending, so an entry containing several matching words keeps the closest one
+                for number, similarity in sorted(self.similar_words(typed), key=lambda match: match[1]):
+                    best.update(dict.fromkeys(self.word_slots[number], similarity))
+                if totals is None:
+                    totals = best
+                else:
+                    totals = {slot: total + best[slot] for slot, total in totals.items() if slot in best}
+
+            now = time.time()
+            slot_ids, slot_created = self.slot_ids, self.slot_created
+            weight, half_life, count = self.RECENCY_WEIGHT, self.RECENCY_HALF_LIFE, len(typed_words)
+
+            def score(slot):
+                age = max(now - slot_created[slot], 0)
+                return totals[slot] / count + weight * 0.5 ** (age / half_life)
+
+            best_ids = [slot_ids[slot] for slot in heapq.nlargest(limit, filter(slot_ids.__getitem__, totals),
+                                                                  key=score)]
+        rows = {row[0]: row for row in self.db_manager.get_password_entries(best_ids)}
+        return [rows[password_id] for password_id in best_ids if password_id in rows]
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self.slots),
+            'dead_slots': self.dead,
+            'words': len(self.word_list),
+            'postings': sum(len(slots) for slots in self.word_slots),
+        }
@@ -0,0 +1,70 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+class TaskRunner:
+    """Runs slow work (KDF, bcrypt, SQLite writes) off the Tk main loop.
+
+    Workers never touch Tk: finished futures are queued and drained on the
+    main thread with root.after, so on_success/on_error always run on the
+    Tk thread. A single worker keeps database writes in submission order.
+    """
+    POLL_INTERVAL = 15  # milliseconds
+
+    def __init__(self, root, max_workers: int = 1):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-task")
+        self.results = queue.Queue()
+        self.reports = queue.Queue()
+        self.pending = 0
+        self.polling = False
+
+    def submit(self, func, *args, on_success=None, on_error=None, **kwargs):
+        return self.watch(self.executor.submit(func, *args, **kwargs), on_success, on_error)
+
+    def watch(self, future, on_success=None, on_error=None):
+        """Deliver the outcome of a future created elsewhere (e.g. the write queue) on the Tk thread"""
+        future.add_done_callback(lambda done: self.results.put((done, on_success, on_error)))
+        self.pending += 1
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.POLL_INTERVAL, self._poll)
+        return future
+
+    def report(self, func, *args):
+        """Run func(*args) on the Tk thread; for progress updates from a running task"""
+        self.reports.put((func, args))
+
+    def _poll(self):
+        # Progress reports first, so they never arrive after the task's result
+        while True:
+            try:
+                func, args = self.reports.get_nowait()
+            except queue.Empty:
+                break
+            func(*args)
+
+        while True:
+            try:
+                future, on_success, on_error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is None:
+                if on_success:
+                    on_success(future.result())
+            elif on_error:
+                on_error(error)
+            else:
+                messagebox.showerror("Error", f"Unexpected error: {error}")
+
+        if self.pending:
+            self.root.after(self.POLL_INTERVAL, self._poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,83 @@
+"""Bulk adds through AsyncVault: streaming, backpressure and rollback.
+
+Run with: python -m unittest discover tests
+"""
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_vault import AsyncVault
+from utils import DatabaseManager, EncryptionManager
+
+MAX_PENDING = 8
+
+
+class AsyncAddManyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        self.vault = AsyncVault(self.db_manager, max_pending=MAX_PENDING)
+        self.vault.encryption_manager = EncryptionManager(base64.urlsafe_b64encode(os.urandom(32)))
+        # Rows handed to the database so far
+        self.written = 0
+        add_many = self.db_manager.add_many
+
+        def counting_add_many(rows):
+            rows = list(rows)
+            self.written += len(rows)
+            return add_many(rows)
+
+        self.db_manager.add_many = counting_add_many
+
+    def tearDown(self):
+        self.vault.close()
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def count_entries(self):
+        with self.db_manager.pool.reader() as conn:
+            return conn.execute('SELECT COUNT(*) FROM passwords').fetchone()[0]
+
+    def test_source_is_written_as_it_is_read(self):
+        total = 2000
+        leads = []
+
+        async def source():
+            for i in range(total):
+                # Entries read but not yet handed to the database
+                leads.append(i - self.written)
+                yield (f"site {i}", "Title", f"user{i}", f"secret {i}", "")
+                await asyncio.sleep(0)
+
+        added = asyncio.run(self.vault.add_many(source()))
+        self.assertEqual(added, total)
+        self.assertEqual(self.count_entries(), total)
+        # The current batch, one waiting in the queue and one being written
+        self.assertLessEqual(max(leads), 3 * MAX_PENDING)
+        self.assertEqual(self.vault.encryption_manager.decrypt(self.db_manager.get_encrypted_password(total)),
+                         f"secret {total - 1}")
+
+    def test_failing_source_stores_nothing(self):
+        async def source():
+            for i in range(100):
+                yield (f"site {i}", "Title", f"user{i}", f"secret {i}", "")
+                await asyncio.sleep(0)
+            raise RuntimeError("source failed")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.vault.add_many(source()))
+        self.assertGreater(self.written, 0)
+        self.assertEqual(self.count_entries(), 0)
+        # The write lock was released with the rollback
+        self.assertEqual(asyncio.run(self.vault.add_many([("a", "b", "c", "d", "")])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Cold start: deferred imports and the versioned schema check.
+
+Each check runs in a fresh interpreter, since this one has long since
+imported everything.
+
+Run with: python -m unittest discover tests
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import migrations
+from utils import DatabaseManager
+
+HEAVY_MODULES = ("cryptography", "bcrypt", "argon2", "multiprocessing")
+
+
+def loaded_after(code: str, modules=HEAVY_MODULES) -> list:
+    """Which of modules a fresh interpreter has loaded after running code"""
+    script = (f"import json, sys\n{code}\n"
+              f"print(json.dumps(sorted(m for m in {tuple(modules)!r} if m in sys.modules)))\n")
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    if result.returncode:
+        raise AssertionError(result.stderr)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class ColdStartTest(unittest.TestCase):
+    def test_gui_module_defers_heavy_imports(self):
+        if importlib.util.find_spec("customtkinter") is None:
+            self.skipTest("customtkinter is not installed")
+        import password_manager_gui
+        self.assertEqual(loaded_after("import password_manager_gui",
+                                      HEAVY_MODULES + password_manager_gui.DEFERRED_MODULES), [])
+
+    def test_reopening_a_vault_skips_schema_setup(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "passwords.db")
+            DatabaseManager._instance = None
+            db_manager = DatabaseManager(db_path)
+            admin_hash = db_manager.get_password_hash("admin")
+            db_manager.pool.close()
+            DatabaseManager._instance = None
+
+            # Neither bcrypt (for the first admin) nor the crypto stack is needed to open it again
+            self.assertEqual(loaded_after(f"from utils import DatabaseManager\n"
+                                          f"DatabaseManager({db_path!r})"), [])
+            db_manager = DatabaseManager(db_path)
+            try:
+                self.assertEqual(db_manager.get_password_hash("admin"), admin_hash)
+                with db_manager.pool.reader() as conn:
+                    self.assertEqual(migrations.current_version(conn), migrations.latest_version())
+            finally:
+                db_manager.pool.close()
+                DatabaseManager._instance = None
+
+
+if __name__ == "__main__":
+    unittest.main()
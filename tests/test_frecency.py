@@ -0,0 +1,152 @@
+"""Quick open: usage counters and the frecency-ranked prefix index.
+
+Run with: python -m unittest discover tests
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frecency
+from frecency import COPY, REVEAL, QuickOpenIndex, UsageLog
+from search import words
+from utils import DatabaseManager
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi"]
+# Common, rare and absent prefixes, so each of the lookup strategies gets picked
+TERMS = ["", "k", "ka", "kalo", "example", "ex ka", "ka lo mi", "vivivi", "ne ru", "zz", "s t"]
+
+
+class QuickOpenIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        self.rng = random.Random(11)
+        self.db_manager.add_many(self.random_row() for _ in range(400))
+        self.usage_log = UsageLog(self.db_manager, flush_interval=3600)
+        self.index = QuickOpenIndex(self.db_manager, self.usage_log)
+        self.index.build()
+
+    def tearDown(self):
+        self.index.close()
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def random_word(self):
+        return "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(1, 3)))
+
+    def random_row(self):
+        return (f"{self.random_word()} {self.random_word()}", self.random_word().title(),
+                f"{self.random_word()}@example.com", b"secret", "")
+
+    def ids(self):
+        return [row[0] for row in self.db_manager.get_all_passwords()]
+
+    def change(self, count):
+        """About count changed entries: adds, updates, deletes and uses"""
+        ids = self.ids()
+        share = max(count // 4, 1)
+        self.db_manager.add_many(self.random_row() for _ in range(share))
+        self.db_manager.update_many((password_id,) + self.random_row()
+                                    for password_id in self.rng.sample(ids, share))
+        self.db_manager.delete_many(self.rng.sample(ids, share))
+        for password_id in self.rng.sample(ids, share):
+            self.usage_log.record(password_id, self.rng.choice([COPY, REVEAL]))
+
+    def assertLookupsAreRight(self, limit=8):
+        """Compare every lookup with a brute-force ranking of the database"""
+        usage = self.usage_log.snapshot()
+        texts = {row[0]: set(words(f"{row[1]}\n{row[2]}\n{row[3]}")) for row in self.db_manager.get_all_passwords()}
+
+        def rank(password_id):
+            return frecency.frecency(*usage[password_id]) if password_id in usage else frecency.unused_rank(password_id)
+
+        for term in TERMS:
+            prefixes = words(term)
+            matching = [password_id for password_id, entry_words in texts.items()
+                        if all(any(word.startswith(prefix) for word in entry_words) for prefix in prefixes)]
+            found = self.index.lookup(term, limit)
+            with self.subTest(term=term):
+                self.assertTrue(set(found) <= set(matching))
+                self.assertEqual([rank(password_id) for password_id in found],
+                                 sorted(map(rank, matching), reverse=True)[:limit])
+
+    def assertMatchesRebuild(self):
+        fresh = QuickOpenIndex(self.db_manager, self.usage_log)
+        try:
+            fresh.build()
+            index = self.index
+            self.assertEqual(index.vocabulary, fresh.vocabulary)
+            self.assertEqual(index.entry_text, fresh.entry_text)
+            self.assertEqual(index.keys, fresh.keys)
+            self.assertEqual([index.keys[i] for i in index.order], [fresh.keys[i] for i in fresh.order])
+            for word, ids in fresh.word_ids.items():
+                self.assertEqual(sorted(index.word_ids[word]), sorted(ids), word)
+                self.assertEqual([index.keys[i] for i in index.word_ids[word]], [fresh.keys[i] for i in ids], word)
+        finally:
+            fresh.close()
+
+    def wait_until_ready(self):
+        deadline = time.monotonic() + 30
+        while not self.index.ready:
+            self.assertLess(time.monotonic(), deadline, "the rebuild did not finish")
+            time.sleep(0.01)
+
+    def test_lookups_after_build(self):
+        for _ in range(30):
+            self.usage_log.record(self.rng.choice(self.ids()), COPY)
+        for limit in (1, 8, 1000):
+            self.assertLookupsAreRight(limit)
+
+    def test_incremental_changes_match_a_rebuild(self):
+        # Below and above ONE_BY_ONE changes per posting list, below RESET_THRESHOLD in total
+        for count in (1, 4, 20, 150, 300, 8):
+            self.change(count)
+            self.assertLookupsAreRight()
+            self.assertTrue(self.index.ready)
+            self.assertMatchesRebuild()
+
+    def test_many_changes_rebuild_in_the_background(self):
+        # Over RESET_THRESHOLD distinct entries: 200 new ones and 400 updated, deleted or used
+        self.change(800)
+        self.assertEqual(self.index.lookup("ka"), [])
+        self.wait_until_ready()
+        self.assertLookupsAreRight()
+        self.assertMatchesRebuild()
+
+
+class UsageLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        self.db_manager.add_many([("one", "Title", "me", b"secret", ""), ("two", "Title", "me", b"secret", "")])
+
+    def tearDown(self):
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def test_uses_are_written_in_one_flush(self):
+        usage_log = UsageLog(self.db_manager, flush_interval=3600)
+        for kind in (COPY, COPY, REVEAL):
+            usage_log.record(1, kind)
+        usage_log.record(2, REVEAL)
+        self.assertEqual(self.db_manager.get_usage(), {})
+        usage_log.close()
+
+        stored = self.db_manager.get_usage()
+        self.assertEqual({password_id: counts[:2] for password_id, counts in stored.items()},
+                         {1: (2, 1), 2: (0, 1)})
+        # A new log starts from the stored counts
+        self.assertEqual(UsageLog(self.db_manager).snapshot(), stored)
+
+
+if __name__ == "__main__":
+    unittest.main()
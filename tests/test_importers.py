@@ -0,0 +1,184 @@
+"""Streaming importers: Bitwarden JSON, KeePass XML and browser CSV.
+
+Run with: python -m unittest discover tests
+"""
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importers
+from importers import ImportEntry, import_entries, read_bitwarden_json, read_browser_csv, read_keepass_xml
+from utils import DatabaseManager, EncryptionManager
+
+BITWARDEN = {
+    "encrypted": False,
+    "folders": [{"id": "f1", "name": "Work"}],
+    "items": [
+        {"type": 1, "name": "GitHub", "folderId": "f1", "notes": "2FA on\n\"quoted\" \\ slash",
+         "login": {"username": "dev@example.com", "password": "päss ☃",
+                   "uris": [{"uri": "https://github.com/login"}]}},
+        {"type": 2, "name": "A secure note", "notes": "not a login"},
+        {"type": 1, "name": "Router", "reprompt": 12345678901234567890, "favorite": True,
+         "login": {"username": "admin", "password": "r0uter", "uris": []}},
+        {"type": 1, "name": "", "login": {"username": "nobody", "password": "x",
+                                          "uris": [{"uri": "mail.example.org"}]}},
+    ],
+}
+BITWARDEN_ENTRIES = [
+    ImportEntry("GitHub", "Work", "dev@example.com", "päss ☃",
+                "https://github.com/login\n2FA on\n\"quoted\" \\ slash"),
+    None,
+    ImportEntry("Router", "Bitwarden", "admin", "r0uter", ""),
+    ImportEntry("", "mail.example.org", "nobody", "x", "mail.example.org"),
+]
+
+KEEPASS = """<?xml version="1.0" encoding="utf-8" standalone="yes"?>
+<KeePassFile>
+  <Meta><Generator>KeePass</Generator></Meta>
+  <Root>
+    <Group>
+      <Name>Root</Name>
+      <Group>
+        <Name>Internet</Name>
+        <Group>
+          <Name>Email</Name>
+          <Entry>
+            <String><Key>Title</Key><Value>Mail</Value></String>
+            <String><Key>UserName</Key><Value>me</Value></String>
+            <String><Key>Password</Key><Value>new-secret</Value></String>
+            <String><Key>URL</Key><Value>https://mail.example.com</Value></String>
+            <History>
+              <Entry>
+                <String><Key>Title</Key><Value>Mail</Value></String>
+                <String><Key>Password</Key><Value>old-secret</Value></String>
+              </Entry>
+            </History>
+          </Entry>
+        </Group>
+        <Entry>
+          <String><Key>Title</Key><Value>Forum</Value></String>
+          <String><Key>UserName</Key><Value>poster</Value></String>
+          <String><Key>Password</Key><Value>f0rum</Value></String>
+          <String><Key>Notes</Key><Value>after the nested group</Value></String>
+        </Entry>
+      </Group>
+      <Entry>
+        <String><Key>UserName</Key><Value>root</Value></String>
+        <String><Key>Password</Key><Value>toor</Value></String>
+        <String><Key>URL</Key><Value>https://server.example.net/admin</Value></String>
+      </Entry>
+    </Group>
+  </Root>
+</KeePassFile>
+"""
+
+
+def bitwarden_bytes(export=BITWARDEN):
+    return json.dumps(export, ensure_ascii=False, indent=2).encode()
+
+
+class BitwardenJsonTest(unittest.TestCase):
+    def test_entries(self):
+        self.assertEqual(list(read_bitwarden_json(io.BytesIO(bitwarden_bytes()))), BITWARDEN_ENTRIES)
+
+    def test_tiny_chunks_give_the_same_entries(self):
+        # Every value, number and escape sequence ends up split across chunks somewhere
+        data = b'\xef\xbb\xbf' + bitwarden_bytes()
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(chunk_size=size), mock.patch.object(importers._JsonStream, 'CHUNK_SIZE', size):
+                self.assertEqual(list(read_bitwarden_json(io.BytesIO(data))), BITWARDEN_ENTRIES)
+
+    def test_top_level_array(self):
+        data = json.dumps(BITWARDEN["items"]).encode()
+        entries = list(read_bitwarden_json(io.BytesIO(data)))
+        # Without folders, titles fall back to the host name
+        self.assertEqual(entries[0].title, "github.com")
+        self.assertEqual(entries[1:], BITWARDEN_ENTRIES[1:])
+
+    def test_encrypted_export_is_refused(self):
+        data = json.dumps({"encrypted": True, "items": []}).encode()
+        with self.assertRaises(ValueError):
+            list(read_bitwarden_json(io.BytesIO(data)))
+
+    def test_truncated_export_is_refused(self):
+        data = bitwarden_bytes()
+        with self.assertRaises(ValueError):
+            list(read_bitwarden_json(io.BytesIO(data[:len(data) // 2])))
+
+
+class KeePassXmlTest(unittest.TestCase):
+    def test_nested_groups_and_history(self):
+        entries = list(read_keepass_xml(io.BytesIO(KEEPASS.encode())))
+        self.assertEqual(entries, [
+            ImportEntry("Mail", "Email", "me", "new-secret", "https://mail.example.com"),
+            ImportEntry("Forum", "Internet", "poster", "f0rum", "after the nested group"),
+            ImportEntry("server.example.net", "Root", "root", "toor", "https://server.example.net/admin"),
+        ])
+
+
+class BrowserCsvTest(unittest.TestCase):
+    def read(self, text):
+        return list(read_browser_csv(io.BytesIO(text.encode("utf-8-sig"))))
+
+    def test_chrome(self):
+        self.assertEqual(self.read("name,url,username,password,note\n"
+                                   "Example,https://example.com/,me,secret,hi\n"),
+                         [ImportEntry("Example", "Browser", "me", "secret", "https://example.com/\nhi")])
+
+    def test_firefox_names_entries_after_the_host(self):
+        self.assertEqual(self.read('"url","username","password","httpRealm","guid"\n'
+                                   '"https://accounts.example.org/login","me","s,ecret","","{1}"\n'),
+                         [ImportEntry("accounts.example.org", "Browser", "me", "s,ecret",
+                                      "https://accounts.example.org/login")])
+
+    def test_bitwarden_csv_aliases(self):
+        self.assertEqual(self.read("folder,favorite,type,name,notes,login_uri,login_username,login_password\n"
+                                   ",,login,Bank,PIN 1234,https://bank.example,client42, pass \n"),
+                         # The password is kept exactly as exported, spaces included
+                         [ImportEntry("Bank", "Browser", "client42", " pass ", "https://bank.example\nPIN 1234")])
+
+    def test_missing_password_column(self):
+        with self.assertRaises(ValueError):
+            self.read("name,url,username\nExample,https://example.com,me\n")
+
+
+class ImportEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        self.encryption_manager = EncryptionManager(base64.urlsafe_b64encode(os.urandom(32)))
+
+    def tearDown(self):
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def test_duplicates_and_non_logins_are_skipped(self):
+        self.db_manager.add_many([("Existing", "Title", "me", self.encryption_manager.encrypt("x"), "")])
+        entries = [
+            ImportEntry("Existing", "Title", "me", "other", ""),   # already in the vault
+            ImportEntry("New", "Title", "me", "new", ""),
+            ImportEntry("New", "Title", "me", "again", ""),        # repeated in the import
+            ImportEntry("New", "Title", "someone else", "new", ""),
+            ImportEntry("No password", "Title", "me", "", ""),
+            None,
+        ]
+        result = import_entries(self.db_manager, self.encryption_manager, entries, batch_size=2)
+        self.assertEqual(result, importers.ImportResult(imported=2, duplicates=2, skipped=2))
+        rows = self.db_manager.get_all_passwords()
+        self.assertEqual(sorted((row[1], row[3]) for row in rows),
+                         [("Existing", "me"), ("New", "me"), ("New", "someone else")])
+        new_id = next(row[0] for row in rows if (row[1], row[3]) == ("New", "me"))
+        self.assertEqual(self.encryption_manager.decrypt(self.db_manager.get_encrypted_password(new_id)), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
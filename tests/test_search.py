@@ -0,0 +1,103 @@
+"""Typo-tolerant search: the in-memory trigram index against fresh rebuilds.
+
+Run with: python -m unittest discover tests
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import TrigramIndex
+from utils import DatabaseManager
+
+WORDS = ["github", "gitlab", "google", "amazon", "banking", "router", "netflix", "spotify",
+         "dropbox", "linkedin", "staging", "production", "personal", "billing", "support"]
+# Exact words, typos, several words at once, and a word every entry has
+TERMS = ["github", "gihtub", "amazn banking", "prodution", "linkedin personal", "spotfy", "example"]
+
+
+class TrigramIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        self.rng = random.Random(7)
+        self.db_manager.add_many(self.random_row() for _ in range(300))
+        self.index = TrigramIndex(self.db_manager)
+        self.index.build()
+
+    def tearDown(self):
+        self.index.close()
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def random_row(self):
+        rng = self.rng
+        return (f"{rng.choice(WORDS)} {rng.choice(WORDS)}", rng.choice(WORDS).title(),
+                f"{rng.choice(WORDS)}@example.com", b"secret", " ".join(rng.sample(WORDS, rng.randint(0, 3))))
+
+    def ids(self):
+        return [row[0] for row in self.db_manager.get_all_passwords()]
+
+    def results(self, index):
+        return {term: sorted(row[0] for row in index.search(term, limit=100000)) for term in TERMS}
+
+    def assertMatchesRebuild(self):
+        fresh = TrigramIndex(self.db_manager)
+        try:
+            fresh.build()
+            self.assertEqual(self.results(self.index), self.results(fresh))
+            self.assertEqual(self.index.stats()['entries'], fresh.stats()['entries'])
+        finally:
+            fresh.close()
+
+    def wait_for_rebuild(self):
+        deadline = time.monotonic() + 30
+        while self.index.replay is not None:
+            self.assertLess(time.monotonic(), deadline, "the background rebuild did not finish")
+            time.sleep(0.01)
+
+    def test_incremental_changes_match_a_rebuild(self):
+        for _ in range(15):
+            ids = self.ids()
+            self.db_manager.add_many(self.random_row() for _ in range(5))
+            self.db_manager.update_many((password_id,) + self.random_row()
+                                        for password_id in self.rng.sample(ids, 5))
+            self.db_manager.delete_many(self.rng.sample(ids, 3))
+            self.assertMatchesRebuild()
+
+    def test_rebuild_after_many_changes_matches(self):
+        for _ in range(2):
+            self.db_manager.update_many((password_id,) + self.random_row() for password_id in self.ids())
+            self.index.search("github")
+        self.wait_for_rebuild()
+        self.assertLessEqual(self.index.stats()['dead_slots'], len(self.ids()))
+        self.assertMatchesRebuild()
+
+    def test_changes_during_a_build_are_replayed(self):
+        iter_passwords = self.db_manager.iter_passwords
+        first_id = self.ids()[-1]
+
+        def iter_and_change(*args, **kwargs):
+            for count, row in enumerate(iter_passwords(*args, **kwargs)):
+                yield row
+                if count == 0:
+                    # The new index has already read this entry; a search now applies the
+                    # change to the old index only, so build() must replay it
+                    self.db_manager.update_many([(first_id, "zeppelin", "Title", "pilot", b"secret", "")])
+                    self.index.search("github")
+
+        self.db_manager.iter_passwords = iter_and_change
+        self.index.build()
+        del self.db_manager.iter_passwords
+        self.assertEqual([row[0] for row in self.index.search("zepelin")], [first_id])
+        self.assertMatchesRebuild()
+
+
+if __name__ == "__main__":
+    unittest.main()
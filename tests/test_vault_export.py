@@ -0,0 +1,146 @@
+"""Reading .spmx vault exports: round trips and damaged or crafted files.
+
+Run with: python -m unittest discover tests
+"""
+import base64
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kdf
+import vault_export
+from utils import DatabaseManager, EncryptionManager
+from vault_export import ExportError, import_export, read_export, write_export
+
+PASSPHRASE = "correct horse"
+# Cheap enough for tests; the format records whatever parameters were used
+FAST_KDF = kdf.Pbkdf2Kdf(iterations=1000)
+ROWS = [("Entry %d" % i, "Title", "user%d" % i, "secret-%d" % i, None, 1700000000 + i)
+        for i in range(5)]
+
+
+def export_bytes(rows, passphrase=PASSPHRASE, rows_per_frame=vault_export.ROWS_PER_FRAME):
+    fp = io.BytesIO()
+    with mock.patch.object(vault_export, 'ROWS_PER_FRAME', rows_per_frame):
+        write_export(fp, rows, passphrase, kdf=FAST_KDF)
+    return fp.getvalue()
+
+
+def split_frames(data: bytes):
+    """(everything before the first frame, [frame bytes, ...])"""
+    (length,) = struct.unpack('>I', data[len(vault_export.MAGIC):len(vault_export.MAGIC) + 4])
+    position = len(vault_export.MAGIC) + 4 + length
+    prefix, frames = data[:position], []
+    while position < len(data):
+        (length,) = struct.unpack('>I', data[position:position + 4])
+        frames.append(data[position:position + 5 + length])
+        position += 5 + length
+    return prefix, frames
+
+
+def crafted_header(name: str, params: str) -> bytes:
+    """An export whose header asks for the given KDF settings; its frames never matter"""
+    header = json.dumps({'kdf': name, 'params': params, 'salt': 'AAAAAAAAAAAAAAAAAAAAAA==',
+                         'compression': 'zlib', 'fields': vault_export.FIELDS}).encode()
+    return vault_export.MAGIC + struct.pack('>I', len(header)) + header + b'\x00' * 64
+
+
+class ReadExportTest(unittest.TestCase):
+    def test_round_trip(self):
+        data = export_bytes(ROWS)
+        self.assertEqual(list(read_export(io.BytesIO(data), PASSPHRASE)), ROWS)
+
+    def test_empty_export(self):
+        self.assertEqual(list(read_export(io.BytesIO(export_bytes([])), PASSPHRASE)), [])
+
+    def test_wrong_passphrase(self):
+        with self.assertRaises(ExportError):
+            list(read_export(io.BytesIO(export_bytes(ROWS)), "wrong"))
+
+    def test_every_truncation_is_detected(self):
+        data = export_bytes(ROWS, rows_per_frame=2)
+        for end in range(len(data)):
+            with self.subTest(end=end), self.assertRaises(ExportError):
+                list(read_export(io.BytesIO(data[:end]), PASSPHRASE))
+
+    def test_every_bit_flip_is_detected(self):
+        data = export_bytes(ROWS, rows_per_frame=2)
+        for position in range(len(data)):
+            for bit in (0x01, 0x80):
+                damaged = bytearray(data)
+                damaged[position] ^= bit
+                with self.subTest(position=position, bit=bit), self.assertRaises(ExportError):
+                    list(read_export(io.BytesIO(bytes(damaged)), PASSPHRASE))
+
+    def test_dropped_repeated_or_reordered_frames_are_detected(self):
+        prefix, frames = split_frames(export_bytes(ROWS, rows_per_frame=2))
+        self.assertEqual(len(frames), 3)
+        for name, order in [("drop middle", [0, 2]), ("drop last", [0, 1]), ("repeat", [0, 0, 1, 2]),
+                            ("swap", [1, 0, 2]), ("append", [0, 1, 2, 2])]:
+            with self.subTest(name), self.assertRaises(ExportError):
+                list(read_export(io.BytesIO(prefix + b"".join(frames[i] for i in order)), PASSPHRASE))
+
+    def test_trailing_data_is_refused(self):
+        data = export_bytes(ROWS) + b"\x00"
+        with self.assertRaises(ExportError):
+            list(read_export(io.BytesIO(data), PASSPHRASE))
+
+    def test_excessive_kdf_parameters_are_refused(self):
+        for name, params in [
+            ('pbkdf2-sha256', 'i=4000000000'),
+            ('scrypt', 'ln=40,r=8,p=1'),
+            ('scrypt', 'ln=20,r=8,p=1000'),
+            ('scrypt', 'ln=0,r=8,p=1'),
+            ('argon2id', 'v=19,m=1073741824,t=3,p=4'),
+            ('argon2id', 'v=19,m=65536,t=100000,p=4'),
+        ]:
+            with self.subTest(name=name, params=params):
+                with self.assertRaises(ExportError):
+                    next(read_export(io.BytesIO(crafted_header(name, params)), PASSPHRASE))
+
+    def test_calibrated_parameters_are_accepted(self):
+        for name in ('pbkdf2-sha256', 'scrypt'):
+            with self.subTest(name=name):
+                self.assertTrue(kdf.calibrate(name).within_limits())
+
+
+class ImportExportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        self.encryption_manager = EncryptionManager(base64.urlsafe_b64encode(os.urandom(32)))
+
+    def tearDown(self):
+        self.db_manager.close_write_queue()
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def test_import_keeps_entries_and_creation_times(self):
+        path = os.path.join(self.directory.name, "vault.spmx")
+        with open(path, "wb") as fp:
+            fp.write(export_bytes(ROWS))
+        result = import_export(self.db_manager, self.encryption_manager, path, PASSPHRASE)
+        self.assertEqual(result.imported, len(ROWS))
+
+        stored = {row[1]: row for row in self.db_manager.get_all_passwords()}
+        for name, title, username, password, _, created_at in ROWS:
+            row = stored[name]
+            self.assertEqual((row[2], row[3], row[5]), (title, username, created_at))
+            self.assertEqual(self.encryption_manager.decrypt(self.db_manager.get_encrypted_password(row[0])),
+                             password)
+        # Newest first, as in the source vault
+        self.assertEqual([row[1] for row in self.db_manager.get_all_passwords()],
+                         [row[0] for row in reversed(ROWS)])
+
+
+if __name__ == "__main__":
+    unittest.main()
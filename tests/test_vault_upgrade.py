@@ -0,0 +1,136 @@
+"""Upgrading a vault written by the first release: schema, login hash and records.
+
+Run with: python -m unittest discover tests
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+from cryptography.fernet import Fernet
+
+import migrations
+from utils import DatabaseManager, RECORD_VERSION, derive_master_key, is_legacy_hash
+
+PASSWORD = "admin123"
+ENTRIES = [
+    ("GitHub work", "Code", "dev@example.com", "gh-secret", "CI token"),
+    ("Bank", "Finance", "me@example.com", "b4nk!", None),
+    ("Router", "Home", "admin", "r0uter", ""),
+]
+
+
+def create_baseline_vault(db_path: str):
+    """Schema, bcrypt login and Fernet rows exactly as the first release wrote them"""
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password_hash TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS passwords (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                title TEXT NOT NULL,
+                username TEXT NOT NULL,
+                encrypted_password BLOB NOT NULL,
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_name ON passwords(name)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_title ON passwords(title)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_username ON passwords(username)')
+        conn.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)',
+                     ('admin', bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt()).decode()))
+        cipher_suite = Fernet(derive_master_key(PASSWORD))
+        conn.executemany('''
+            INSERT INTO passwords (name, title, username, encrypted_password, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(name, title, username, cipher_suite.encrypt(secret.encode()), description)
+              for name, title, username, secret, description in ENTRIES])
+    conn.close()
+
+
+class VaultUpgradeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.directory.name, "passwords.db")
+        create_baseline_vault(db_path)
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(db_path)
+
+    def tearDown(self):
+        self.db_manager.close_write_queue()
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def test_schema_is_migrated(self):
+        with self.db_manager.pool.reader() as conn:
+            self.assertEqual(migrations.current_version(conn), migrations.latest_version())
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(passwords)')]
+        self.assertNotIn('encrypted_password', columns)
+        # Timestamps are stored as integers from version 2 on
+        self.assertIsInstance(self.db_manager.get_all_passwords()[0][5], int)
+
+    def test_unlock_upgrades_hash_and_records(self):
+        self.assertIsNone(self.db_manager.unlock('admin', 'wrong'))
+        encryption_manager = self.db_manager.unlock('admin', PASSWORD)
+        self.assertIsNotNone(encryption_manager)
+        self.assertFalse(is_legacy_hash(self.db_manager.get_password_hash('admin')))
+
+        by_name = {row[1]: row[0] for row in self.db_manager.get_all_passwords()}
+        for name, _, _, secret, _ in ENTRIES:
+            record = self.db_manager.get_encrypted_password(by_name[name])
+            self.assertEqual(record[:1], RECORD_VERSION)
+            self.assertEqual(encryption_manager.decrypt(record), secret)
+        self.assertEqual(self.db_manager.migrate_records(encryption_manager), 0)
+
+        # The upgraded hash unlocks the same data key
+        unlocked_again = self.db_manager.unlock('admin', PASSWORD)
+        self.assertEqual(unlocked_again.data_key, encryption_manager.data_key)
+
+    def test_migration_skips_unreadable_records(self):
+        encryption_manager = self.db_manager.unlock('admin', PASSWORD)
+        legacy = Fernet(encryption_manager.data_key).encrypt(b"still fernet")
+        self.db_manager.add_many([("Legacy", "Old", "me", legacy, ""),
+                                  ("Damaged", "Old", "me", b"gAAAAAB-not-a-token", "")])
+        by_name = {row[1]: row[0] for row in self.db_manager.get_all_passwords()}
+
+        self.assertEqual(self.db_manager.migrate_records(encryption_manager), 2)
+        self.assertEqual(self.db_manager.migrate_records(encryption_manager), 0)
+        self.assertEqual(self.db_manager.unreadable_records, {by_name["Damaged"]})
+        record = self.db_manager.get_encrypted_password(by_name["Legacy"])
+        self.assertEqual(record[:1], RECORD_VERSION)
+        self.assertEqual(encryption_manager.decrypt(record), "still fernet")
+
+    def test_upgraded_hash_needs_no_tuning(self):
+        self.db_manager.unlock('admin', PASSWORD)
+        # Just calibrated here: however far off an unlock was, re-hashing would pick the same parameters
+        self.assertFalse(self.db_manager.kdf_needs_tuning('admin', 0.001))
+        self.assertFalse(self.db_manager.kdf_needs_tuning('admin', 60))
+
+    def test_search_and_delete_after_upgrade(self):
+        self.assertTrue(self.db_manager.fts_enabled)
+        self.db_manager.unlock('admin', PASSWORD)
+        found = self.db_manager.search_passwords("github")
+        self.assertEqual([row[1] for row in found], ["GitHub work"])
+
+        password_id = found[0][0]
+        self.db_manager.delete_password(password_id)
+        self.assertEqual(self.db_manager.search_passwords("github"), [])
+        self.assertIsNone(self.db_manager.get_password_entry(password_id))
+        self.assertIsNone(self.db_manager.get_encrypted_password(password_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Group commit through WriteQueue: batching, ordering and failure isolation.
+
+Run with: python -m unittest discover tests
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DatabaseManager, WriteQueue
+
+
+class WriteQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        DatabaseManager._instance = None
+        self.db_manager = DatabaseManager(os.path.join(self.directory.name, "passwords.db"))
+        # Generous delay so writes queued back to back share a commit
+        self.write_queue = WriteQueue(self.db_manager, max_delay=0.2)
+
+    def tearDown(self):
+        self.write_queue.close()
+        self.db_manager.pool.close()
+        DatabaseManager._instance = None
+        self.directory.cleanup()
+
+    def names(self):
+        return sorted(row[1] for row in self.db_manager.get_all_passwords())
+
+    def test_concurrent_writes_share_commits(self):
+        futures = []
+        lock = threading.Lock()
+
+        def writer(thread):
+            for i in range(25):
+                future = self.write_queue.add(f"site {thread}-{i}", "Title", "user", b"secret")
+                with lock:
+                    futures.append(future)
+
+        threads = [threading.Thread(target=writer, args=(thread,)) for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            future.result(timeout=10)
+
+        self.assertEqual(len(self.names()), 200)
+        self.assertEqual(self.write_queue.stats['writes'], 200)
+        self.assertLess(self.write_queue.stats['commits'], 20)
+
+    def test_failed_write_does_not_fail_the_batch(self):
+        good = self.write_queue.add("first", "Title", "user", b"secret")
+        bad = self.write_queue.add(None, "Title", "user", b"secret")  # name is NOT NULL
+        also_good = self.write_queue.add("second", "Title", "user", b"secret")
+        good.result(timeout=10)
+        also_good.result(timeout=10)
+        with self.assertRaises(sqlite3.IntegrityError):
+            bad.result(timeout=10)
+        self.assertEqual(self.names(), ["first", "second"])
+
+    def test_mixed_writes_apply_in_order(self):
+        self.write_queue.add("kept", "Title", "user", b"old")
+        self.write_queue.add("removed", "Title", "user", b"secret")
+        self.write_queue.flush(timeout=10)
+        ids = {row[1]: row[0] for row in self.db_manager.get_all_passwords()}
+
+        self.write_queue.update(ids["kept"], "renamed", "Title", "user", b"new", "")
+        self.write_queue.delete(ids["removed"])
+        self.write_queue.add("added", "Title", "user", b"secret")
+        self.write_queue.flush(timeout=10)
+
+        self.assertEqual(self.names(), ["added", "renamed"])
+        self.assertEqual(self.db_manager.get_encrypted_password(ids["kept"]), b"new")
+        self.assertIsNone(self.db_manager.get_encrypted_password(ids["removed"]))
+
+    def test_close_commits_pending_writes(self):
+        future = self.write_queue.add("last", "Title", "user", b"secret")
+        self.write_queue.close()
+        self.assertTrue(future.done())
+        self.assertEqual(self.names(), ["last"])
+        with self.assertRaises(RuntimeError):
+            self.write_queue.add("late", "Title", "user", b"secret")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,40 +1,168 @@
 import sqlite3
-import bcrypt
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import migrations
+from app_paths import default_database_path
 import base64
+import collections
+import contextlib
+import copy
+import hashlib
+import hmac
+import itertools
 import os
+import pathlib
+import queue
+import re
 import threading
+import time
 
-def get_app_data_path():
-    """Get the appropriate AppData path for storing the database"""
-    app_name = "SecurePasswordManager"
-    if os.name == 'nt':  # Windows
-        app_data = os.getenv('APPDATA')
-        if not app_data:
-            app_data = os.path.expanduser('~\\AppData\\Roaming')
-        base_path = os.path.join(app_data, app_name)
-    else:  # Linux/Mac
-        base_path = os.path.expanduser(f'~/.{app_name.lower()}')
-    
-    # Create directory if it doesn't exist
-    if not os.path.exists(base_path):
-        os.makedirs(base_path)
-    
-    return base_path
+# cryptography and kdf are imported by the functions that use them, so that
+# listing and searching the vault (cli.py) never load them
 
-class EncryptionManager:
-    def __init__(self, master_key):
-        # Generate a key from the master password
-        kdf = PBKDF2HMAC(
+def derive_master_key(master_key: str) -> bytes:
+    """Derive the key-encryption key from the master password"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b'static_salt',  # In production, use a random salt
+        iterations=480000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(master_key.encode()))
+
+def derive_unlock_keys(password: str, salt: bytes, kdf):
+    """Run one slow derivation and split it into (login verifier, key-encryption key)"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    # Expanding the 32-byte KDF output with HKDF costs next to nothing,
+    # unlike asking the slow KDF itself for more output
+    derived = HKDF(
+        algorithm=hashes.SHA256(),
+        length=64,
+        salt=None,
+        info=b'unlock-keys',
+    ).derive(kdf.derive(password.encode(), salt))
+    # Only a hash of the first half is stored; the second half never leaves memory
+    verifier = hashlib.sha256(derived[:32]).digest()
+    return verifier, base64.urlsafe_b64encode(derived[32:])
+
+def hash_unlock_password(password: str, kdf=None):
+    """Return (password_hash, key-encryption key) for a new password and random salt.
+
+    Without an explicit kdf, parameters are calibrated for this machine.
+    """
+    from kdf import calibrate, encode_hash
+    kdf = kdf or calibrate()
+    salt = os.urandom(16)
+    verifier, key_encryption_key = derive_unlock_keys(password, salt, kdf)
+    return encode_hash(kdf, salt, verifier), key_encryption_key
+
+def check_unlock_password(password: str, password_hash: str):
+    """Return the key-encryption key if password matches password_hash, else None"""
+    from kdf import decode_hash
+    kdf, salt, verifier = decode_hash(password_hash)
+    candidate, key_encryption_key = derive_unlock_keys(password, salt, kdf)
+    if hmac.compare_digest(candidate, verifier):
+        return key_encryption_key
+    return None
+
+def is_legacy_hash(password_hash: str) -> bool:
+    # bcrypt hashes from before the single-KDF unlock ($2a$, $2b$, $2y$)
+    return password_hash.startswith('$2')
+
+def check_legacy_password(password: str, password_hash: str) -> bool:
+    # Only old vaults need bcrypt, so it is not loaded at startup
+    import bcrypt
+    return bcrypt.checkpw(password.encode(), password_hash.encode())
+
+# Leading byte of a binary AEAD record; Fernet tokens always start with b'g'
+RECORD_VERSION = b'\x01'
+
+class RecordCipher:
+    """Compact versioned records: version byte | 12-byte nonce | AES-GCM ciphertext and tag.
+
+    Base64 Fernet tokens written by earlier versions are still accepted by decrypt().
+    """
+    def __init__(self, key: bytes):
+        # key is a Fernet key (urlsafe base64 of 32 random bytes); the AEAD key is
+        # derived from it so the two formats never share raw key material
+        from cryptography.fernet import Fernet
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+        self.fernet = Fernet(key)
+        self.aead = AESGCM(HKDF(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=b'static_salt',  # In production, use a random salt
-            iterations=480000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(master_key.encode()))
-        self.cipher_suite = Fernet(key)
+            salt=None,
+            info=b'record-v1',
+        ).derive(base64.urlsafe_b64decode(key)))
+
+    def encrypt(self, data: bytes) -> bytes:
+        nonce = os.urandom(12)
+        return RECORD_VERSION + nonce + self.aead.encrypt(nonce, data, RECORD_VERSION)
+
+    def decrypt(self, record: bytes) -> bytes:
+        if is_legacy_record(record):
+            return self.fernet.decrypt(record)
+        if record[:1] != RECORD_VERSION:
+            raise ValueError(f"Unsupported record version: {record[:1]!r}")
+        return self.aead.decrypt(record[1:13], record[13:], RECORD_VERSION)
+
+def is_legacy_record(record) -> bool:
+    return record[:1] in (b'g', 'g')
+
+def _encrypt_one(cipher_suite: RecordCipher, data: str) -> bytes:
+    return cipher_suite.encrypt(data.encode())
+
+def _decrypt_one(cipher_suite: RecordCipher, encrypted_data: bytes) -> str:
+    return cipher_suite.decrypt(encrypted_data).decode()
+
+# Cipher of a batch worker process, built once by _init_batch_worker
+_worker_cipher = None
+
+def _init_batch_worker(data_key: bytes):
+    global _worker_cipher
+    _worker_cipher = RecordCipher(data_key)
+
+def _run_chunk(func, chunk, cipher_suite: RecordCipher = None):
+    # Thread workers share the manager's cipher; process workers use their own
+    cipher_suite = cipher_suite or _worker_cipher
+    results = []
+    for item in chunk:
+        try:
+            results.append((func(cipher_suite, item), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+class EncryptionManager:
+    def __init__(self, master_key, wrapped_key: bytes = None):
+        # The master password only protects the vault's data key; the rows
+        # themselves are encrypted with that random data key (envelope encryption).
+        # master_key is either an already-derived key-encryption key (bytes) or a
+        # master password, which is run through the legacy static-salt derivation.
+        self.key_cipher = RecordCipher(master_key if isinstance(master_key, bytes)
+                                       else derive_master_key(master_key))
+        if wrapped_key is None:
+            # Same format as Fernet.generate_key()
+            self.data_key = base64.urlsafe_b64encode(os.urandom(32))
+        else:
+            self.data_key = self.key_cipher.decrypt(wrapped_key)
+        self.cipher_suite = RecordCipher(self.data_key)
+
+    @classmethod
+    def from_data_key(cls, data_key: bytes) -> "EncryptionManager":
+        """Manager for an already unwrapped data key, e.g. one handed over by the unlock agent.
+
+        It has no master key, so wrap_key() and decrypt_legacy() fail until
+        rekey() gives it one.
+        """
+        manager = cls.__new__(cls)
+        manager.key_cipher = None
+        manager.data_key = data_key
+        manager.cipher_suite = RecordCipher(data_key)
+        return manager
 
     def encrypt(self, data: str) -> bytes:
         return self.cipher_suite.encrypt(data.encode())
@@ -42,18 +170,338 @@ class EncryptionManager:
     def decrypt(self, encrypted_data: bytes) -> str:
         return self.cipher_suite.decrypt(encrypted_data).decode()
 
+    def encrypt_many(self, items, workers: int = None, chunk_size: int = 512, processes: bool = False):
+        """Encrypt an iterable of strings, yielding (index, value, error) per item in input order"""
+        return self._map_chunks(_encrypt_one, self.encrypt, items, workers, chunk_size, processes)
+
+    def decrypt_many(self, items, workers: int = None, chunk_size: int = 512, processes: bool = False):
+        """Decrypt an iterable of tokens, yielding (index, value, error) per item in input order.
+
+        Exactly one of value and error is set.
+        """
+        return self._map_chunks(_decrypt_one, self.decrypt, items, workers, chunk_size, processes)
+
+    def _map_chunks(self, func, method, items, workers, chunk_size, processes):
+        workers = workers or os.cpu_count() or 1
+        iterator = iter(items)
+
+        if workers == 1:
+            # Not worth a pool; AES-GCM records are cheap enough to handle one by one
+            for index, item in enumerate(iterator):
+                try:
+                    yield index, method(item), None
+                except Exception as e:
+                    yield index, None, e
+            return
+
+        # Only a bounded number of chunks is in flight at once to keep memory flat.
+        # Processes only pay off for legacy Fernet tokens, whose decoding is mostly
+        # Python; never fork them from a process that is running other threads.
+        # Imported here: concurrent.futures (and multiprocessing) cost tens of ms at startup
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                           initargs=(self.data_key,))
+            cipher_suite = None
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=workers)
+            cipher_suite = self.cipher_suite
+        with executor:
+            pending = collections.deque()
+            index = 0
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = list(itertools.islice(iterator, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append((index, executor.submit(_run_chunk, func, chunk, cipher_suite)))
+                    index += len(chunk)
+                if not pending:
+                    break
+                start, future = pending.popleft()
+                for offset, (value, error) in enumerate(future.result()):
+                    yield start + offset, value, error
+
+    def wrap_key(self) -> bytes:
+        """Encrypt the data key with the master-password-derived key"""
+        return self.key_cipher.encrypt(self.data_key)
+
+    def decrypt_legacy(self, encrypted_data: bytes) -> str:
+        """Decrypt a row written before envelope encryption (keyed directly by the master password)"""
+        return self.key_cipher.decrypt(encrypted_data).decode()
+
+    def rekey(self, new_master_key) -> "EncryptionManager":
+        """Return a manager for the same data key protected by a new master key"""
+        manager = copy.copy(self)
+        manager.key_cipher = RecordCipher(new_master_key if isinstance(new_master_key, bytes)
+                                          else derive_master_key(new_master_key))
+        return manager
+
+class ConnectionPool:
+    """One serialized writer connection plus up to max_readers read-only connections.
+
+    In WAL mode readers see the last committed state without blocking the
+    writer, so background jobs can read while the UI writes. A checked-out
+    connection belongs to one thread until it is returned; nested checkouts
+    in the same thread reuse it.
+    """
+    def __init__(self, db_path: str, max_readers: int = 4, checkout_timeout: float = 30):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self.checkout_timeout = checkout_timeout
+        self.writer_connection = self._connect(self.db_path)
+        self.writer_connection.execute("PRAGMA journal_mode=WAL")  # Use Write-Ahead Logging
+        self.writer_connection.execute("PRAGMA synchronous=NORMAL")  # Faster synchronization
+        self.write_lock = threading.RLock()
+        self.idle_readers = queue.LifoQueue()
+        self.readers = []
+        self.readers_lock = threading.Lock()
+        self.local = threading.local()
+        # Bumped after every committed write, so caches built from reads can tell they are stale
+        self.commits = 0
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            'reader_checkouts': 0,
+            'reader_wait_seconds': 0.0,
+            'writer_checkouts': 0,
+            'writer_wait_seconds': 0.0,
+        }
+
+    @staticmethod
+    def _connect(database: str, uri: bool = False):
+        conn = sqlite3.connect(database, uri=uri, check_same_thread=False)
+        conn.execute("PRAGMA cache_size=-2000")  # 2MB cache per connection
+        return conn
+
+    def _open_reader(self):
+        uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + '?mode=ro'
+        conn = self._connect(uri, uri=True)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _record(self, kind: str, waited: float):
+        with self.stats_lock:
+            self.stats[f'{kind}_checkouts'] += 1
+            self.stats[f'{kind}_wait_seconds'] += waited
+
+    @contextlib.contextmanager
+    def reader(self):
+        # Inside a write, read through the writer so uncommitted changes are visible
+        if getattr(self.local, 'writer_depth', 0):
+            yield self.writer_connection
+            return
+        held = getattr(self.local, 'reader', None)
+        if held is not None:
+            yield held
+            return
+
+        start = time.perf_counter()
+        try:
+            conn = self.idle_readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self.readers_lock:
+                if len(self.readers) < self.max_readers:
+                    conn = self._open_reader()
+                    self.readers.append(conn)
+            if conn is None:
+                try:
+                    conn = self.idle_readers.get(timeout=self.checkout_timeout)
+                except queue.Empty:
+                    raise TimeoutError("Timed out waiting for a database reader connection") from None
+        self._record('reader', time.perf_counter() - start)
+
+        self.local.reader = conn
+        try:
+            yield conn
+        finally:
+            self.local.reader = None
+            self.idle_readers.put(conn)
+
+    @contextlib.contextmanager
+    def writer(self):
+        """Yield the writer connection inside a transaction (committed on success)"""
+        start = time.perf_counter()
+        if not self.write_lock.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError("Timed out waiting for the database writer connection")
+        self._record('writer', time.perf_counter() - start)
+
+        depth = getattr(self.local, 'writer_depth', 0)
+        self.local.writer_depth = depth + 1
+        callbacks = []
+        try:
+            if depth:
+                # Nested in an outer write; the outer block owns the transaction
+                yield self.writer_connection
+            else:
+                self.local.on_commit = callbacks
+                with self.writer_connection:
+                    yield self.writer_connection
+                self.commits += 1
+        finally:
+            if not depth:
+                self.local.on_commit = None
+            self.local.writer_depth = depth
+            self.write_lock.release()
+        for callback in callbacks:
+            callback()
+
+    def on_commit(self, callback):
+        """Call callback() once the current write transaction has committed (never on rollback).
+
+        Outside a write it is called right away.
+        """
+        callbacks = getattr(self.local, 'on_commit', None)
+        if callbacks is None:
+            callback()
+        else:
+            callbacks.append(callback)
+
+    def get_stats(self) -> dict:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['max_readers'] = self.max_readers
+        stats['readers_open'] = len(self.readers)
+        stats['readers_idle'] = self.idle_readers.qsize()
+        for kind in ('reader', 'writer'):
+            checkouts = stats[f'{kind}_checkouts']
+            stats[f'{kind}_avg_wait_ms'] = stats[f'{kind}_wait_seconds'] / checkouts * 1000 if checkouts else 0.0
+        return stats
+
+    def close(self):
+        with self.readers_lock:
+            for conn in self.readers:
+                conn.close()
+            self.readers = []
+        self.writer_connection.close()
+
+class WriteQueue:
+    """Coalesces small writes from many callers into group commits.
+
+    A background thread collects whatever arrives within max_delay seconds
+    (up to max_batch operations) and commits it in one transaction. Every
+    call returns a Future that resolves only after its transaction has
+    committed, so callers can still wait for their own write.
+
+    Durability: the database runs in WAL mode with synchronous=NORMAL. A
+    resolved write survives an application crash; after power loss or an
+    OS crash the last few commits may be rolled back, but the database is
+    never corrupted. Writes still queued when the process dies are lost,
+    so call close() (or flush()) before exiting.
+    """
+    def __init__(self, db_manager, max_delay: float = 0.005, max_batch: int = 1000):
+        self.db_manager = db_manager
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.closed = False
+        self.stats = {'writes': 0, 'commits': 0}
+        self.thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self.thread.start()
+
+    def add(self, name: str, title: str, username: str, encrypted_password: bytes, description: str = "") -> "Future":
+        return self._submit('add', (name, title, username, encrypted_password, description))
+
+    def update(self, password_id: int, name: str, title: str, username: str,
+               encrypted_password: bytes, description: str) -> "Future":
+        return self._submit('update', (password_id, name, title, username, encrypted_password, description))
+
+    def delete(self, password_id: int) -> "Future":
+        return self._submit('delete', password_id)
+
+    def flush(self, timeout: float = None):
+        """Block until everything queued so far has been committed"""
+        self._submit('flush', None).result(timeout)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+    def _submit(self, kind: str, row) -> "Future":
+        if self.closed:
+            raise RuntimeError("The write queue is closed")
+        from concurrent.futures import Future
+        future = Future()
+        self.queue.put((kind, row, future))
+        return future
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Give other writers up to max_delay to join this commit, but stop
+            # lingering as soon as arrivals pause for a fraction of that
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = min(deadline - time.monotonic(), self.max_delay / 5)
+                try:
+                    item = self.queue.get(timeout=max(timeout, 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit([op for op in batch if op[2].set_running_or_notify_cancel()])
+
+    def _commit(self, ops):
+        try:
+            with self.db_manager.pool.writer():
+                # Nested writer checkouts join this transaction
+                for kind, group in itertools.groupby(ops, key=lambda op: op[0]):
+                    rows = [row for _, row, _ in group]
+                    if kind == 'add':
+                        self.db_manager.add_many(rows)
+                    elif kind == 'update':
+                        self.db_manager.update_many(rows)
+                    elif kind == 'delete':
+                        self.db_manager.delete_many(rows)
+        except Exception as error:
+            if len(ops) == 1:
+                ops[0][2].set_exception(error)
+                return
+            # One bad write must not fail the others; retry them one per transaction
+            for op in ops:
+                self._commit([op])
+            return
+        self.stats['writes'] += sum(1 for op in ops if op[0] != 'flush')
+        self.stats['commits'] += 1
+        for _, _, future in ops:
+            future.set_result(None)
+
 class DatabaseManager:
     _instance = None
     _lock = threading.Lock()
+
+    # Connection pool settings; change before the first DatabaseManager() call
+    MAX_READERS = 4
+    CHECKOUT_TIMEOUT = 30  # seconds to wait for a free connection
+    # Up to 5 parameters per row and statement; stays under the 999-variable limit of older SQLite builds
+    INSERT_ROWS_PER_STATEMENT = 199
+    # PRAGMA user_version of a fully migrated database
+    SCHEMA_VERSION = migrations.latest_version()
     
-    def __new__(cls):
+    def __new__(cls, db_path: str = None):
         with cls._lock:
             if not cls._instance:
                 cls._instance = super(DatabaseManager, cls).__new__(cls)
-                # Set database path in AppData
-                db_path = os.path.join(get_app_data_path(), "passwords.db")
+                # Set database path in AppData unless one is given explicitly
+                if db_path is None:
+                    db_path = default_database_path()
                 cls._instance.db_path = db_path
-                cls._instance.connection = None
+                cls._instance.pool = None
+                cls._instance.fts_enabled = False
+                cls._instance._write_queue = None
+                cls._instance.change_listeners = []
+                # Ids of legacy rows migrate_records could not decrypt
+                cls._instance.unreadable_records = set()
                 cls._instance.init_database()
             return cls._instance
 
@@ -64,107 +512,601 @@ class DatabaseManager:
             os.makedirs(db_dir)
 
         # Initialize database with connection pooling
-        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.connection.execute("PRAGMA journal_mode=WAL")  # Use Write-Ahead Logging
-        self.connection.execute("PRAGMA synchronous=NORMAL")  # Faster synchronization
-        self.connection.execute("PRAGMA cache_size=-2000")  # 2MB cache
-        
-        with self.connection:
-            cursor = self.connection.cursor()
-            # Create users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    username TEXT PRIMARY KEY,
-                    password_hash TEXT NOT NULL
-                )
-            ''')
-            # Create passwords table with indexes
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS passwords (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    username TEXT NOT NULL,
-                    encrypted_password BLOB NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            # Create indexes for faster searching
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON passwords(name)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON passwords(title)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_username ON passwords(username)')
+        self.pool = ConnectionPool(self.db_path, max_readers=self.MAX_READERS,
+                                   checkout_timeout=self.CHECKOUT_TIMEOUT)
+
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA user_version')
+            version = cursor.fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                # Schema is up to date; skip the DDL on every later launch
+                self.fts_enabled = self._has_search_index(cursor)
+                return
+            if version == 0:
+                self._create_schema(cursor)
+
+        # Bring older schemas up to date; large vaults are converted in batches
+        migrations.migrate(self, target=self.SCHEMA_VERSION)
+        with self.pool.reader() as conn:
+            self.fts_enabled = self._has_search_index(conn.cursor())
+
+    def _create_schema(self, cursor):
+        """Version 1 schema; later versions are reached through migrations.py"""
+        # Create users table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password_hash TEXT NOT NULL
+            )
+        ''')
+        # Create passwords table with indexes
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS passwords (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                title TEXT NOT NULL,
+                username TEXT NOT NULL,
+                encrypted_password BLOB NOT NULL,
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Create indexes for faster searching
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON passwords(name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON passwords(title)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_username ON passwords(username)')
+        self.fts_enabled = self._init_search_index(cursor)
+        # Data key for the vault, wrapped by the master password
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vault_keys (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                wrapped_key BLOB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
             
-            # Insert default admin user if not exists
+        # Insert default admin user on first run only; hashing is slow
+        cursor.execute("SELECT 1 FROM users WHERE username = 'admin'")
+        if cursor.fetchone() is None:
+            import bcrypt
             admin_password = "admin123"
             hashed = bcrypt.hashpw(admin_password.encode(), bcrypt.gensalt())
             cursor.execute('''
                 INSERT OR IGNORE INTO users (username, password_hash)
                 VALUES (?, ?)
             ''', ('admin', hashed.decode()))
+        cursor.execute('PRAGMA user_version = 1')
+
+    @staticmethod
+    def _has_search_index(cursor) -> bool:
+        # False when the index was never created or this SQLite lacks FTS5
+        try:
+            cursor.execute('SELECT 1 FROM passwords_fts LIMIT 0')
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    def _init_search_index(self, cursor) -> bool:
+        # Full-text index over the searchable columns, kept in sync by triggers.
+        # Returns False when SQLite was built without FTS5; searches then use LIKE.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'passwords_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS passwords_fts USING fts5(
+                    name, title, username, description,
+                    content='passwords', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            return False
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS passwords_fts_insert AFTER INSERT ON passwords BEGIN
+                INSERT INTO passwords_fts (rowid, name, title, username, description)
+                VALUES (new.id, new.name, new.title, new.username, new.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS passwords_fts_delete AFTER DELETE ON passwords BEGIN
+                INSERT INTO passwords_fts (passwords_fts, rowid, name, title, username, description)
+                VALUES ('delete', old.id, old.name, old.title, old.username, old.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS passwords_fts_update
+            AFTER UPDATE OF name, title, username, description ON passwords BEGIN
+                INSERT INTO passwords_fts (passwords_fts, rowid, name, title, username, description)
+                VALUES ('delete', old.id, old.name, old.title, old.username, old.description);
+                INSERT INTO passwords_fts (rowid, name, title, username, description)
+                VALUES (new.id, new.name, new.title, new.username, new.description);
+            END
+        ''')
+        if not exists:
+            # Index rows that were stored before the search index existed
+            cursor.execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('rebuild')")
+        return True
+
+    @staticmethod
+    def _fts_query(search_term: str) -> str:
+        # Every word must match, each as a prefix: "git us" -> "git"* AND "us"*
+        return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', search_term))
 
     def __del__(self):
-        if self.connection:
-            self.connection.close()
+        if self.pool:
+            self.pool.close()
 
     def get_connection(self):
-        if not self.connection:
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-        return self.connection
+        # Raw writer connection, kept for callers that predate the pool.
+        # Prefer pool.reader()/pool.writer(), which handle locking.
+        return self.pool.writer_connection
 
-    def verify_user(self, username: str, password: str) -> bool:
-        with self.get_connection() as conn:
+    def pool_stats(self) -> dict:
+        return self.pool.get_stats()
+
+    def get_password_hash(self, username: str):
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT password_hash FROM users WHERE username = ?', (username,))
             result = cursor.fetchone()
+            return result[0] if result else None
+
+    def verify_user(self, username: str, password: str) -> bool:
+        password_hash = self.get_password_hash(username)
+        if password_hash is None:
+            return False
+        if is_legacy_hash(password_hash):
+            return check_legacy_password(password, password_hash)
+        return check_unlock_password(password, password_hash) is not None
+
+    def unlock(self, username: str, password: str):
+        """Verify the login and open the vault with a single key derivation.
+
+        Returns an EncryptionManager, or None if the credentials are wrong.
+        Accounts still on bcrypt are upgraded after their next successful login.
+        """
+        password_hash = self.get_password_hash(username)
+        if password_hash is None:
+            return None
+
+        if not is_legacy_hash(password_hash):
+            key_encryption_key = check_unlock_password(password, password_hash)
+            if key_encryption_key is None:
+                return None
+            return self.open_vault(key_encryption_key)
+
+        if not check_legacy_password(password, password_hash):
+            return None
+        encryption_manager = self.open_vault(password)
+        return self.change_password(username, password, encryption_manager)
+
+    def kdf_needs_tuning(self, username: str, unlock_seconds: float) -> bool:
+        """True if the stored KDF is not the preferred one, or misses the target unlock time
+        here and calibrating would pick different parameters"""
+        from kdf import TARGET_MS, calibrate, decode_hash, default_kdf_name
+        password_hash = self.get_password_hash(username)
+        if password_hash is None or is_legacy_hash(password_hash):
+            return False
+        kdf, _, _ = decode_hash(password_hash)
+        if kdf.name != default_kdf_name():
+            return True
+        ratio = unlock_seconds / (TARGET_MS / 1000)
+        if 0.5 <= ratio <= 2:
+            return False
+        # Calibration is clamped (scrypt stops at 1 GiB), so on a very fast or slow
+        # host the target may be out of reach; re-hashing would then change nothing
+        return calibrate(kdf.name).encode_params() != kdf.encode_params()
+
+    def get_wrapped_key(self):
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT wrapped_key FROM vault_keys WHERE id = 1')
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+    def open_vault(self, master_key) -> EncryptionManager:
+        """Unwrap the vault's data key, migrating a legacy vault on first use"""
+        wrapped_key = self.get_wrapped_key()
+        if wrapped_key is not None:
+            return EncryptionManager(master_key, wrapped_key)
+
+        # Legacy layout: rows are encrypted directly with the master-password key.
+        # Re-encrypt them once under a fresh data key and store the wrapped key.
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            # Another thread may have finished the migration in the meantime
+            cursor.execute('SELECT wrapped_key FROM vault_keys WHERE id = 1')
+            result = cursor.fetchone()
             if result:
-                stored_hash = result[0].encode()
-                return bcrypt.checkpw(password.encode(), stored_hash)
-        return False
+                return EncryptionManager(master_key, result[0])
 
-    def add_password(self, name: str, title: str, username: str, encrypted_password: bytes, description: str = ""):
-        with self.get_connection() as conn:
+            encryption_manager = EncryptionManager(master_key)
+            cursor.execute('SELECT id, encrypted_password FROM password_secrets')
+            for pwd_id, encrypted_password in cursor.fetchall():
+                decrypted = encryption_manager.decrypt_legacy(encrypted_password)
+                cursor.execute('UPDATE password_secrets SET encrypted_password = ? WHERE id = ?',
+                             (encryption_manager.encrypt(decrypted), pwd_id))
+            cursor.execute('INSERT INTO vault_keys (id, wrapped_key) VALUES (1, ?)',
+                         (encryption_manager.wrap_key(),))
+        return encryption_manager
+
+    def change_password(self, username: str, new_password: str,
+                        encryption_manager: EncryptionManager) -> EncryptionManager:
+        """Store a new password hash and re-wrap the data key in one transaction"""
+        password_hash, key_encryption_key = hash_unlock_password(new_password)
+        new_encryption_manager = encryption_manager.rekey(key_encryption_key)
+        with self.pool.writer() as conn:
             cursor = conn.cursor()
+            cursor.execute('UPDATE users SET password_hash = ? WHERE username = ?',
+                         (password_hash, username))
             cursor.execute('''
-                INSERT INTO passwords (name, title, username, encrypted_password, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, title, username, encrypted_password, description))
+                UPDATE vault_keys SET wrapped_key = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+            ''', (new_encryption_manager.wrap_key(),))
+        return new_encryption_manager
+
+    def add_password(self, name: str, title: str, username: str, encrypted_password: bytes,
+                     description: str = "") -> int:
+        """Insert one entry and return its id"""
+        with self.pool.writer() as conn:
+            self.add_many([(name, title, username, encrypted_password, description)])
+            # The last insert is the secret, stored under the new entry's id
+            return conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+    def add_many(self, rows) -> int:
+        """Insert (name, title, username, encrypted_password, description) rows in one transaction.
+
+        A row may carry a sixth item, its created_at epoch (e.g. from an
+        export); without one, or if it is None, the entry is created now.
+        """
+        rows = list(rows)
+        with self.pool.writer() as conn:
+            # The FTS sync trigger makes every INSERT statement costly, so insert
+            # many rows per statement (about 2x faster than executemany here)
+            for start in range(0, len(rows), self.INSERT_ROWS_PER_STATEMENT):
+                chunk = rows[start:start + self.INSERT_ROWS_PER_STATEMENT]
+                cursor = conn.execute(f'''
+                    INSERT INTO passwords (name, title, username, description, created_at)
+                    VALUES {', '.join([f'(?, ?, ?, ?, COALESCE(?, {migrations.EPOCH_NOW}))'] * len(chunk))}
+                ''', [value for name, title, username, _, description, *created_at in chunk
+                      for value in (name, title, username, description, created_at[0] if created_at else None)])
+                # AUTOINCREMENT ids from one statement under the write lock are consecutive
+                first_id = cursor.lastrowid - len(chunk) + 1
+                conn.execute(f'''
+                    INSERT INTO password_secrets (id, encrypted_password)
+                    VALUES {', '.join(['(?, ?)'] * len(chunk))}
+                ''', [value for offset, row in enumerate(chunk) for value in (first_id + offset, row[3])])
+                self._entries_changed(range(first_id, first_id + len(chunk)))
+        return len(rows)
+
+    def update_many(self, rows) -> int:
+        """Apply (id, name, title, username, encrypted_password, description) updates in one transaction"""
+        rows = list(rows)
+        with self.pool.writer() as conn:
+            cursor = conn.executemany(f'''
+                UPDATE passwords
+                SET name = ?, title = ?, username = ?, description = ?, updated_at = {migrations.EPOCH_NOW}
+                WHERE id = ?
+            ''', [(name, title, username, description, password_id)
+                  for password_id, name, title, username, _, description in rows])
+            conn.executemany('UPDATE password_secrets SET encrypted_password = ? WHERE id = ?',
+                             [(row[4], row[0]) for row in rows])
+            self._entries_changed(row[0] for row in rows)
+        return cursor.rowcount
+
+    def delete_many(self, password_ids) -> int:
+        password_ids = list(password_ids)
+        with self.pool.writer() as conn:
+            cursor = conn.executemany('DELETE FROM passwords WHERE id = ?',
+                                      [(password_id,) for password_id in password_ids])
+            self._entries_changed(password_ids)
+        return cursor.rowcount
+
+    def add_change_listener(self, listener):
+        """Call listener(ids) after every commit that added, updated or deleted entries.
+
+        It runs on the committing thread right after the commit, so it should
+        only note the ids; read the rows back (get_password_entries) later.
+        Entries missing from a later read were deleted.
+        """
+        self.change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        if listener in self.change_listeners:
+            self.change_listeners.remove(listener)
+
+    def _entries_changed(self, ids):
+        if self.change_listeners:
+            ids = list(ids)
+            self.pool.on_commit(lambda: [listener(ids) for listener in list(self.change_listeners)])
+
+    def find_duplicates(self, pairs) -> set:
+        """Return the (name, username) pairs that already exist in the vault"""
+        pairs = set(pairs)
+        names = list({name for name, _ in pairs})
+        found = set()
+        with self.pool.reader() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor = conn.execute(f'SELECT name, username FROM passwords WHERE name IN ({placeholders})', chunk)
+                found.update(row for row in cursor if row in pairs)
+        return found
+
+    @property
+    def write_queue(self) -> "WriteQueue":
+        """Shared group-commit queue for small interactive writes"""
+        with self._lock:
+            if self._write_queue is None:
+                self._write_queue = WriteQueue(self)
+            return self._write_queue
+
+    def close_write_queue(self):
+        """Commit pending queued writes and stop the queue; nothing to do if it was never used"""
+        with self._lock:
+            write_queue, self._write_queue = self._write_queue, None
+        if write_queue is not None:
+            write_queue.close()
 
     def get_all_passwords(self):
-        with self.get_connection() as conn:
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT id, name, title, username, encrypted_password, description, created_at
+                SELECT id, name, title, username, description, created_at
                 FROM passwords
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
             ''')
             return cursor.fetchall()
 
-    def search_passwords(self, search_term: str):
-        with self.get_connection() as conn:
+    def get_updated_since(self, since: int):
+        """Rows changed after the epoch `since`, oldest change first"""
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, name, title, username, description, created_at
+                FROM passwords
+                WHERE updated_at > ?
+                ORDER BY updated_at
+            ''', (since,))
+            return cursor.fetchall()
+
+    def search_passwords(self, search_term: str, use_fts: bool = True):
+        fts_query = self._fts_query(search_term) if use_fts and self.fts_enabled else ''
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            if fts_query:
+                cursor.execute('''
+                    SELECT p.id, p.name, p.title, p.username, p.description, p.created_at
+                    FROM passwords_fts
+                    JOIN passwords p ON p.id = passwords_fts.rowid
+                    WHERE passwords_fts MATCH ?
+                    ORDER BY passwords_fts.rank
+                ''', (fts_query,))
+                return cursor.fetchall()
+
+            # Substring fallback: no FTS5 support, or a term without any words
             search_pattern = f'%{search_term}%'
             cursor.execute('''
-                SELECT id, name, title, username, encrypted_password, description, created_at
+                SELECT id, name, title, username, description, created_at
                 FROM passwords
                 WHERE name LIKE ? OR title LIKE ? OR username LIKE ? OR description LIKE ?
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
             ''', (search_pattern, search_pattern, search_pattern, search_pattern))
             return cursor.fetchall()
 
-    def delete_password(self, password_id: int):
-        with self.get_connection() as conn:
+    def get_matching_passwords(self, search_term: str):
+        """Every row matching search_term, newest first (layout of get_all_passwords)"""
+        condition, params = self._search_filter(search_term)
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM passwords WHERE id = ?', (password_id,))
+            cursor.execute(f'''
+                SELECT p.id, p.name, p.title, p.username, p.description, p.created_at
+                FROM passwords p
+                WHERE {condition}
+                ORDER BY p.created_at DESC, p.id DESC
+            ''', params)
+            return cursor.fetchall()
 
-    def update_password(self, password_id: int, name: str, title: str, username: str, 
-                       encrypted_password: bytes, description: str):
-        with self.get_connection() as conn:
+    def get_password_entry(self, password_id: int):
+        """Metadata row for one entry (layout of get_all_passwords), or None"""
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE passwords 
-                SET name = ?, title = ?, username = ?, encrypted_password = ?, 
-                    description = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (name, title, username, encrypted_password, description, password_id)) 
\ No newline at end of file
+                SELECT id, name, title, username, description, created_at
+                FROM passwords WHERE id = ?
+            ''', (password_id,))
+            return cursor.fetchone()
+
+    def get_password_entries(self, password_ids):
+        """Metadata rows for the given ids (layout of get_all_passwords); missing ids are skipped"""
+        password_ids = list(password_ids)
+        rows = []
+        with self.pool.reader() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(password_ids), 500):
+                chunk = password_ids[start:start + 500]
+                cursor = conn.execute(f'''
+                    SELECT id, name, title, username, description, created_at
+                    FROM passwords WHERE id IN ({', '.join('?' * len(chunk))})
+                ''', chunk)
+                rows.extend(cursor.fetchall())
+        return rows
+
+    def find_passwords_by_name(self, name: str):
+        """Entries with exactly this name (uses idx_name), newest first"""
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, name, title, username, description, created_at
+                FROM passwords
+                WHERE name = ?
+                ORDER BY created_at DESC, id DESC
+            ''', (name,))
+            return cursor.fetchall()
+
+    def get_encrypted_password(self, password_id: int):
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT encrypted_password FROM password_secrets WHERE id = ?', (password_id,))
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+    def record_usage(self, rows) -> int:
+        """Add (id, copies, reveals, last_used) counts in one transaction; ids no longer present are skipped"""
+        with self.pool.writer() as conn:
+            cursor = conn.executemany('''
+                INSERT INTO entry_usage (id, copies, reveals, last_used)
+                SELECT id, ?, ?, ? FROM passwords WHERE id = ?
+                ON CONFLICT (id) DO UPDATE SET
+                    copies = copies + excluded.copies,
+                    reveals = reveals + excluded.reveals,
+                    last_used = MAX(last_used, excluded.last_used)
+            ''', [(copies, reveals, last_used, password_id) for password_id, copies, reveals, last_used in rows])
+        return cursor.rowcount
+
+    def get_usage(self) -> dict:
+        """{id: (copies, reveals, last_used)} for every entry that has been used"""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('SELECT id, copies, reveals, last_used FROM entry_usage')
+            return {password_id: (copies, reveals, last_used) for password_id, copies, reveals, last_used in cursor}
+
+    def _search_filter(self, search_term: str):
+        # WHERE clause restricting passwords (aliased p) to rows matching search_term
+        fts_query = self._fts_query(search_term) if self.fts_enabled else ''
+        if fts_query:
+            return ('p.id IN (SELECT rowid FROM passwords_fts WHERE passwords_fts MATCH ?)',
+                    [fts_query])
+        search_pattern = f'%{search_term}%'
+        return ('(p.name LIKE ? OR p.title LIKE ? OR p.username LIKE ? OR p.description LIKE ?)',
+                [search_pattern] * 4)
+
+    def get_passwords_page(self, search_term: str = "", limit: int = 50, after=None):
+        """Return (rows, next_token) for one page, newest first.
+
+        Pages are keyed on (created_at, id) rather than OFFSET, so every page
+        costs the same. Pass next_token back as `after` to get the following
+        page; it is None once the last page has been returned.
+        """
+        conditions, params = [], []
+        if search_term:
+            condition, search_params = self._search_filter(search_term)
+            conditions.append(condition)
+            params.extend(search_params)
+        if after is not None:
+            conditions.append('(p.created_at, p.id) < (?, ?)')
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT p.id, p.name, p.title, p.username, p.description, p.created_at
+                FROM passwords p
+                {where}
+                ORDER BY p.created_at DESC, p.id DESC
+                LIMIT ?
+            ''', (*params, limit + 1))
+            rows = cursor.fetchall()
+
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, (last[5], last[0])
+
+    def iter_passwords(self, chunk_size: int = 500, include_secrets: bool = True):
+        """Stream every row in id order, fetching chunk_size rows per query.
+
+        Rows are (id, name, title, username, encrypted_password, description, created_at),
+        or the metadata-only layout of get_all_passwords without secrets. No read
+        transaction is held open between chunks.
+        """
+        if include_secrets:
+            columns = 'p.id, p.name, p.title, p.username, s.encrypted_password, p.description, p.created_at'
+            tables = 'passwords p JOIN password_secrets s ON s.id = p.id'
+        else:
+            columns = 'p.id, p.name, p.title, p.username, p.description, p.created_at'
+            tables = 'passwords p'
+        last_id = 0
+        while True:
+            with self.pool.reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {columns} FROM {tables}
+                    WHERE p.id > ?
+                    ORDER BY p.id
+                    LIMIT ?
+                ''', (last_id, chunk_size))
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    def migrate_records(self, encryption_manager: EncryptionManager, batch_size: int = 500) -> int:
+        """Rewrite one batch of legacy Fernet rows as AEAD records; returns rows handled.
+
+        Call repeatedly until it returns 0. Each batch is its own short
+        transaction, so the migration can run alongside normal use. Rows that
+        fail to decrypt are left as they are, added to unreadable_records and
+        skipped by later calls.
+        """
+        skipped = self.unreadable_records
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, encrypted_password FROM password_secrets
+                WHERE substr(encrypted_password, 1, 1) != ?
+                LIMIT ?
+            ''', (RECORD_VERSION, batch_size + len(skipped)))
+            rows = [row for row in cursor.fetchall() if row[0] not in skipped][:batch_size]
+            updates = []
+            for pwd_id, encrypted_password in rows:
+                try:
+                    plaintext = encryption_manager.decrypt(encrypted_password)
+                except Exception:
+                    # Damaged, or not encrypted with this vault's key; another pass will not help
+                    skipped.add(pwd_id)
+                    continue
+                record = encryption_manager.encrypt(plaintext)
+                # Skip the row if it changed since it was read
+                updates.append((record, pwd_id, encrypted_password))
+            cursor.executemany('''
+                UPDATE password_secrets SET encrypted_password = ? WHERE id = ? AND encrypted_password = ?
+            ''', updates)
+        return len(rows)
+
+    def delete_password(self, password_id: int):
+        self.delete_many([password_id])
+
+    def update_password(self, password_id: int, name: str, title: str, username: str, 
+                       encrypted_password: bytes, description: str):
+        self.update_many([(password_id, name, title, username, encrypted_password, description)]) 
+
+# Field names of the metadata rows returned by get_all_passwords and friends
+ENTRY_FIELDS = ('id', 'name', 'title', 'username', 'description', 'created_at')
+
+def entry_dict(row) -> dict:
+    return dict(zip(ENTRY_FIELDS, row))
+
+def lookup_entry(db_manager, name: str = None, password_id: int = None, username: str = None):
+    """The metadata row for one entry, by id or by exact name; raises LookupError otherwise"""
+    if password_id is not None:
+        row = db_manager.get_password_entry(password_id)
+        if row is None:
+            raise LookupError(f"No entry with id {password_id}")
+        return row
+    if not name:
+        raise LookupError("Give an entry name or id")
+    rows = db_manager.find_passwords_by_name(name)
+    if username is not None:
+        rows = [row for row in rows if row[3] == username]
+    if not rows:
+        raise LookupError(f"No entry named {name!r}")
+    if len(rows) > 1:
+        ids = ', '.join(str(row[0]) for row in rows)
+        raise LookupError(f"{len(rows)} entries are named {name!r} (ids {ids}); give an id or username")
+    return rows[0]
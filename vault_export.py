@@ -0,0 +1,177 @@
+"""Encrypted, streaming vault export format.
+
+Layout of an export file:
+
+    MAGIC | header length (u32) | header (JSON) | frame | frame | ...
+    frame = ciphertext length (u32) | flags (u8) | AES-256-GCM ciphertext
+
+The header names the KDF, its parameters and the salt used to turn the
+passphrase into the export key; the key is bound to the whole header with
+HKDF, so changing any header byte makes every frame fail to decrypt. Each
+frame holds a zlib-compressed JSON array of rows. Frame i uses nonce i and
+has (i, flags) as associated data, so frames cannot be reordered, dropped or
+replayed, and the FINAL flag on the last frame exposes truncation.
+
+Reading and writing only ever hold one frame in memory.
+"""
+import base64
+import itertools
+import json
+import os
+import struct
+import zlib
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from importers import ImportEntry, import_entries
+from kdf import calibrate as calibrate_kdf, decode_params
+
+MAGIC = b'SPMX\x01'
+FIELDS = ('name', 'title', 'username', 'password', 'description', 'created_at')
+ROWS_PER_FRAME = 2000
+# Fastest zlib level: most of the gain for a fraction of the CPU time
+COMPRESSION_LEVEL = 1
+FLAG_FINAL = 0x01
+# Refuse frames and headers far beyond anything write_export produces
+MAX_HEADER_BYTES = 64 * 1024
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+class ExportError(ValueError):
+    """The file is not a valid export, is damaged, or the passphrase is wrong"""
+
+def _export_cipher(passphrase: str, kdf, salt: bytes, header: bytes) -> AESGCM:
+    secret = kdf.derive(passphrase.encode(), salt)
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+               info=b'vault-export' + header).derive(secret)
+    return AESGCM(key)
+
+def _frame_aad(index: int, flags: int) -> bytes:
+    return struct.pack('>QB', index, flags)
+
+def _read_exact(fp, size: int) -> bytes:
+    data = fp.read(size)
+    if len(data) != size:
+        raise ExportError("The export file is truncated")
+    return data
+
+def write_export(fp, rows, passphrase: str, kdf=None, progress=None) -> int:
+    """Write rows (tuples in FIELDS order) to a binary file; returns the number written"""
+    kdf = kdf or calibrate_kdf()
+    salt = os.urandom(16)
+    header = json.dumps({
+        'kdf': kdf.name,
+        'params': kdf.encode_params(),
+        'salt': base64.b64encode(salt).decode(),
+        'compression': 'zlib',
+        'fields': FIELDS,
+    }).encode()
+    fp.write(MAGIC + struct.pack('>I', len(header)) + header)
+    cipher = _export_cipher(passphrase, kdf, salt, header)
+
+    rows = iter(rows)
+    count = 0
+    frame = list(itertools.islice(rows, ROWS_PER_FRAME))
+    for index in itertools.count():
+        # Look one frame ahead so the last frame can carry the FINAL flag
+        following = list(itertools.islice(rows, ROWS_PER_FRAME)) if frame else []
+        flags = 0 if following else FLAG_FINAL
+        payload = zlib.compress(json.dumps(frame, ensure_ascii=False).encode(), COMPRESSION_LEVEL)
+        record = cipher.encrypt(index.to_bytes(12, 'big'), payload, _frame_aad(index, flags))
+        fp.write(struct.pack('>IB', len(record), flags) + record)
+        count += len(frame)
+        if progress:
+            progress(count)
+        if flags & FLAG_FINAL:
+            return count
+        frame = following
+
+def read_export(fp, passphrase: str):
+    """Yield rows (tuples in FIELDS order); each frame is authenticated before its rows are released"""
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ExportError("Not a vault export file")
+    (length,) = struct.unpack('>I', _read_exact(fp, 4))
+    if length > MAX_HEADER_BYTES:
+        raise ExportError("The export header is damaged")
+    header = _read_exact(fp, length)
+    try:
+        info = json.loads(header)
+        kdf = decode_params(info['kdf'], info['params'])
+        salt = base64.b64decode(info['salt'])
+    except (ValueError, KeyError) as e:
+        raise ExportError(f"The export header is damaged: {e}") from None
+    # The header is not authenticated until a frame decrypts, so a crafted one
+    # must not get to pick an unbounded derivation cost
+    if not kdf.within_limits():
+        raise ExportError("The export header asks for key derivation settings beyond this app's limits")
+    cipher = _export_cipher(passphrase, kdf, salt, header)
+
+    for index in itertools.count():
+        length, flags = struct.unpack('>IB', _read_exact(fp, 5))
+        if length > MAX_FRAME_BYTES:
+            raise ExportError("The export file is damaged")
+        record = _read_exact(fp, length)
+        try:
+            payload = cipher.decrypt(index.to_bytes(12, 'big'), record, _frame_aad(index, flags))
+        except InvalidTag:
+            if index == 0:
+                raise ExportError("Wrong passphrase, or the export file is damaged") from None
+            raise ExportError(f"The export file is damaged (frame {index})") from None
+
+        for row in json.loads(zlib.decompress(payload)):
+            yield tuple(row)
+        if flags & FLAG_FINAL:
+            if fp.read(1):
+                raise ExportError("Unexpected data after the end of the export")
+            return
+
+def export_vault(db_manager, encryption_manager, path: str, passphrase: str, progress=None) -> int:
+    """Stream every entry into an export file at path; returns the number exported.
+
+    The file is written next to path and renamed into place once complete.
+    """
+    rows, secrets = itertools.tee(db_manager.iter_passwords())
+    # AES-GCM records are cheap to decrypt, so a worker pool costs more than it
+    # saves; and forking one from the GUI's threaded task runner is unsafe
+    results = encryption_manager.decrypt_many((row[4] for row in secrets), workers=1)
+
+    def plaintext_rows():
+        for (_, name, title, username, _, description, created_at), (_, password, error) in zip(rows, results):
+            if error is not None:
+                raise error
+            yield name, title, username, password, description, created_at
+
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'wb') as fp:
+            count = write_export(fp, plaintext_rows(), passphrase, progress=progress)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return count
+
+def verify_export(path: str, passphrase: str) -> int:
+    """Authenticate a whole export without importing it; returns the number of entries"""
+    with open(path, 'rb') as fp:
+        return sum(1 for _ in read_export(fp, passphrase))
+
+def import_export(db_manager, encryption_manager, path: str, passphrase: str, progress=None):
+    """Import an export file through the regular import pipeline (duplicates are skipped).
+
+    Frames are authenticated one at a time, so a file that turns out to be
+    truncated or damaged part-way leaves the entries before the damage
+    imported; run verify_export first to rule that out.
+    """
+    total = os.path.getsize(path) or 1
+    with open(path, 'rb') as fp:
+        # created_at is kept, so imported entries stay in their original order
+        entries = (ImportEntry(*row[:5], created_at=row[5] if isinstance(row[5], int) else None)
+                   for row in read_export(fp, passphrase))
+        report = None
+        if progress:
+            report = lambda processed: progress(processed, min(fp.tell() / total, 1.0))
+        return import_entries(db_manager, encryption_manager, entries, progress=report)
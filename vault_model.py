@@ -0,0 +1,67 @@
+"""One shared, observable view of the vault's entries for the GUI.
+
+DatabaseManager reports the ids touched by each commit on the committing
+thread. VaultModel collects them and, on the Tk thread, reads the rows back
+once for every open list: subscribers get the changed rows (added or
+updated) and the ids that are gone, and patch just those cards instead of
+rebuilding their lists. Changes too large to patch row by row, like an
+import, are announced as a reset and the lists reload instead.
+"""
+import threading
+
+class VaultModel:
+    # How often pending changes are looked for, in milliseconds; sync() applies them at once
+    SYNC_INTERVAL = 100
+    # More changed entries than this at once and subscribers reload instead
+    RESET_THRESHOLD = 500
+
+    def __init__(self, db_manager, root):
+        self.db_manager = db_manager
+        self.root = root
+        # Noted on the committing thread, read back on the Tk thread
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.subscribers = []
+        db_manager.add_change_listener(self._changed)
+        self.job = root.after(self.SYNC_INTERVAL, self._poll)
+
+    def subscribe(self, on_change, on_reset):
+        """Call on_change(rows, removed_ids) after entries change, or on_reset() after bulk changes.
+
+        rows maps each added or updated id to its row (layout of
+        get_all_passwords). Both run on the Tk thread.
+        """
+        subscriber = (on_change, on_reset)
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def _changed(self, ids):
+        with self.lock:
+            self.pending.update(ids)
+
+    def sync(self):
+        """Tell the subscribers about every change committed so far; Tk thread only"""
+        with self.lock:
+            ids, self.pending = self.pending, set()
+        if not ids:
+            return
+        if len(ids) > self.RESET_THRESHOLD:
+            for _, on_reset in list(self.subscribers):
+                on_reset()
+            return
+        rows = {row[0]: row for row in self.db_manager.get_password_entries(ids)}
+        removed = ids - rows.keys()
+        for on_change, _ in list(self.subscribers):
+            on_change(rows, removed)
+
+    def _poll(self):
+        self.sync()
+        self.job = self.root.after(self.SYNC_INTERVAL, self._poll)
+
+    def close(self):
+        self.db_manager.remove_change_listener(self._changed)
+        self.root.after_cancel(self.job)
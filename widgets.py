@@ -0,0 +1,172 @@
+import tkinter as tk
+import customtkinter as ctk
+from theme import Theme
+
+class VirtualList:
+    """Scrollable list that only creates widgets for the rows on screen.
+
+    A small pool of cards is created on demand and re-bound to different rows
+    as the canvas scrolls, so the widget count depends on the viewport height
+    rather than on the number of rows. Cards come from card_factory(parent)
+    and must expose a `frame` widget and a `bind(row)` method. Single rows
+    can be inserted, replaced or removed without re-binding the other cards
+    on screen, except those whose rows moved.
+    """
+
+    def __init__(self, parent, card_factory, row_height, bg, load_more=None,
+                 overscan=2, empty_text="No passwords found"):
+        self.card_factory = card_factory
+        self.row_height = row_height
+        self.load_more = load_more
+        self.overscan = overscan
+        self.rows = []
+        self.has_more = False
+        self.load_pending = False
+        # Each slot is [card, canvas window id, index of the bound row or None]
+        self.slots = []
+
+        self.canvas = tk.Canvas(parent, bg=bg, highlightthickness=0, yscrollincrement=20)
+        self.scrollbar = ctk.CTkScrollbar(parent, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.empty_label = ctk.CTkLabel(
+            self.canvas,
+            text=empty_text,
+            font=Theme.FONTS["main"],
+            text_color="#000000"
+        )
+        self.empty_window = self.canvas.create_window(0, 20, window=self.empty_label, anchor="n", state="hidden")
+
+        self.canvas.bind("<Configure>", self.on_configure)
+
+        # Scroll with the mouse wheel anywhere over the list, including over cards
+        toplevel = self.canvas.winfo_toplevel()
+        bindings = [(sequence, toplevel.bind(sequence, self.on_mousewheel, add="+"))
+                    for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>")]
+
+        def unbind_mousewheel(event):
+            if event.widget is self.canvas:
+                for sequence, funcid in bindings:
+                    toplevel.unbind(sequence, funcid)
+        self.canvas.bind("<Destroy>", unbind_mousewheel)
+
+    def winfo_exists(self):
+        return self.canvas.winfo_exists()
+
+    def set_rows(self, rows, has_more=False):
+        self.rows = list(rows)
+        self.has_more = has_more
+        for slot in self.slots:
+            slot[2] = None
+        self.update_scroll_region()
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def append_rows(self, rows, has_more=False):
+        self.rows.extend(rows)
+        self.has_more = has_more
+        self.update_scroll_region()
+        self.refresh()
+
+    def insert_row(self, index, row):
+        self.rows.insert(index, row)
+        self._rows_moved(index)
+
+    def update_row(self, index, row):
+        self.rows[index] = row
+        for card, window, bound_index in self.slots:
+            if bound_index == index:
+                card.bind(row)
+
+    def remove_row(self, index):
+        del self.rows[index]
+        self._rows_moved(index)
+
+    def _rows_moved(self, index):
+        # Rows from index on shifted by one; only the cards of those on screen are re-bound
+        for slot in self.slots:
+            if slot[2] is not None and slot[2] >= index:
+                slot[2] = None
+        self.update_scroll_region()
+        self.refresh()
+
+    def update_scroll_region(self):
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), len(self.rows) * self.row_height))
+
+    def on_configure(self, event):
+        for card, window, index in self.slots:
+            self.canvas.itemconfigure(window, width=max(event.width - 20, 1))
+        self.canvas.coords(self.empty_window, event.width // 2, 20)
+        self.update_scroll_region()
+        self.refresh()
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def on_mousewheel(self, event):
+        if not self.canvas.winfo_exists() or not str(event.widget).startswith(str(self.canvas)):
+            return
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.canvas.yview_scroll(-3, "units")
+        else:
+            self.canvas.yview_scroll(3, "units")
+
+    def refresh(self):
+        if not self.rows:
+            for slot in self.slots:
+                self.canvas.itemconfigure(slot[1], state="hidden")
+                slot[2] = None
+            self.canvas.itemconfigure(self.empty_window, state="hidden" if self.has_more else "normal")
+            return
+        self.canvas.itemconfigure(self.empty_window, state="hidden")
+
+        # Visible rows plus a little overscan on each side
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first = max(int(top // self.row_height) - self.overscan, 0)
+        last = min(int((top + height) // self.row_height) + self.overscan + 1, len(self.rows))
+
+        if len(self.slots) < last - first:
+            while len(self.slots) < last - first:
+                card = self.card_factory(self.canvas)
+                window = self.canvas.create_window(
+                    10, 0,
+                    window=card.frame,
+                    anchor="nw",
+                    width=max(self.canvas.winfo_width() - 20, 1),
+                    height=self.row_height - 10
+                )
+                self.slots.append([card, window, None])
+            # The row -> slot mapping depends on the pool size
+            for slot in self.slots:
+                slot[2] = None
+
+        # Row i always lives in slot i % pool size, so rows that stay on screen
+        # while scrolling keep their card and are not re-bound
+        visible = set()
+        for index in range(first, last):
+            slot = self.slots[index % len(self.slots)]
+            card, window, bound_index = slot
+            if bound_index != index:
+                card.bind(self.rows[index])
+                slot[2] = index
+            self.canvas.coords(window, 10, index * self.row_height + 5)
+            self.canvas.itemconfigure(window, state="normal")
+            visible.add(id(slot))
+        for slot in self.slots:
+            if id(slot) not in visible:
+                self.canvas.itemconfigure(slot[1], state="hidden")
+                slot[2] = None
+
+        # Ask for the next page before the user reaches the end
+        if self.has_more and self.load_more and not self.load_pending and last >= len(self.rows) - self.overscan:
+            self.load_pending = True
+            self.canvas.after_idle(self._load_more)
+
+    def _load_more(self):
+        self.load_pending = False
+        if self.canvas.winfo_exists():
+            self.load_more()